@@ -3,15 +3,25 @@ API REST para el Sistema Judicial Blockchain
 Proporciona endpoints para gestionar casos, usuarios y autenticación
 """
 
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, g, Response, stream_with_context, make_response
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.formparser import MultiPartParser
 import psycopg
-from psycopg.rows import dict_row
+from psycopg_pool import PoolTimeout
 import os
+import json
+import atexit
+import hashlib
 from datetime import datetime, timedelta
 import secrets
-from court_system import CourtSystem
+from court_system import hash_document_stream, HashingWriter
+from case_index import decode_cursor
+from chain_service import ChainClient, ChainServiceError, create_court_system, register_default_judges
+from scheduler import CommitTicket
+from response_cache import ResponseCache
+from database import db_connection
+from sessions import SessionStore
+from password_hashing import PasswordHasher, HashingBusy, TooManyAttempts, DEFAULT_HASH_METHOD
 from functools import wraps
 from typing import Optional, Dict, Any
 
@@ -24,90 +34,253 @@ app.config['SESSION_COOKIE_SECURE'] = False  # True en producción con HTTPS
 CORS(app, supports_credentials=True, origins=["http://localhost:3000", "http://localhost:5173"])
 
 # Sistema judicial global
-court_system = CourtSystem(difficulty=3)
-
-# Configuración de base de datos
-DB_CONFIG = {
-    'host': os.environ.get('DB_HOST', 'localhost'),
-    'database': os.environ.get('DB_NAME', 'judicial_blockchain'),
-    'user': os.environ.get('DB_USER', 'postgres'),
-    'password': os.environ.get('DB_PASSWORD', 'postgres'),
-    'port': os.environ.get('DB_PORT', '5432')
-}
-
-
-def get_db_connection():
-    """Crea una conexión a la base de datos PostgreSQL"""
-    try:
-        conn = psycopg.connect(
-            host=DB_CONFIG['host'],
-            dbname=DB_CONFIG['database'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password'],
-            port=DB_CONFIG['port'],
-            row_factory=dict_row
-        )
-        return conn
-    except psycopg.Error as e:
-        print(f"Error conectando a la base de datos: {e}")
-        return None
-
+# Con CHAIN_SERVICE_SOCKET la cadena vive en el proceso de chain_service.py y este proceso
+# es un worker sin estado (se pueden ejecutar varios); si no, la cadena es local
+CHAIN_SERVICE_SOCKET = os.environ.get('CHAIN_SERVICE_SOCKET')
+if CHAIN_SERVICE_SOCKET:
+    court_system = ChainClient(
+        CHAIN_SERVICE_SOCKET,
+        cache_entries=int(os.environ.get('CHAIN_CLIENT_CACHE_ENTRIES', '1024'))
+    )
+else:
+    court_system = create_court_system()
+
+# Respuestas GET serializadas por versión de la cadena (ETag / 304)
+response_cache = ResponseCache(int(os.environ.get('RESPONSE_CACHE_ENTRIES', '256')))
+
+# Sesiones del lado del servidor (tabla sessions) con cache en memoria
+session_store = SessionStore(
+    session_ttl=timedelta(hours=float(os.environ.get('SESSION_TTL_HOURS', '8'))),
+    cache_size=int(os.environ.get('SESSION_CACHE_SIZE', '10000')),
+    cache_ttl=float(os.environ.get('SESSION_CACHE_TTL', '60')),
+    sweep_interval=float(os.environ.get('SESSION_SWEEP_INTERVAL', '300'))
+)
+# Se inicia al importar el módulo: con gunicorn no se ejecuta el bloque __main__
+session_store.start_sweeper()
+
+# Hash de contraseñas (scrypt) en un pool de procesos, fuera de los hilos de petición
+# PASSWORD_HASH_MAX_PENDING debe ser menor que los hilos del servidor para que una
+# ráfaga de logins no los ocupe todos
+password_hasher = PasswordHasher(
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '0')) or None,
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '8')),
+    per_user_limit=int(os.environ.get('PASSWORD_HASH_PER_USER', '2')),
+    queue_timeout=float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', '1')),
+    method=os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+)
+atexit.register(password_hasher.close)
+
+# Máximo de documentos por solicitud de verificación masiva
+MAX_BULK_DOCUMENTS = 1000
+
+# Paginación de /api/blockchain/chain
+DEFAULT_CHAIN_PAGE_SIZE = 50
+MAX_CHAIN_PAGE_SIZE = 500
+DEFAULT_CASES_PAGE_SIZE = 50
+MAX_CASES_PAGE_SIZE = 500
+DEFAULT_SEARCH_RESULTS = 20
+MAX_SEARCH_RESULTS = 100
+# Parámetros de GET /api/cases que activan la consulta por índices
+CASE_QUERY_PARAMS = ('type', 'status', 'judge', 'from', 'to', 'cursor', 'limit')
 
 def init_database():
     """Inicializa las tablas de la base de datos"""
-    conn = get_db_connection()
-    if not conn:
-        print("No se pudo conectar a PostgreSQL. Usando modo sin base de datos.")
-        return False
-    
     try:
-        cur = conn.cursor()
-        
-        # Tabla de usuarios
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                username VARCHAR(100) UNIQUE NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                role VARCHAR(50) NOT NULL,
-                full_name VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabla de sesiones (opcional, Flask maneja sesiones por defecto)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id),
-                session_token VARCHAR(255) UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP NOT NULL
-            )
-        """)
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Tabla de usuarios
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id SERIAL PRIMARY KEY,
+                    username VARCHAR(100) UNIQUE NOT NULL,
+                    email VARCHAR(255) UNIQUE NOT NULL,
+                    password_hash VARCHAR(255) NOT NULL,
+                    role VARCHAR(50) NOT NULL,
+                    full_name VARCHAR(255),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Tabla de sesiones (session_token guarda el hash SHA-256 del token)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+                    session_token VARCHAR(255) UNIQUE NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP NOT NULL
+                )
+            """)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+            cur.close()
         
-        conn.commit()
-        cur.close()
-        conn.close()
         print("Base de datos inicializada correctamente")
         return True
+    except PoolTimeout:
+        print("No se pudo conectar a PostgreSQL. Usando modo sin base de datos.")
+        return False
     except psycopg.Error as e:
         print(f"Error inicializando base de datos: {e}")
         return False
-        
+
+
+def commit_response(result, success_message: str, error_message: str):
+    """
+    Construye la respuesta de una operación que registra una transacción
+    Si quedó encolada para minado en segundo plano responde 202 con su id
+    """
+    if isinstance(result, CommitTicket):
+        return jsonify({
+            "message": success_message,
+            "transaction_id": result.transaction_id,
+            "status": "pending"
+        }), 202
+    elif result:
+        return jsonify({"message": success_message}), 201
+    else:
+        return jsonify({"error": error_message}), 400
+
+
+def busy_response():
+    """Respuesta cuando la cola de hashing de contraseñas está llena"""
+    response = jsonify({"error": "Servidor ocupado, intente de nuevo en unos segundos"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+@app.errorhandler(ChainServiceError)
+def chain_service_error(e):
+    """El proceso dueño de la cadena no respondió o falló al ejecutar la operación"""
+    return jsonify({"error": str(e)}), 503
+
+
+def is_streamed_upload() -> bool:
+    """Indica si el documento llega como multipart o como cuerpo binario en lugar de JSON"""
+    return request.mimetype in ('multipart/form-data', 'application/octet-stream')
+
+
+def parse_streamed_multipart():
+    """
+    Procesa el cuerpo multipart/form-data por bloques a medida que llega: cada archivo se
+    hashea con un HashingWriter en lugar de guardarse en memoria o en un temporal como
+    hace request.files. Se procesa una vez por petición (g.streamed_multipart)
+    Retorna (campos, archivos); el .stream de cada archivo es su HashingWriter
+    """
+    if 'streamed_multipart' not in g:
+        parser = MultiPartParser(
+            lambda *args, **kwargs: HashingWriter(),
+            max_form_memory_size=request.max_form_memory_size,
+            max_form_parts=request.max_form_parts
+        )
+        try:
+            g.streamed_multipart = parser.parse(
+                request.stream,
+                request.mimetype_params.get('boundary', '').encode('ascii'),
+                request.content_length
+            )
+        except ValueError:
+            # Cuerpo multipart inválido: igual que request.form, sin campos ni archivos
+            g.streamed_multipart = ({}, {})
+    return g.streamed_multipart
+
+
+def hash_streamed_document():
+    """
+    Hashea por bloques el documento de la petición sin cargarlo completo en memoria ni en disco
+    - multipart/form-data: archivo en el campo 'document'
+    - application/octet-stream: el cuerpo completo es el documento
+    Retorna (hash, nombre) o (None, None) si no se envió archivo
+    """
+    if request.mimetype == 'multipart/form-data':
+        form, files = parse_streamed_multipart()
+        upload = files.get('document')
+        if upload is None:
+            return None, None
+        return upload.stream.hexdigest(), form.get('document_name') or upload.filename
+
+    name = request.args.get('document_name') or request.headers.get('X-Document-Name')
+    return hash_document_stream(request.stream), name
+
+
+def streamed_field(name: str) -> Optional[str]:
+    """Lee un campo auxiliar de una subida por streaming (formulario o query string)"""
+    if request.mimetype == 'multipart/form-data':
+        return parse_streamed_multipart()[0].get(name) or request.args.get(name)
+    return request.args.get(name)
 
 
 def login_required(f):
-    """Decorador para proteger rutas que requieren autenticación"""
+    """
+    Decorador para proteger rutas que requieren autenticación
+    Resuelve la sesión del servidor (normalmente desde memoria) y deja el usuario en g.user
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        try:
+            user = session_store.get(session.get('session_token'))
+        except psycopg.Error:
+            return jsonify({"error": "Error de base de datos"}), 500
+        
+        if user is None:
+            session.clear()
             return jsonify({"error": "No autorizado", "message": "Debe iniciar sesión"}), 401
+        
+        g.user = user
         return f(*args, **kwargs)
     return decorated_function
 
 
+def conditional_get(state_version):
+    """
+    Decorador para GET de solo lectura: ETag derivado de state_version() y 304 si no cambió
+    El cuerpo serializado se cachea por versión, así que solo se regenera tras un cambio
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version = state_version()
+            resource = request.full_path
+            etag = ResponseCache.make_etag(resource, version)
+            
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                body = response_cache.get(resource, version)
+                if body is None:
+                    response = make_response(f(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    body = response.get_data()
+                    # Si se minó un bloque mientras se generaba, no asociar el cuerpo a la versión vieja
+                    if state_version() == version:
+                        response_cache.put(resource, version, body)
+                response = Response(body, status=200, mimetype='application/json')
+            
+            response.set_etag(etag)
+            # Las respuestas dependen de la sesión: solo el navegador puede guardarlas y debe revalidar
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+
+def chain_version() -> str:
+    return court_system.get_chain_version()
+
+
+def judges_version() -> str:
+    # Derivada del contenido del registro y no del contador en memoria: se mantiene
+    # entre reinicios y es la misma en todos los workers con los mismos jueces
+    judges = json.dumps(court_system.judges, sort_keys=True).encode()
+    return f"judges:{hashlib.sha256(judges).hexdigest()[:16]}"
+
+
+def statistics_version() -> str:
+    # Las estadísticas también cuentan jueces y transacciones pendientes de minar
+    return f"{chain_version()}|{judges_version()}|pending:{court_system.pending_count()}"
+
+
 # ============================================================================
 # RUTAS DE AUTENTICACIÓN
 # ============================================================================
@@ -121,37 +294,45 @@ def register():
     if not all(field in data for field in required_fields):
         return jsonify({"error": "Campos requeridos faltantes"}), 400
     
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({"error": "Error de base de datos"}), 500
-    
     try:
-        cur = conn.cursor()
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Verificar si el usuario ya existe
+            cur.execute("SELECT id FROM users WHERE username = %s OR email = %s",
+                       (data['username'], data['email']))
+            if cur.fetchone():
+                return jsonify({"error": "Usuario o email ya existe"}), 409
         
-        # Verificar si el usuario ya existe
-        cur.execute("SELECT id FROM users WHERE username = %s OR email = %s",
-                   (data['username'], data['email']))
-        if cur.fetchone():
-            return jsonify({"error": "Usuario o email ya existe"}), 409
+        # El hash se calcula sin retener una conexión del pool
+        password_hash = password_hasher.generate(data['username'], data['password'])
         
-        # Crear nuevo usuario
-        password_hash = generate_password_hash(data['password'])
-        cur.execute("""
-            INSERT INTO users (username, email, password_hash, role, full_name)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id, username, email, role, full_name
-        """, (data['username'], data['email'], password_hash, data['role'], data['full_name']))
-        
-        user = cur.fetchone()
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Crear nuevo usuario
+            cur.execute("""
+                INSERT INTO users (username, email, password_hash, role, full_name)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id, username, email, role, full_name
+            """, (data['username'], data['email'], password_hash, data['role'], data['full_name']))
+            
+            user = cur.fetchone()
         
         return jsonify({
             "message": "Usuario registrado exitosamente",
             "user": dict(user)
         }), 201
         
+    except TooManyAttempts:
+        return jsonify({"error": "Demasiados intentos simultáneos"}), 429
+    except HashingBusy:
+        return busy_response()
+    except psycopg.errors.UniqueViolation:
+        # Otro registro con el mismo usuario o email entró mientras se calculaba el hash
+        return jsonify({"error": "Usuario o email ya existe"}), 409
+    except PoolTimeout:
+        return jsonify({"error": "Error de base de datos"}), 500
     except psycopg.Error as e:
         return jsonify({"error": f"Error en base de datos: {str(e)}"}), 500
 
@@ -164,24 +345,29 @@ def login():
     if not data.get('username') or not data.get('password'):
         return jsonify({"error": "Usuario y contraseña requeridos"}), 400
     
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({"error": "Error de base de datos"}), 500
-    
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM users WHERE username = %s", (data['username'],))
-        user = cur.fetchone()
-        cur.close()
-        conn.close()
+        # La conexión vuelve al pool antes de verificar la contraseña
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT * FROM users WHERE username = %s", (data['username'],))
+            user = cur.fetchone()
         
-        if not user or not check_password_hash(user['password_hash'], data['password']):
+        if not user:
+            return jsonify({"error": "Credenciales inválidas"}), 401
+        
+        valid, new_hash = password_hasher.verify(data['username'], user['password_hash'], data['password'])
+        if not valid:
             return jsonify({"error": "Credenciales inválidas"}), 401
         
-        # Crear sesión
-        session['user_id'] = user['id']
-        session['username'] = user['username']
-        session['role'] = user['role']
+        # El hash usaba parámetros anteriores: se guarda con los vigentes
+        if new_hash:
+            with db_connection() as conn:
+                conn.execute("UPDATE users SET password_hash = %s WHERE id = %s", (new_hash, user['id']))
+        
+        # Crear sesión en el servidor; la cookie firmada solo lleva el token
+        token = session_store.create(user)
+        session.clear()
+        session['session_token'] = token
         
         return jsonify({
             "message": "Inicio de sesión exitoso",
@@ -194,6 +380,12 @@ def login():
             }
         }), 200
         
+    except TooManyAttempts:
+        return jsonify({"error": "Demasiados intentos simultáneos"}), 429
+    except HashingBusy:
+        return busy_response()
+    except PoolTimeout:
+        return jsonify({"error": "Error de base de datos"}), 500
     except psycopg.Error as e:
         return jsonify({"error": f"Error en base de datos: {str(e)}"}), 500
 
@@ -202,6 +394,11 @@ def login():
 @login_required
 def logout():
     """Cierra sesión de usuario"""
+    try:
+        session_store.revoke(session.get('session_token'))
+    except psycopg.Error as e:
+        return jsonify({"error": f"Error en base de datos: {str(e)}"}), 500
+    
     session.clear()
     return jsonify({"message": "Sesión cerrada exitosamente"}), 200
 
@@ -209,26 +406,8 @@ def logout():
 @app.route('/api/auth/me', methods=['GET'])
 @login_required
 def get_current_user():
-    """Obtiene información del usuario actual"""
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({"error": "Error de base de datos"}), 500
-    
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT id, username, email, role, full_name, created_at FROM users WHERE id = %s",
-                   (session['user_id'],))
-        user = cur.fetchone()
-        cur.close()
-        conn.close()
-        
-        if not user:
-            return jsonify({"error": "Usuario no encontrado"}), 404
-        
-        return jsonify({"user": dict(user)}), 200
-        
-    except psycopg.Error as e:
-        return jsonify({"error": f"Error en base de datos: {str(e)}"}), 500
+    """Obtiene información del usuario actual (desde la sesión, sin consultar la base)"""
+    return jsonify({"user": g.user}), 200
 
 
 # ============================================================================
@@ -237,10 +416,65 @@ def get_current_user():
 
 @app.route('/api/cases', methods=['GET'])
 @login_required
+@conditional_get(chain_version)
 def get_all_cases():
-    """Obtiene todos los casos judiciales"""
-    cases = court_system.get_all_cases()
-    return jsonify({"cases": cases}), 200
+    """
+    Obtiene los casos judiciales
+    Sin parámetros retorna todos los casos; con type, status, judge, from / to (fecha ISO de
+    creación), cursor o limit retorna una página ordenada del más reciente al más antiguo
+    """
+    if not any(param in request.args for param in CASE_QUERY_PARAMS):
+        cases = court_system.get_all_cases()
+        return jsonify({"cases": cases}), 200
+
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_CASES_PAGE_SIZE)), MAX_CASES_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "limit debe ser un entero"}), 400
+
+    if limit < 1:
+        return jsonify({"error": "limit debe ser mayor que 0"}), 400
+
+    cursor = request.args.get('cursor') or None
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    page = court_system.query_cases(
+        case_type=request.args.get('type') or None,
+        status=request.args.get('status') or None,
+        judge=request.args.get('judge') or None,
+        from_time=request.args.get('from') or None,
+        to_time=request.args.get('to') or None,
+        cursor=cursor,
+        limit=limit
+    )
+    return jsonify(page), 200
+
+
+@app.route('/api/search', methods=['GET'])
+@login_required
+@conditional_get(chain_version)
+def search_cases():
+    """
+    Búsqueda de texto completo en descripciones, sentencias y nombres de documentos
+    Parámetros: q (términos, sin distinguir acentos ni mayúsculas), limit
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Término de búsqueda requerido (q)"}), 400
+
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_SEARCH_RESULTS)), MAX_SEARCH_RESULTS)
+    except ValueError:
+        return jsonify({"error": "limit debe ser un entero"}), 400
+
+    if limit < 1:
+        return jsonify({"error": "limit debe ser mayor que 0"}), 400
+
+    return jsonify(court_system.search_cases(query, limit)), 200
 
 
 @app.route('/api/cases/<case_id>', methods=['GET'])
@@ -261,6 +495,21 @@ def get_case(case_id):
     }), 200
 
 
+@app.route('/api/cases/<case_id>/proof', methods=['GET'])
+@login_required
+def get_case_proof(case_id):
+    """Obtiene las pruebas de inclusión Merkle de las transacciones de un caso"""
+    proofs = court_system.get_case_proofs(case_id)
+    
+    if proofs is None:
+        return jsonify({"error": "Caso no encontrado"}), 404
+    
+    return jsonify({
+        "case_id": case_id,
+        "proofs": proofs
+    }), 200
+
+
 @app.route('/api/cases', methods=['POST'])
 @login_required
 def create_case():
@@ -272,43 +521,54 @@ def create_case():
     if not all(field in data for field in required_fields):
         return jsonify({"error": "Campos requeridos faltantes"}), 400
     
-    success = court_system.create_case(
+    result = court_system.create_case(
         case_id=data['case_id'],
         case_type=data['case_type'],
         plaintiff_name=data['plaintiff_name'],
         defendant_name=data['defendant_name'],
         judge_id=data['judge_id'],
         description=data['description'],
-        miner_address=session['username']
+        miner_address=g.user['username']
     )
     
-    if success:
-        return jsonify({"message": "Caso creado exitosamente"}), 201
-    else:
-        return jsonify({"error": "Error creando caso"}), 400
+    return commit_response(result, "Caso creado exitosamente", "Error creando caso")
 
 
 @app.route('/api/cases/<case_id>/documents', methods=['POST'])
 @login_required
 def add_document(case_id):
-    """Añade un documento a un caso"""
+    """
+    Añade un documento a un caso
+    Acepta JSON con document_content o el archivo por streaming (multipart o binario)
+    """
+    if is_streamed_upload():
+        doc_hash, document_name = hash_streamed_document()
+        if not doc_hash or not document_name:
+            return jsonify({"error": "Nombre y archivo del documento requeridos"}), 400
+        
+        result = court_system.add_document_hash(
+            case_id=case_id,
+            document_name=document_name,
+            doc_hash=doc_hash,
+            uploader=g.user['username'],
+            miner_address=g.user['username']
+        )
+        return commit_response(result, "Documento añadido exitosamente", "Error añadiendo documento")
+    
     data = request.get_json()
     
     if not data.get('document_name') or not data.get('document_content'):
         return jsonify({"error": "Nombre y contenido del documento requeridos"}), 400
     
-    success = court_system.add_document(
+    result = court_system.add_document(
         case_id=case_id,
         document_name=data['document_name'],
         document_content=data['document_content'],
-        uploader=session['username'],
-        miner_address=session['username']
+        uploader=g.user['username'],
+        miner_address=g.user['username']
     )
     
-    if success:
-        return jsonify({"message": "Documento añadido exitosamente"}), 201
-    else:
-        return jsonify({"error": "Error añadiendo documento"}), 400
+    return commit_response(result, "Documento añadido exitosamente", "Error añadiendo documento")
 
 
 @app.route('/api/cases/<case_id>/hearings', methods=['POST'])
@@ -321,18 +581,15 @@ def schedule_hearing(case_id):
     if not all(field in data for field in required_fields):
         return jsonify({"error": "Campos requeridos faltantes"}), 400
     
-    success = court_system.schedule_hearing(
+    result = court_system.schedule_hearing(
         case_id=case_id,
         hearing_type=data['hearing_type'],
         date=data['date'],
         location=data['location'],
-        miner_address=session['username']
+        miner_address=g.user['username']
     )
     
-    if success:
-        return jsonify({"message": "Audiencia programada exitosamente"}), 201
-    else:
-        return jsonify({"error": "Error programando audiencia"}), 400
+    return commit_response(result, "Audiencia programada exitosamente", "Error programando audiencia")
 
 
 @app.route('/api/cases/<case_id>/judgment', methods=['POST'])
@@ -345,18 +602,15 @@ def issue_judgment(case_id):
     if not all(field in data for field in required_fields):
         return jsonify({"error": "Campos requeridos faltantes"}), 400
     
-    success = court_system.issue_judgment(
+    result = court_system.issue_judgment(
         case_id=case_id,
         ruling=data['ruling'],
         verdict=data['verdict'],
         details=data['details'],
-        miner_address=session['username']
+        miner_address=g.user['username']
     )
     
-    if success:
-        return jsonify({"message": "Sentencia emitida exitosamente"}), 201
-    else:
-        return jsonify({"error": "Error emitiendo sentencia"}), 400
+    return commit_response(result, "Sentencia emitida exitosamente", "Error emitiendo sentencia")
 
 
 @app.route('/api/judges', methods=['POST'])
@@ -378,6 +632,7 @@ def register_judge():
 
 @app.route('/api/judges', methods=['GET'])
 @login_required
+@conditional_get(judges_version)
 def get_judges():
     """Obtiene lista de jueces registrados"""
     return jsonify({"judges": court_system.judges}), 200
@@ -386,50 +641,101 @@ def get_judges():
 @app.route('/api/blockchain/verify', methods=['GET'])
 @login_required
 def verify_blockchain():
-    """Verifica la integridad de la blockchain"""
-    is_valid = court_system.verify_blockchain_integrity()
-    return jsonify({"valid": is_valid}), 200
+    """
+    Verifica la integridad de la blockchain
+    Por defecto solo revisa los bloques nuevos desde el último checkpoint; ?full=1 audita todo
+    """
+    full_audit = request.args.get('full') in ('1', 'true')
+    report = court_system.validate_blockchain(full_audit)
+    return jsonify(report), 200
 
 
 @app.route('/api/blockchain/chain', methods=['GET'])
 @login_required
+@conditional_get(chain_version)
 def get_blockchain_chain():
-    """Obtiene la cadena completa de bloques"""
-    chain = []
-    for block in court_system.blockchain.chain:
-        chain.append({
-            'index': block.index,
-            'timestamp': block.timestamp,
-            'transactions': [
-                {
-                    'case_id': tx.case_id,
-                    'action': tx.action,
-                    'parties': tx.parties,
-                    'judge': tx.judge,
-                    'data': tx.data,
-                    'timestamp': tx.timestamp
-                }
-                for tx in block.transactions
-            ],
-            'previous_hash': block.previous_hash,
-            'hash': block.hash,
-            'nonce': block.nonce
-        })
-    return jsonify({"chain": chain}), 200
+    """
+    Obtiene la cadena de bloques paginada
+    Parámetros: from / cursor (altura inicial), to (altura final), limit,
+    from_time / to_time (rango ISO), headers_only=1 (sin transacciones)
+    """
+    try:
+        start = int(request.args.get('cursor') or request.args.get('from') or 0)
+        end = int(request.args['to']) if request.args.get('to') else None
+        limit = min(int(request.args.get('limit', DEFAULT_CHAIN_PAGE_SIZE)), MAX_CHAIN_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "from, to, cursor y limit deben ser enteros"}), 400
+    
+    if limit < 1:
+        return jsonify({"error": "limit debe ser mayor que 0"}), 400
+    
+    headers_only = request.args.get('headers_only') in ('1', 'true')
+    page = court_system.get_blocks_page(
+        start=start,
+        limit=limit,
+        end=end,
+        from_time=request.args.get('from_time'),
+        to_time=request.args.get('to_time'),
+        headers_only=headers_only,
+        as_json=not headers_only
+    )
+    
+    if not headers_only:
+        # Los bloques sellados guardan su JSON: se concatena sin volver a serializarlos
+        body = (
+            '{"chain": [' + ', '.join(page["blocks"]) + '], '
+            f'"next_cursor": {json.dumps(page["next_cursor"])}, '
+            f'"total_blocks": {page["total_blocks"]}}}'
+        )
+        return Response(body, status=200, mimetype='application/json')
+    
+    return jsonify({
+        "chain": page["blocks"],
+        "next_cursor": page["next_cursor"],
+        "total_blocks": page["total_blocks"]
+    }), 200
 
 
 @app.route('/api/blockchain/statistics', methods=['GET'])
 @login_required
+@conditional_get(statistics_version)
 def get_statistics():
-    """Obtiene estadísticas del sistema"""
+    """Obtiene estadísticas del sistema (?verify=1 las compara con un recálculo completo)"""
     stats = court_system.get_statistics()
+    
+    if request.args.get('verify') in ('1', 'true'):
+        return jsonify({
+            "statistics": stats,
+            "consistency": court_system.verify_statistics()
+        }), 200
+    
     return jsonify({"statistics": stats}), 200
 
 
 @app.route('/api/blockchain/export', methods=['GET'])
 @login_required
 def export_blockchain():
-    """Exporta la blockchain completa"""
+    """
+    Exporta la blockchain completa
+    ?format=ndjson la envía por streaming, un bloque por línea; ?format=binary usa la
+    codificación binaria de bloques; &gzip=1 la comprime al vuelo
+    """
+    export_format = request.args.get('format')
+    if export_format in ('ndjson', 'binary'):
+        compress = request.args.get('gzip') in ('1', 'true')
+        binary = export_format == 'binary'
+        filename = 'blockchain.bin' if binary else 'blockchain.ndjson'
+        if compress:
+            filename += '.gz'
+            mimetype = 'application/gzip'
+        else:
+            mimetype = 'application/octet-stream' if binary else 'application/x-ndjson'
+        return Response(
+            stream_with_context(court_system.export_blockchain_stream(compress, binary)),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    
     blockchain_data = court_system.export_blockchain()
     return jsonify({"blockchain": blockchain_data}), 200
 
@@ -437,13 +743,25 @@ def export_blockchain():
 @app.route('/api/documents/verify', methods=['POST'])
 @login_required
 def verify_document():
-    """Verifica la autenticidad de un documento"""
-    data = request.get_json()
-    
-    if not data.get('case_id') or not data.get('document_content'):
-        return jsonify({"error": "case_id y document_content requeridos"}), 400
-    
-    result = court_system.verify_document(data['case_id'], data['document_content'])
+    """
+    Verifica la autenticidad de un documento
+    Acepta JSON con document_content o el archivo por streaming (multipart o binario)
+    """
+    if is_streamed_upload():
+        case_id = streamed_field('case_id')
+        if not case_id:
+            return jsonify({"error": "case_id requerido"}), 400
+        doc_hash, _ = hash_streamed_document()
+        if not doc_hash:
+            return jsonify({"error": "Archivo del documento requerido"}), 400
+        result = court_system.verify_document_hash(case_id, doc_hash)
+    else:
+        data = request.get_json()
+        
+        if not data.get('case_id') or not data.get('document_content'):
+            return jsonify({"error": "case_id y document_content requeridos"}), 400
+        
+        result = court_system.verify_document(data['case_id'], data['document_content'])
     
     if result:
         return jsonify(result), 200
@@ -451,6 +769,48 @@ def verify_document():
         return jsonify({"error": "Caso no encontrado"}), 404
 
 
+@app.route('/api/documents/verify-bulk', methods=['POST'])
+@login_required
+def verify_documents_bulk():
+    """
+    Verifica varios documentos a la vez
+    Cada documento puede enviarse como document_content o como document_hash
+    """
+    data = request.get_json()
+    documents = data.get('documents') if data else None
+    
+    if not documents or not isinstance(documents, list):
+        return jsonify({"error": "Lista de documentos requerida"}), 400
+    if len(documents) > MAX_BULK_DOCUMENTS:
+        return jsonify({"error": f"Máximo {MAX_BULK_DOCUMENTS} documentos por solicitud"}), 400
+    for doc in documents:
+        if not isinstance(doc, dict) or not (doc.get('document_content') or doc.get('document_hash')):
+            return jsonify({"error": "Cada documento requiere document_content o document_hash"}), 400
+        if not all(isinstance(doc.get(field, ''), str)
+                   for field in ('document_content', 'document_hash', 'case_id')):
+            return jsonify({"error": "document_content, document_hash y case_id deben ser texto"}), 400
+    
+    results = court_system.verify_documents_bulk(documents, bool(data.get('include_proofs')))
+    
+    return jsonify({
+        "results": results,
+        "verified_count": sum(1 for result in results if result['verified']),
+        "total": len(results)
+    }), 200
+
+
+@app.route('/api/transactions/<transaction_id>/status', methods=['GET'])
+@login_required
+def get_transaction_status(transaction_id):
+    """Consulta si una transacción sigue pendiente o ya fue minada"""
+    status = court_system.get_transaction_status(transaction_id)
+    
+    if not status:
+        return jsonify({"error": "Transacción no encontrada"}), 404
+    
+    return jsonify(status), 200
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     "Health check endpoint"
@@ -474,10 +834,9 @@ if __name__ == '__main__':
     if not db_initialized:
         print("Ejecutando sin base de datos. Algunas funcionalidades estaran limitadas.")
     
-    # Inicializar algunos jueces por defecto
-    court_system.register_judge("Maria Rodriguez", "civil")
-    court_system.register_judge("Carlos Mendoza", "penal")
-    court_system.register_judge("Ana Lopez", "laboral")
+    # Inicializar algunos jueces por defecto (con servicio de cadena los registra su proceso)
+    if not CHAIN_SERVICE_SOCKET:
+        register_default_judges(court_system)
     
     print("\nSistema inicializado correctamente")
     print("API ejecutandose en http://localhost:5000")
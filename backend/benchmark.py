@@ -0,0 +1,938 @@
+"""
+Benchmarks de rendimiento del Sistema Judicial Blockchain
+Uso: python benchmark.py [nombre_benchmark ...]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import hashlib
+import json
+import multiprocessing
+import statistics
+import tracemalloc
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from blockchain import (
+    Block,
+    JudicialBlockchain,
+    JudicialTransaction,
+    HASH_VERSION_LEGACY,
+    HASH_VERSION_MIDSTATE,
+    HASH_VERSION_MERKLE,
+    HASH_VERSION_BINARY,
+    BLOCK_CACHE_SIZE,
+)
+from mining import ParallelMiner
+from court_system import CourtSystem
+from projection import CaseProjection
+from search_index import tokenize
+from storage import BlockStore
+from encoding import encode_transaction, decode_transaction
+from chain_export import iter_ndjson, gzip_chunks
+from chain_service import ChainServer, ChainClient
+
+
+def print_separator(title: str = ""):
+    """Imprime un separador visual"""
+    print("\n" + "=" * 80)
+    if title:
+        print(f"  {title}")
+        print("=" * 80)
+    print()
+
+
+def make_transactions(count: int, case_prefix: str = "BENCH") -> List[JudicialTransaction]:
+    """Genera transacciones add_document sintéticas para los benchmarks"""
+    now = datetime.now().isoformat()
+    return [
+        JudicialTransaction(
+            case_id=f"{case_prefix}-{i // 10:06d}",
+            action="add_document",
+            parties={"plaintiff": f"Demandante_{i // 10}", "defendant": f"Demandado_{i // 10}"},
+            judge="Juez_Bench",
+            data={
+                "document_name": f"Documento_{i}.pdf",
+                "document_hash": hashlib.sha256(str(i).encode()).hexdigest(),
+                "uploader": "benchmark",
+                "upload_date": now
+            },
+            timestamp=now
+        )
+        for i in range(count)
+    ]
+
+
+def build_chain(tx_count: int, per_block: int = 100) -> JudicialBlockchain:
+    """
+    Construye una cadena sintética de tx_count transacciones sin Proof of Work
+    Solo para medir operaciones de lectura sobre cadenas grandes
+    """
+    blockchain = JudicialBlockchain(difficulty=1)
+    transactions = make_transactions(tx_count)
+    for start in range(0, tx_count, per_block):
+        block = Block(
+            index=len(blockchain.chain),
+            transactions=transactions[start:start + per_block],
+            previous_hash=blockchain.get_latest_block().hash
+        )
+        blockchain._append_block(block)
+    return blockchain
+
+
+def benchmark_mining(attempts: int = 2000) -> None:
+    """
+    Compara hashes por segundo del minado v1 (re-serializa el bloque completo)
+    contra el minado con midstate v2 (solo hashea el nonce en cada intento)
+    """
+    print_separator("BENCHMARK: Hashes por segundo (v1 JSON completo vs v2 midstate)")
+    print(f"{'Transacciones':>14} | {'v1 H/s':>12} | {'v2 H/s':>12} | {'Aceleración':>11}")
+    print("-" * 60)
+
+    for tx_count in (1, 10, 100, 1000):
+        transactions = make_transactions(tx_count)
+
+        legacy = Block(1, transactions, "0" * 64, version=HASH_VERSION_LEGACY)
+        start = time.perf_counter()
+        for nonce in range(attempts):
+            legacy.nonce = nonce
+            legacy.calculate_hash()
+        legacy_rate = attempts / (time.perf_counter() - start)
+
+        midstate_block = Block(1, transactions, "0" * 64, version=HASH_VERSION_MIDSTATE)
+        start = time.perf_counter()
+        midstate = hashlib.sha256(midstate_block._hash_prefix())
+        for nonce in range(attempts):
+            hasher = midstate.copy()
+            hasher.update(str(nonce).encode())
+            hasher.hexdigest()
+        midstate_rate = attempts / (time.perf_counter() - start)
+
+        print(f"{tx_count:>14} | {legacy_rate:>12,.0f} | {midstate_rate:>12,.0f} | "
+              f"{midstate_rate / legacy_rate:>10.1f}x")
+
+
+def benchmark_parallel_mining(difficulties=(3, 4, 5, 6), samples: int = 3) -> None:
+    """
+    Mide la latencia media de minado de un bloque según la cantidad de procesos
+    """
+    print_separator("BENCHMARK: Latencia de minado vs número de núcleos")
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+    print(f"Núcleos disponibles: {cpu_count}")
+    print(f"{'Dificultad':>10} | {'Procesos':>8} | {'Latencia media (s)':>18}")
+    print("-" * 44)
+
+    transactions = make_transactions(10)
+    for workers in worker_counts:
+        miner = ParallelMiner(workers) if workers > 1 else None
+        try:
+            for difficulty in difficulties:
+                latencies = []
+                for sample in range(samples):
+                    block = Block(sample + 1, transactions, "0" * 64)
+                    start = time.perf_counter()
+                    block.mine_block(difficulty, miner)
+                    latencies.append(time.perf_counter() - start)
+                print(f"{difficulty:>10} | {workers:>8} | {statistics.mean(latencies):>18.3f}")
+        finally:
+            if miner is not None:
+                miner.close()
+
+
+def benchmark_batching(transactions: int = 200, difficulty: int = 3) -> None:
+    """
+    Compara el throughput (transacciones/s) minando un bloque por acción
+    contra el planificador por lotes, junto con la latencia de confirmación
+    """
+    print_separator("BENCHMARK: Minado inmediato vs planificador por lotes")
+    print(f"{'Modo':>22} | {'Bloques':>7} | {'TX/s':>9} | {'Latencia máx (s)':>16}")
+    print("-" * 64)
+
+    for batch_size in (None, 10, 50, 200):
+        court = CourtSystem(difficulty=difficulty, batch_size=batch_size, batch_max_wait=0.5)
+        judge = court.register_judge("Benchmark", "civil")
+        court.create_case("BENCH-0", "civil", "A", "B", judge, "Caso de benchmark")
+        court.scheduler.flush()
+        initial_blocks = len(court.blockchain.chain)
+
+        start = time.perf_counter()
+        tickets = [
+            court.add_document("BENCH-0", f"doc_{i}.pdf", f"contenido {i}", "benchmark")
+            for i in range(transactions)
+        ]
+        latencies = []
+        if court.batched:
+            for ticket in tickets:
+                ticket.result()
+                latencies.append(time.perf_counter() - start)
+        court.close()
+        elapsed = time.perf_counter() - start
+
+        mode = "inmediato" if batch_size is None else f"lotes de {batch_size}"
+        max_latency = max(latencies) if latencies else elapsed / transactions
+        print(f"{mode:>22} | {len(court.blockchain.chain) - initial_blocks:>7} | "
+              f"{transactions / elapsed:>9,.0f} | {max_latency:>16.3f}")
+
+
+def benchmark_case_history(sizes=(10_000, 100_000, 1_000_000), lookups: int = 100) -> None:
+    """
+    Compara get_case_history con índice por caso contra el recorrido completo de la cadena
+    """
+    print_separator("BENCHMARK: Historial de caso (recorrido completo vs índice por caso)")
+    print(f"{'Transacciones':>14} | {'Recorrido (ms)':>14} | {'Índice (ms)':>11} | {'Aceleración':>11}")
+    print("-" * 60)
+
+    for size in sizes:
+        blockchain = build_chain(size)
+        case_ids = [f"BENCH-{(i * 7919) % (size // 10):06d}" for i in range(lookups)]
+
+        start = time.perf_counter()
+        for case_id in case_ids:
+            [tx for block in blockchain.chain for tx in block.transactions if tx.case_id == case_id]
+        scan_ms = (time.perf_counter() - start) * 1000 / lookups
+
+        start = time.perf_counter()
+        for case_id in case_ids:
+            blockchain.get_case_history(case_id)
+        index_ms = (time.perf_counter() - start) * 1000 / lookups
+
+        print(f"{size:>14,} | {scan_ms:>14.3f} | {index_ms:>11.4f} | {scan_ms / index_ms:>10.0f}x")
+
+
+def build_case_projection(case_count: int, judges: int = 20) -> CaseProjection:
+    """
+    Proyección con case_count casos sintéticos de varios tipos, jueces y fechas;
+    un tercio queda en proceso y un tercio resuelto
+    """
+    projection = CaseProjection()
+    for i in range(case_count):
+        case_id = f"CASE-{i:07d}"
+        timestamp = f"{2020 + i * 5 // case_count}-{i % 12 + 1:02d}-{i % 28 + 1:02d}T{i % 24:02d}:00:00"
+        judge = f"JUEZ-{(i * 7) % judges:03d}"
+        projection.apply_transaction(JudicialTransaction(
+            case_id=case_id, action="create_case", parties={"plaintiff": "a", "defendant": "b"},
+            judge=judge, data={"type": ("civil", "penal", "laboral")[i % 3]}, timestamp=timestamp
+        ))
+        if i % 3:
+            projection.apply_transaction(JudicialTransaction(
+                case_id=case_id, action="schedule_hearing", parties={"plaintiff": "a", "defendant": "b"},
+                judge=judge, data={"hearing_type": "inicial", "date": timestamp, "location": "Sala 1"},
+                timestamp=timestamp
+            ))
+        if i % 3 == 2:
+            projection.apply_transaction(JudicialTransaction(
+                case_id=case_id, action="issue_judgment", parties={"plaintiff": "a", "defendant": "b"},
+                judge=judge, data={"ruling": "r", "verdict": "favorable", "details": "d"},
+                timestamp=timestamp
+            ))
+    return projection
+
+
+def benchmark_case_queries(sizes=(10_000, 100_000, 500_000), repeats: int = 20, limit: int = 50) -> None:
+    """
+    Compara la consulta filtrada de casos recorriendo todos los casos y ordenando
+    contra los índices secundarios con paginación por cursor (primera y segunda página)
+    """
+    print_separator("BENCHMARK: Consulta filtrada de casos (recorrido completo vs índices)")
+    queries = {
+        "sin filtros": ({}, None, None),
+        "juez+estado": ({"judge": "JUEZ-007", "status": "en_proceso"}, None, None),
+        "tipo+fechas": ({"type": "penal"}, "2022-03", "2022-06"),
+    }
+    print(f"{'Casos':>9} | {'Consulta':>12} | {'Recorrido (ms)':>14} | {'Índice (ms)':>11} | "
+          f"{'Aceleración':>11} | {'Publicar (ms)':>13}")
+    print("-" * 87)
+
+    for size in sizes:
+        projection = build_case_projection(size)
+        view = projection.index.publish()
+        cases = dict(projection.cases)
+
+        # Costo incremental por bloque: 100 casos nuevos (los más recientes) y publicar
+        # los índices y la tabla de casos, como hace el hilo escritor tras cada bloque
+        blocks = 10
+        extra = build_case_projection(100 * blocks)
+        start = time.perf_counter()
+        for block in range(blocks):
+            for i in range(block * 100, (block + 1) * 100):
+                case = extra.cases[f"CASE-{i:07d}"]
+                projection._store(f"NUEVO-{i:07d}", {**case, "created_at": f"2030-{i:07d}"})
+            projection.index.publish()
+            projection.cases.publish()
+        publish_ms = (time.perf_counter() - start) * 1000 / blocks
+
+        for name, (filters, from_time, to_time) in queries.items():
+            start = time.perf_counter()
+            for _ in range(repeats):
+                matches = [
+                    (case["created_at"], case_id) for case_id, case in cases.items()
+                    if all(case.get(field) == value for field, value in filters.items())
+                    and (from_time is None or case["created_at"] >= from_time)
+                    and (to_time is None or case["created_at"][:len(to_time)] <= to_time)
+                ]
+                matches.sort(reverse=True)
+                matches[:limit]
+            scan_ms = (time.perf_counter() - start) * 1000 / repeats
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                page = view.query(cases, filters, from_time, to_time, limit=limit)
+                view.query(cases, filters, from_time, to_time, page["next_cursor"], limit=limit)
+            index_ms = (time.perf_counter() - start) * 1000 / repeats / 2
+
+            print(f"{size:>9,} | {name:>12} | {scan_ms:>14.2f} | {index_ms:>11.4f} | "
+                  f"{scan_ms / index_ms:>10.0f}x | {publish_ms:>13.2f}")
+
+
+# Vocabulario de los textos sintéticos para el benchmark de búsqueda
+SEARCH_SUBJECTS = ("arrendamiento", "despido", "pensión alimenticia", "robo", "fraude", "herencia",
+                   "accidente de tránsito", "difamación", "compraventa", "custodia")
+SEARCH_VERDICTS = ("Culpable", "Absuelto", "Procedente", "Improcedente", "Condenatorio")
+
+
+def make_search_transactions(count: int):
+    """
+    Transacciones sintéticas con texto en español: cada caso tiene una descripción,
+    ocho documentos y una sentencia (10 transacciones por caso)
+    """
+    timestamp = datetime(2024, 1, 1).isoformat()
+    parties = {"plaintiff": "a", "defendant": "b"}
+    for number in range(count // 10):
+        case_id = f"EXP-{number:07d}"
+        subject = SEARCH_SUBJECTS[number % len(SEARCH_SUBJECTS)]
+        yield JudicialTransaction(
+            case_id=case_id, action="create_case", parties=parties, judge="Juez_Busqueda",
+            data={"type": "civil", "description": f"Demanda por {subject} presentada ante el juzgado "
+                                                  f"número {number % 97}, folio {number}"},
+            timestamp=timestamp
+        )
+        for document in range(8):
+            yield JudicialTransaction(
+                case_id=case_id, action="add_document", parties=parties, judge="Juez_Busqueda",
+                data={"document_name": f"Prueba_{document}_{subject.split()[0]}_{number}.pdf",
+                      "document_hash": "0" * 64, "uploader": "benchmark"},
+                timestamp=timestamp
+            )
+        yield JudicialTransaction(
+            case_id=case_id, action="issue_judgment", parties=parties, judge="Juez_Busqueda",
+            data={"ruling": "r", "verdict": SEARCH_VERDICTS[number % len(SEARCH_VERDICTS)],
+                  "details": f"Resolución del expediente {number} sobre {subject}"},
+            timestamp=timestamp
+        )
+
+
+def benchmark_search(sizes=(100_000, 1_000_000), repeats: int = 20) -> None:
+    """
+    Compara la búsqueda de texto recorriendo todos los textos de las transacciones
+    contra el índice invertido (términos raros, frecuentes y combinados)
+    """
+    print_separator("BENCHMARK: Búsqueda de texto completo (recorrido vs índice invertido)")
+    queries = ("folio 4242", "difamación procedente", "pensión alimenticia procedente", "arrendamiento", "pdf")
+    print(f"{'Transacciones':>14} | {'Consulta':>29} | {'Resultados':>10} | {'Recorrido (ms)':>14} | "
+          f"{'Índice (ms)':>11}")
+    print("-" * 91)
+
+    for size in sizes:
+        projection = CaseProjection()
+        texts = []
+        start = time.perf_counter()
+        for transaction in make_search_transactions(size):
+            projection.apply_transaction(transaction)
+            data = transaction.data
+            texts.append((transaction.case_id, " ".join(
+                str(data.get(field, "")) for field in ("description", "document_name", "verdict", "details")
+            )))
+        build_s = time.perf_counter() - start
+        cases = projection.cases.publish()
+        search = projection.search.publish()
+
+        for query in queries:
+            terms = set(tokenize(query))
+            start = time.perf_counter()
+            matched: Dict[str, set] = {}
+            for case_id, text in texts:
+                found = terms.intersection(tokenize(text))
+                if found:
+                    matched.setdefault(case_id, set()).update(found)
+            scan_results = sum(1 for found in matched.values() if found == terms)
+            scan_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                result = search.search(query, cases)
+            index_ms = (time.perf_counter() - start) * 1000 / repeats
+            results = result["total"]
+            if results != scan_results:
+                print(f"   ! {query}: el recorrido encontró {scan_results} casos")
+            print(f"{size:>14,} | {query:>29} | {results:>10,} | {scan_ms:>14.1f} | {index_ms:>11.3f}")
+        print(f"{'':>14}   Proyección e índice construidos en {build_s:.1f}s")
+
+
+def benchmark_restart(sizes=(10_000, 100_000, 1_000_000)) -> None:
+    """
+    Mide el tiempo de reinicio: abrir el log de bloques, recuperar el último segmento
+    y cargar la cadena (cabeceras y contadores). También el primer arranque sin contadores
+    guardados, el tiempo hasta que los índices en segundo plano cubren la cadena y el tiempo
+    hasta que la aplicación (CourtSystem, sin snapshot de casos) responde el historial de un caso
+    La cadena cargada acepta escrituras al terminar el reinicio, pero las consultas por caso,
+    documento o id esperan a los índices
+    """
+    print_separator("BENCHMARK: Tiempo de reinicio desde el log de bloques")
+    print(f"{'Transacciones':>14} | {'Tamaño (MB)':>11} | {'Sin contadores (s)':>18} | "
+          f"{'Reinicio (s)':>12} | {'Índices (s)':>11} | {'Primera consulta (s)':>20}")
+    print("-" * 103)
+
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix="chain_bench_")
+        try:
+            store = BlockStore(directory, fsync_every=0)
+            for block in build_chain(size).chain:
+                store.append(block)
+            store.close()
+            disk_mb = sum(
+                os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+            ) / (1024 * 1024)
+
+            # Log escrito sin contadores (p. ej. por una versión anterior): se recuentan una vez
+            start = time.perf_counter()
+            JudicialBlockchain(difficulty=1, store=BlockStore(directory)).close()
+            first = time.perf_counter() - start
+
+            start = time.perf_counter()
+            blockchain = JudicialBlockchain(difficulty=1, store=BlockStore(directory))
+            elapsed = time.perf_counter() - start
+            blockchain.wait_for_indexes()
+            indexed = time.perf_counter() - start
+            blockchain.close()
+
+            # Aplicación completa: cadena, casos reconstruidos desde los bloques y primera consulta
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                start = time.perf_counter()
+                court = CourtSystem(difficulty=1, data_dir=directory, fsync_every=0)
+                court.get_case_history("BENCH-000000")
+                queried = time.perf_counter() - start
+                court.close()
+
+            print(f"{size:>14,} | {disk_mb:>11.1f} | {first:>18.3f} | {elapsed:>12.3f} | {indexed:>11.3f} | "
+                  f"{queried:>20.3f}")
+        finally:
+            shutil.rmtree(directory)
+
+
+def benchmark_encoding(tx_count: int = 20_000, per_block: int = 100) -> None:
+    """
+    Compara la serialización JSON (sort_keys) contra la codificación binaria canónica:
+    throughput de codificación, decodificación y hash de bloques, y tamaño resultante
+    """
+    print_separator("BENCHMARK: Codificación JSON vs binaria canónica")
+    transactions = make_transactions(tx_count)
+    groups = [transactions[i:i + per_block] for i in range(0, tx_count, per_block)]
+    json_blocks = [Block(1, group, "0" * 64, version=HASH_VERSION_MERKLE) for group in groups]
+    binary_blocks = [Block(1, group, "0" * 64, version=HASH_VERSION_BINARY) for group in groups]
+
+    def measure(function, items) -> float:
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        return tx_count / (time.perf_counter() - start)
+
+    json_encode = lambda block: json.dumps(block.to_dict(), sort_keys=True).encode()
+    json_payloads = [json_encode(block) for block in json_blocks]
+    binary_payloads = [block.to_bytes() for block in binary_blocks]
+
+    results = [
+        ("Codificar (TX/s)",
+         measure(json_encode, json_blocks),
+         measure(Block.to_bytes, binary_blocks)),
+        ("Decodificar (TX/s)",
+         measure(lambda payload: Block.from_dict(json.loads(payload), trusted=True), json_payloads),
+         measure(Block.from_bytes, binary_payloads)),
+        # Lo que hacen import_chain y validate_chain: decodificar y recalcular la raíz de Merkle
+        ("Decodificar + Merkle (TX/s)",
+         measure(lambda payload: Block.from_dict(json.loads(payload), trusted=True).calculate_merkle_root(),
+                 json_payloads),
+         measure(lambda payload: Block.from_bytes(payload).calculate_merkle_root(), binary_payloads)),
+        ("Hash de bloque (TX/s)",
+         measure(Block.calculate_hash, json_blocks),
+         measure(Block.calculate_hash, binary_blocks)),
+    ]
+    json_size = sum(len(payload) for payload in json_payloads) / tx_count
+    binary_size = sum(len(payload) for payload in binary_payloads) / tx_count
+
+    print(f"{tx_count:,} transacciones en bloques de {per_block}")
+    print(f"{'Operación':>27} | {'JSON (v3)':>12} | {'Binario (v4)':>12} | {'Relación':>8}")
+    print("-" * 69)
+    for name, json_rate, binary_rate in results:
+        print(f"{name:>27} | {json_rate:>12,.0f} | {binary_rate:>12,.0f} | {binary_rate / json_rate:>7.2f}x")
+    print(f"{'Bytes por TX':>27} | {json_size:>12,.0f} | {binary_size:>12,.0f} | "
+          f"{binary_size / json_size:>7.2f}x")
+
+
+@dataclass
+class DictTransaction:
+    """Representación anterior de JudicialTransaction (dataclass con __dict__), como referencia"""
+    case_id: str
+    action: str
+    parties: Dict[str, str]
+    judge: str
+    data: Dict[str, Any]
+    timestamp: str
+
+
+def encoded_transactions(count: int, chunk: int = 1000) -> List[bytes]:
+    """Transacciones sintéticas codificadas, con partes distintas por caso"""
+    return [
+        encode_transaction(transaction)
+        for start in range(0, count, chunk)
+        for transaction in make_transactions(min(chunk, count - start), f"BENCH{start}")
+    ]
+
+
+def benchmark_memory(count: int = 1_000_000) -> None:
+    """
+    Mide los bytes por transacción retenidos al cargar 'count' transacciones
+    con la representación anterior (dataclass con dicts propios) y la compacta actual,
+    esta última después de usarse como en una cadena construida (hojas de Merkle, ids, diccionarios)
+    """
+    print_separator(f"BENCHMARK: Memoria por transacción ({count:,} transacciones)")
+    print(f"{'Representación':>28} | {'Bytes/TX':>9} | {'Total (MB)':>10}")
+    print("-" * 54)
+
+    # Decodificar crea objetos str nuevos en cada campo, igual que al reiniciar desde disco
+    payloads = encoded_transactions(count)
+    results = {}
+    for name, factory in (("dataclass + dicts", DictTransaction),
+                          ("compacta (slots + interning)", JudicialTransaction)):
+        tracemalloc.start()
+        transactions = [factory(**decode_transaction(payload)) for payload in payloads]
+        if factory is JudicialTransaction:
+            for transaction in transactions:
+                transaction.to_bytes()
+                transaction.get_id()
+                transaction.to_dict()
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del transactions
+
+        results[name] = retained / count
+        print(f"{name:>28} | {retained / count:>9,.0f} | {retained / (1024 * 1024):>10,.1f}")
+
+    before, after = results.values()
+    print(f"\nReducción: {(1 - after / before) * 100:.0f}%")
+
+
+def benchmark_serialization_cache(tx_count: int = 100_000) -> None:
+    """
+    Mide validación completa, exportación NDJSON y listado paginado de la cadena
+    la primera vez (sin caché) y las siguientes (diccionarios, JSON y árboles de Merkle memorizados)
+    Solo los últimos BLOCK_CACHE_SIZE bloques usados conservan su serialización: los recorridos
+    de cadenas más largas no se aceleran en la segunda pasada
+    """
+    print_separator(f"BENCHMARK: Serialización memorizada ({tx_count:,} transacciones)")
+
+    def list_chain(blockchain: JudicialBlockchain) -> None:
+        cursor = 0
+        while cursor is not None:
+            # Igual que /api/blockchain/chain: se concatenan los JSON de los bloques
+            page = blockchain.get_blocks_page(start=cursor, limit=500, as_json=True)
+            ", ".join(page["blocks"])
+            cursor = int(page["next_cursor"]) if page["next_cursor"] else None
+
+    operations = [
+        ("Validación completa", lambda blockchain: blockchain.validate_chain(full_audit=True)),
+        ("Exportación NDJSON", lambda blockchain: sum(len(line) for line in iter_ndjson(blockchain))),
+        ("Listado paginado", list_chain),
+    ]
+
+    print(f"{'Operación':>20} | {'1ª vez (ms)':>11} | {'Siguientes (ms)':>15} | {'Aceleración':>11}")
+    print("-" * 68)
+    for name, operation in operations:
+        # Cadena nueva por operación para que la primera medición no aproveche cachés previas
+        blockchain = build_chain(tx_count)
+        blockchain.difficulty = 0  # build_chain no hace Proof of Work
+
+        start = time.perf_counter()
+        operation(blockchain)
+        cold_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        operation(blockchain)
+        warm_ms = (time.perf_counter() - start) * 1000
+        print(f"{name:>20} | {cold_ms:>11.0f} | {warm_ms:>15.0f} | {cold_ms / warm_ms:>10.1f}x")
+
+
+def benchmark_export_memory(tx_count: int = 100_000, exports: int = 3) -> None:
+    """
+    Exporta varias veces en NDJSON con gzip una cadena cargada desde el log de bloques
+    y comprueba que la memoria retenida no crece: los bloques se serializan desde su registro
+    sin conservar las transacciones decodificadas
+    """
+    print_separator(f"BENCHMARK: Memoria retenida tras exportar ({tx_count:,} transacciones)")
+    directory = tempfile.mkdtemp(prefix="chain_export_")
+    try:
+        store = BlockStore(directory, fsync_every=0)
+        for block in build_chain(tx_count).chain:
+            store.append(block)
+        store.close()
+
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            blockchain = JudicialBlockchain(difficulty=1, store=BlockStore(directory))
+            blockchain.wait_for_indexes()
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        retained = []
+        print(f"{'Exportación':>11} | {'Tamaño gzip (MB)':>16} | {'Retenido (MB)':>13} | {'Bloques cargados':>16}")
+        print("-" * 66)
+        for number in range(1, exports + 1):
+            size = sum(len(chunk) for chunk in gzip_chunks(iter_ndjson(blockchain)))
+            retained.append(tracemalloc.get_traced_memory()[0] - baseline)
+            loaded = sum(block.transactions_loaded for block in blockchain.chain)
+            print(f"{number:>11} | {size / (1024 * 1024):>16.1f} | {retained[-1] / (1024 * 1024):>13.1f} | "
+                  f"{loaded:>16,}")
+        tracemalloc.stop()
+        blockchain.close()
+
+        # Plana: lo retenido no depende del tamaño de la cadena ni del número de exportaciones
+        flat = max(retained) < 8 * 1024 * 1024 and retained[-1] - retained[0] < 1024 * 1024
+        ok = flat and loaded <= BLOCK_CACHE_SIZE
+        print(" Resultado: OK" if ok else " Resultado: FALLO")
+    finally:
+        shutil.rmtree(directory)
+
+
+def benchmark_login_pool(clients: int = 16, requests_per_client: int = 50) -> None:
+    """
+    Latencia p50/p99 de la consulta de login contra un PostgreSQL local (configuración de .env)
+    abriendo una conexión por petición (como antes) frente al pool de database.py.
+    La verificación scrypt de la contraseña es igual en ambos casos y no se incluye
+    """
+    import psycopg
+    from psycopg.rows import dict_row
+    from database import DB_CONFIG, db_connection, get_pool, close_pool
+
+    print_separator(f"BENCHMARK: Login con conexión por petición vs pool ({clients} clientes)")
+    try:
+        psycopg.connect(**DB_CONFIG, connect_timeout=3).close()
+    except psycopg.OperationalError as e:
+        print(f" Benchmark omitido: no hay PostgreSQL disponible ({e})")
+        return
+
+    def query_with_new_connection() -> None:
+        with psycopg.connect(**DB_CONFIG, row_factory=dict_row) as conn:
+            conn.execute("SELECT * FROM users WHERE username = %s", ("admin",)).fetchone()
+
+    def query_with_pool() -> None:
+        with db_connection() as conn:
+            conn.execute("SELECT * FROM users WHERE username = %s", ("admin",)).fetchone()
+
+    def run(query: Callable[[], None]) -> List[float]:
+        latencies: List[float] = []
+        lock = threading.Lock()
+
+        def client() -> None:
+            local = []
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                query()
+                local.append((time.perf_counter() - start) * 1000)
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(latencies)
+
+    get_pool().wait()
+    print(f"{'Modo':>22} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'Peticiones/s':>12}")
+    print("-" * 62)
+    for name, query in (("conexión por petición", query_with_new_connection),
+                        ("pool", query_with_pool)):
+        start = time.perf_counter()
+        latencies = run(query)
+        elapsed = time.perf_counter() - start
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{name:>22} | {p50:>9.2f} | {p99:>9.2f} | {len(latencies) / elapsed:>12,.0f}")
+    close_pool()
+
+
+def benchmark_password_hashing(server_threads: int = 8, logins: int = 48, hash_workers: Optional[int] = None) -> None:
+    """
+    Ráfaga de logins (verificación scrypt) mezclada con peticiones ligeras sobre un servidor
+    simulado de server_threads hilos: scrypt en línea en el hilo de la petición frente al
+    PasswordHasher (pool de procesos, cola acotada). Los clientes reintentan si reciben 503
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from werkzeug.security import check_password_hash, generate_password_hash
+    from password_hashing import PasswordHasher, HashingBusy, DEFAULT_HASH_METHOD
+
+    print_separator(f"BENCHMARK: Login con scrypt en línea vs pool de hashing ({server_threads} hilos, {logins} logins)")
+    password_hash = generate_password_hash("secreto", DEFAULT_HASH_METHOD)
+
+    def light_request() -> None:
+        json.dumps({"status": "healthy", "blocks": 1000})
+
+    def run(verify: Callable[[str], bool]) -> Dict[str, Any]:
+        server = ThreadPoolExecutor(max_workers=server_threads)
+        light_latencies: List[float] = []
+        rejected = [0]
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def login_client(user: str) -> None:
+            while True:
+                try:
+                    if server.submit(verify, user).result():
+                        return
+                except HashingBusy:
+                    with lock:
+                        rejected[0] += 1
+                    time.sleep(0.05)
+
+        def light_client() -> None:
+            while not stop.is_set():
+                start = time.perf_counter()
+                server.submit(light_request).result()
+                light_latencies.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.005)
+
+        watcher = threading.Thread(target=light_client)
+        watcher.start()
+        start = time.perf_counter()
+        clients = [threading.Thread(target=login_client, args=(f"usuario_{i}",)) for i in range(logins)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        watcher.join()
+        server.shutdown()
+
+        light_latencies.sort()
+        return {
+            "logins_per_s": logins / elapsed,
+            "rejected": rejected[0],
+            "p50": light_latencies[len(light_latencies) // 2],
+            "p99": light_latencies[min(len(light_latencies) - 1, int(len(light_latencies) * 0.99))]
+        }
+
+    # En el pool caben menos operaciones que hilos del servidor: los logins que no caben
+    # se rechazan al momento y siempre quedan hilos libres para el resto de peticiones
+    hasher = PasswordHasher(workers=hash_workers, max_pending=server_threads // 2, queue_timeout=0)
+    hasher.verify("calentamiento", password_hash, "secreto")
+
+    print(f"{'Modo':>18} | {'Logins/s':>9} | {'503 reintentados':>16} | {'Otras p50 (ms)':>14} | {'Otras p99 (ms)':>14}")
+    print("-" * 86)
+    for name, verify in (("scrypt en línea", lambda user: check_password_hash(password_hash, "secreto")),
+                         ("pool de hashing", lambda user: hasher.verify(user, password_hash, "secreto")[0])):
+        result = run(verify)
+        print(f"{name:>18} | {result['logins_per_s']:>9.1f} | {result['rejected']:>16} | "
+              f"{result['p50']:>14.2f} | {result['p99']:>14.2f}")
+    hasher.close()
+
+
+def benchmark_concurrency(writers: int = 8, readers: int = 8, cases_per_writer: int = 25,
+                          difficulty: int = 2) -> None:
+    """
+    Prueba de estrés: hilos escritores registran casos, documentos, audiencias y sentencias
+    mientras hilos lectores consultan casos, historiales, páginas de la cadena y estadísticas.
+    Cada lectura comprueba que el snapshot es coherente; al final se valida la cadena completa
+    """
+    print_separator(f"ESTRÉS: {writers} escritores y {readers} lectores en paralelo")
+    court = CourtSystem(difficulty=difficulty, batch_size=20, batch_max_wait=0.05)
+    judge = court.register_judge("Estres", "civil")
+    stop = threading.Event()
+    errors: List[str] = []
+    reads = [0] * readers
+    tickets = [[] for _ in range(writers)]
+
+    def writer(worker: int) -> None:
+        try:
+            for i in range(cases_per_writer):
+                case_id = f"ESTRES-{worker}-{i}"
+                submitted = tickets[worker]
+                submitted.append(court.create_case(case_id, "civil", f"A{i}", f"B{i}", judge, "Estrés"))
+                for d in range(3):
+                    submitted.append(court.add_document(case_id, f"doc_{d}.pdf", f"{case_id}/{d}", "estres"))
+                submitted.append(court.schedule_hearing(case_id, "inicial", "2026-01-01", "Sala 1"))
+                if i % 2:
+                    submitted.append(court.issue_judgment(case_id, "mixto", "Fallo", "Detalles"))
+        except Exception as e:
+            errors.append(f"escritor {worker}: {e!r}")
+
+    def check_snapshot() -> None:
+        snapshot = court.snapshot()
+        if sum(snapshot.status_counts.values()) != len(snapshot.cases):
+            errors.append(f"contadores por estado incoherentes en #{snapshot.height}")
+        json.dumps(snapshot.cases.to_dict())
+        # Todos los casos tienen la descripción "Estrés": el índice del snapshot los encuentra a todos
+        found = snapshot.search.search("estres", snapshot.cases)["total"]
+        if found != len(snapshot.cases):
+            errors.append(f"búsqueda en #{snapshot.height}: {found} != {len(snapshot.cases)}")
+        for status, count in snapshot.status_counts.items():
+            indexed = len(snapshot.case_index.query(snapshot.cases, {"status": status}, limit=count + 1)["cases"])
+            if indexed != count:
+                errors.append(f"índice de estado '{status}' en #{snapshot.height}: {indexed} != {count}")
+        for case_id in list(snapshot.cases)[-5:]:
+            case = snapshot.cases[case_id]
+            expected = 1 + len(case["documents"]) + len(case["hearings"]) + (case["judgment"] is not None)
+            history = court.blockchain.get_case_history(case_id, snapshot.height)
+            if len(history) != expected:
+                errors.append(f"historial de {case_id} en #{snapshot.height}: {len(history)} != {expected}")
+        page = court.blockchain.get_blocks_page(start=max(0, snapshot.height - 5), height=snapshot.height,
+                                                as_json=True)
+        if page["total_blocks"] != snapshot.height + 1 or page["next_cursor"] is not None:
+            errors.append(f"página de la cadena fuera del snapshot #{snapshot.height}")
+
+    def reader(worker: int) -> None:
+        while not stop.is_set():
+            try:
+                check_snapshot()
+                court.get_statistics()
+                court.get_all_cases()
+            except Exception as e:
+                errors.append(f"lector {worker}: {e!r}")
+            reads[worker] += 1
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        reader_threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        for ticket in (ticket for submitted in tickets for ticket in submitted):
+            ticket.result()
+        stop.set()
+        for thread in reader_threads:
+            thread.join()
+        court.close()
+        elapsed = time.perf_counter() - start
+        chain_valid = court.blockchain.is_chain_valid(full_audit=True)
+        cache_valid = court.verify_case_cache()
+        statistics = court.verify_statistics()
+
+    submitted = sum(len(submitted) for submitted in tickets)
+    mined = court.blockchain.total_transactions - 1  # sin la transacción génesis
+    print(f" Transacciones: {submitted} enviadas, {mined} minadas en {len(court.blockchain.chain)} bloques")
+    print(f" Escrituras/s: {submitted / elapsed:,.0f}   Lecturas/s: {sum(reads) / elapsed:,.0f}")
+    print(f" Casos: {len(court.get_all_cases())}   Errores de lectura/escritura: {len(errors)}")
+    for error in errors[:10]:
+        print(f"   - {error}")
+    print(f" is_chain_valid: {chain_valid}   cache de casos: {cache_valid}   "
+          f"estadísticas: {statistics['consistent']}")
+    ok = not errors and chain_valid and cache_valid and statistics["consistent"] and mined == submitted
+    print(" Resultado: OK" if ok else " Resultado: FALLO")
+
+
+def _chain_owner(socket_path: str, cases: int, write_interval: float, ready, stop) -> None:
+    """Proceso dueño de la cadena para benchmark_multiworker: registra un documento cada write_interval"""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        court = CourtSystem(difficulty=1, batch_size=50, batch_max_wait=0.05)
+        judge = court.register_judge("Multiworker", "civil")
+        for i in range(cases):
+            court.create_case(f"MW-{i}", "civil", f"A{i}", f"B{i}", judge, "Caso de benchmark")
+        court.scheduler.flush()
+        server = ChainServer(court, socket_path)
+        server.start()
+        ready.set()
+        written = 0
+        while not stop.wait(write_interval):
+            court.add_document(f"MW-{written % cases}", f"doc_{written}.pdf", str(written), "benchmark")
+            written += 1
+        server.close()
+        court.close()
+
+
+def _read_worker(socket_path: str, cases: int, duration: float, cache_entries: int, results) -> None:
+    """Worker de la API sin estado: consulta detalles e historiales de casos durante duration segundos"""
+    client = ChainClient(socket_path, cache_entries=cache_entries)
+    client.wait_until_subscribed(10)
+
+    reads = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        case_id = f"MW-{reads % cases}"
+        client.get_case_details(case_id)
+        client.get_case_history(case_id)
+        reads += 2
+    results.put(reads)
+
+
+def benchmark_multiworker(worker_counts=(1, 2, 4), cases: int = 200, duration: float = 3.0,
+                          write_interval: float = 0.2) -> None:
+    """
+    Lecturas/s de N procesos worker contra un único proceso dueño de la cadena (socket Unix),
+    con la cache de lecturas por versión y sin ella. El dueño registra un documento cada
+    write_interval segundos, lo que invalida las caches de todos los workers
+    """
+    print_separator(f"BENCHMARK: Workers de la API sobre el servicio de cadena ({os.cpu_count()} núcleos)")
+    socket_path = os.path.join(tempfile.mkdtemp(), "chain.sock")
+    ready, stop = multiprocessing.Event(), multiprocessing.Event()
+    owner = multiprocessing.Process(target=_chain_owner, args=(socket_path, cases, write_interval, ready, stop))
+    owner.start()
+    ready.wait()
+
+    try:
+        print(f"{'Modo':>12} | {'Workers':>7} | {'Lecturas/s':>11} | {'Escalado':>8}")
+        print("-" * 50)
+        for name, cache_entries in (("sin cache", 0), ("con cache", 1024)):
+            baseline = None
+            for workers in worker_counts:
+                results = multiprocessing.Queue()
+                processes = [
+                    multiprocessing.Process(target=_read_worker,
+                                            args=(socket_path, cases, duration, cache_entries, results))
+                    for _ in range(workers)
+                ]
+                for process in processes:
+                    process.start()
+                throughput = sum(results.get() for _ in processes) / duration
+                for process in processes:
+                    process.join()
+                baseline = baseline or throughput
+                print(f"{name:>12} | {workers:>7} | {throughput:>11,.0f} | {throughput / baseline:>7.2f}x")
+    finally:
+        stop.set()
+        owner.join()
+        shutil.rmtree(os.path.dirname(socket_path), ignore_errors=True)
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "mining": benchmark_mining,
+    "parallel_mining": benchmark_parallel_mining,
+    "batching": benchmark_batching,
+    "case_history": benchmark_case_history,
+    "case_queries": benchmark_case_queries,
+    "search": benchmark_search,
+    "restart": benchmark_restart,
+    "encoding": benchmark_encoding,
+    "memory": benchmark_memory,
+    "serialization_cache": benchmark_serialization_cache,
+    "export_memory": benchmark_export_memory,
+    "login_pool": benchmark_login_pool,
+    "password_hashing": benchmark_password_hashing,
+    "concurrency": benchmark_concurrency,
+    "multiworker": benchmark_multiworker,
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f" Benchmark desconocido: {name}. Use: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[name]()
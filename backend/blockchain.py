@@ -5,34 +5,219 @@ Implementación de clases Block, Blockchain y transacciones judiciales
 
 import hashlib
 import json
+import os
+import sys
+import threading
+import time
+import weakref
 from datetime import datetime
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass, asdict
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple, Callable, Mapping, Iterator, Set
+from dataclasses import dataclass
 
+from merkle import hash_leaf, build_levels, build_proof, has_duplicate_pair
+from encoding import (
+    encode_transaction, encode_block_header, encode_block, decode_block, decode_block_header,
+    decode_block_transactions
+)
+from mining import ParallelMiner
 
-@dataclass
+
+# Versiones del formato de hash de bloque
+# v1: JSON completo del bloque (nonce incluido entre los campos ordenados)
+# v2: contenido fijo serializado una vez + nonce al final (permite midstate)
+# v3: cabecera fija con raíz de Merkle en lugar de las transacciones + nonce al final
+# v4: como v3, pero cabecera y hojas de Merkle con la codificación binaria canónica (encoding.py)
+# v5: como v4, con el número de transacciones en la cabecera; el nodo impar del árbol
+#     sube sin pareja en lugar de combinarse consigo mismo
+HASH_VERSION_LEGACY = 1
+HASH_VERSION_MIDSTATE = 2
+HASH_VERSION_MERKLE = 3
+HASH_VERSION_BINARY = 4
+HASH_VERSION_LEAF_COUNT = 5
+CURRENT_HASH_VERSION = HASH_VERSION_LEAF_COUNT
+
+# Transacciones entre dos guardados de los contadores de la cadena en el log de bloques
+STATISTICS_INTERVAL = 10_000
+
+# Bloques sellados que conservan a la vez sus datos derivados (diccionario, JSON, codificación,
+# árbol de Merkle y transacciones decodificadas de los bloques cargados solo con su cabecera)
+BLOCK_CACHE_SIZE = int(os.environ.get("BLOCK_CACHE_SIZE", "64"))
+
+
+class FrozenDict(dict):
+    """
+    Diccionario de solo lectura
+    Es un dict para que json y jsonify lo serialicen igual que uno normal
+    """
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} es inmutable")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class PartiesRecord(FrozenDict):
+    """Partes de un caso, inmutables y compartidas por todas las transacciones del caso"""
+    __slots__ = ("__weakref__",)
+
+
+def freeze(value: Any) -> Any:
+    """Copia inmutable de un valor JSON: dicts a FrozenDict y listas a tuplas"""
+    if type(value) is str:
+        return value
+    if isinstance(value, dict):
+        if type(value) is FrozenDict:
+            return value
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+# Registros de partes vigentes, uno por combinación distinta de partes
+_parties_records: "weakref.WeakValueDictionary[Tuple, PartiesRecord]" = weakref.WeakValueDictionary()
+
+
+def intern_parties(parties: Mapping[str, str]) -> PartiesRecord:
+    """Retorna el registro compartido para estas partes, creándolo si no existe"""
+    if type(parties) is PartiesRecord:
+        return parties
+
+    key = tuple(parties.items())  # Conserva el orden: to_dict debe producir el mismo JSON
+    record = _parties_records.get(key)
+    if record is None:
+        record = PartiesRecord((sys.intern(role), sys.intern(party)) for role, party in key)
+        _parties_records[key] = record
+    return record
+
+
+@dataclass(frozen=True)
 class JudicialTransaction:
-    """Representa una transacción judicial en la blockchain"""
+    """
+    Representa una transacción judicial en la blockchain
+    Inmutable y sin __dict__: las cadenas grandes mantienen millones de instancias.
+    Los identificadores repetidos (caso, acción, juez, claves de data) se internan
+    y las partes se comparten entre las transacciones del mismo caso.
+    Su diccionario, su codificación binaria y su id no se guardan en la instancia: se memorizan
+    por bloque (block_cache) y en los índices de la cadena
+    """
+    __slots__ = ("case_id", "action", "parties", "judge", "data", "timestamp")
+
     case_id: str
     action: str  # create_case, add_document, schedule_hearing, issue_judgment
-    parties: Dict[str, str]  # {"plaintiff": "hash1", "defendant": "hash2"}
+    parties: Mapping[str, str]  # {"plaintiff": "hash1", "defendant": "hash2"}
     judge: str
     data: Dict[str, Any]
     timestamp: str
 
+    def __post_init__(self):
+        self._set_fields(self.case_id, self.action, self.parties, self.judge, self.data, self.timestamp)
+
+    def _set_fields(self, case_id, action, parties, judge, data, timestamp) -> None:
+        set_field = object.__setattr__
+        intern = sys.intern
+        set_field(self, "case_id", intern(case_id))
+        set_field(self, "action", intern(action))
+        set_field(self, "parties", intern_parties(parties))
+        set_field(self, "judge", intern(judge))
+        set_field(self, "data", FrozenDict({
+            intern(key): value if type(value) is str else freeze(value)
+            for key, value in data.items()
+        }))
+        set_field(self, "timestamp", timestamp)
+
+    @classmethod
+    def from_encoded(cls, case_id, action, parties, judge, data, timestamp, encoded) -> "JudicialTransaction":
+        """
+        Transacción leída con encoding.decode_block_transactions
+        El segmento leído (encoded) no se conserva: retendría el registro por cada transacción
+        """
+        transaction = cls.__new__(cls)
+        transaction._set_fields(case_id, action, parties, judge, data, timestamp)
+        return transaction
+
+    def __reduce__(self):
+        return (JudicialTransaction, (
+            self.case_id, self.action, dict(self.parties), self.judge, self.data, self.timestamp
+        ))
+
     def to_dict(self) -> Dict:
-        """Convierte la transacción a diccionario"""
-        return asdict(self)
+        """
+        Convierte la transacción a diccionario (mismo contenido y orden que dataclasses.asdict)
+        El resultado es de solo lectura
+        """
+        return FrozenDict((
+            ("case_id", self.case_id),
+            ("action", self.action),
+            ("parties", self.parties),
+            ("judge", self.judge),
+            ("data", self.data),
+            ("timestamp", self.timestamp)
+        ))
 
     def to_json(self) -> str:
         """Convierte la transacción a JSON string"""
         return json.dumps(self.to_dict(), sort_keys=True)
 
+    def to_bytes(self) -> bytes:
+        """Codificación binaria canónica de la transacción"""
+        return encode_transaction(self)
+
+    def get_id(self) -> str:
+        """Identificador de la transacción: hash SHA-256 de su contenido"""
+        return hashlib.sha256(self.to_json().encode()).hexdigest()
+
+
+class BlockCache:
+    """
+    LRU de los bloques con datos derivados en memoria
+    Al superar el tamaño se liberan los del bloque usado hace más tiempo: recorrer la cadena
+    (exportación, validación) no deja todos sus bloques serializados en memoria
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._blocks: "OrderedDict[int, Block]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def touch(self, block: "Block") -> None:
+        with self._lock:
+            key = id(block)
+            if key in self._blocks:
+                self._blocks.move_to_end(key)
+                return
+            self._blocks[key] = block
+            if len(self._blocks) <= self.size:
+                return
+            evicted = self._blocks.popitem(last=False)[1]
+        evicted._release_caches()
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+
+block_cache = BlockCache(BLOCK_CACHE_SIZE)
+
+
+# Campos de un bloque que no pueden cambiar una vez sellado
+SEALED_BLOCK_FIELDS = frozenset({
+    "index", "transactions", "previous_hash", "timestamp", "nonce", "version", "merkle_root", "hash"
+})
+
 
 class Block:
     """
     Representa un bloque en la blockchain judicial
     Contiene transacciones, hash del bloque anterior, nonce para PoW
+    Al añadirse a la cadena se sella: sus campos pasan a ser de solo lectura y
+    su diccionario, su codificación binaria y su árbol de Merkle se reutilizan mientras
+    el bloque siga en block_cache
     """
 
     def __init__(
@@ -41,20 +226,114 @@ class Block:
         transactions: List[JudicialTransaction],
         previous_hash: str,
         timestamp: Optional[str] = None,
-        nonce: int = 0
+        nonce: int = 0,
+        version: int = CURRENT_HASH_VERSION
     ):
         self.index = index
         self.transactions = transactions
         self.previous_hash = previous_hash
         self.timestamp = timestamp or datetime.now().isoformat()
         self.nonce = nonce
+        self.version = version
+        self._reset_caches()
+        self.merkle_root = self.calculate_merkle_root()
         self.hash = self.calculate_hash()
 
+    def _reset_caches(self) -> None:
+        self._sealed = False
+        # Bloques cargados solo con su cabecera: lee el registro codificado del log
+        self._read_payload: Optional[Callable[[], bytes]] = None
+        self._transaction_count = 0
+        self._merkle_levels: Optional[List[List[bytes]]] = None
+        self._proof_cache: Dict[int, List[Dict[str, str]]] = {}
+        self._dict: Optional[Dict] = None
+        self._json: Optional[str] = None
+        self._bytes: Optional[bytes] = None
+
+    def __getattr__(self, name: str) -> Any:
+        # Solo se llama si el atributo no existe: transacciones aún no decodificadas
+        if name == "transactions" and self.__dict__.get("_read_payload") is not None:
+            transactions = self._decode_transactions()
+            object.__setattr__(self, "transactions", transactions)
+            block_cache.touch(self)
+            return transactions
+        raise AttributeError(f"'{type(self).__name__}' no tiene el atributo '{name}'")
+
+    def _release_caches(self) -> None:
+        """Libera los datos derivados; se recalculan la próxima vez que se usen"""
+        self._merkle_levels = None
+        self._proof_cache = {}
+        self._dict = None
+        self._json = None
+        self._bytes = None
+        if self._read_payload is not None:
+            # Se vuelven a decodificar desde el registro del log
+            self.__dict__.pop("transactions", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in SEALED_BLOCK_FIELDS and getattr(self, "_sealed", False):
+            raise AttributeError(f"El bloque #{self.index} está sellado: no se puede modificar '{name}'")
+        object.__setattr__(self, name, value)
+
+    def _decode_transactions(self) -> Tuple[JudicialTransaction, ...]:
+        from_encoded = JudicialTransaction.from_encoded
+        return tuple(from_encoded(*fields) for fields in decode_block_transactions(self._read_payload()))
+
+    @property
+    def transactions_loaded(self) -> bool:
+        """False si el bloque se cargó solo con su cabecera y aún no se leyeron sus transacciones"""
+        return "transactions" in self.__dict__
+
+    @property
+    def transaction_count(self) -> int:
+        """Número de transacciones, sin decodificarlas si el bloque no está cargado"""
+        if self.transactions_loaded:
+            return len(self.transactions)
+        return self._transaction_count
+
+    def transaction_records(self, with_ids: bool = True) -> Iterator[Tuple[str, str, Mapping[str, Any], Optional[str]]]:
+        """
+        (case_id, action, data, id) de cada transacción para los índices de la cadena
+        Si el bloque no está cargado se decodifican como diccionarios sin conservarlas
+        """
+        if self.transactions_loaded:
+            for transaction in self.transactions:
+                yield (transaction.case_id, transaction.action, transaction.data,
+                       transaction.get_id() if with_ids else None)
+            return
+
+        for case_id, action, parties, judge, data, timestamp, _ in decode_block_transactions(self._read_payload()):
+            # Mismo id que JudicialTransaction.get_id: el diccionario equivale a to_dict()
+            transaction_id = hashlib.sha256(json.dumps({
+                "case_id": case_id,
+                "action": action,
+                "parties": parties,
+                "judge": judge,
+                "data": data,
+                "timestamp": timestamp
+            }, sort_keys=True).encode()).hexdigest() if with_ids else None
+            yield case_id, action, data, transaction_id
+
+    def seal(self) -> None:
+        """Marca el bloque como definitivo (minado y añadido a la cadena)"""
+        if not self._sealed:
+            self.transactions = tuple(self.transactions)
+            self._sealed = True
+
     def calculate_hash(self) -> str:
         """
         Calcula el hash SHA-256 del bloque
         Incluye todos los datos del bloque en el cálculo
         """
+        if self.version == HASH_VERSION_LEGACY:
+            return self._calculate_legacy_hash()
+
+        hasher = hashlib.sha256(self._hash_prefix())
+        hasher.update(str(self.nonce).encode())
+        return hasher.hexdigest()
+
+    def _calculate_legacy_hash(self) -> str:
+        """Hash v1: JSON del bloque completo, recalculado en cada intento"""
         # Serializar transacciones
         transactions_data = [tx.to_dict() for tx in self.transactions]
         
@@ -69,29 +348,263 @@ class Block:
         block_string = json.dumps(block_data, sort_keys=True)
         return hashlib.sha256(block_string.encode()).hexdigest()
 
-    def mine_block(self, difficulty: int = 4) -> None:
+    def _hash_prefix(self) -> bytes:
+        """
+        Serializa el contenido fijo del bloque (todo excepto el nonce)
+        El nonce se concatena al final para poder reutilizar el estado del hasher
+        """
+        header = {
+            "version": self.version,
+            "index": self.index,
+            "previous_hash": self.previous_hash,
+            "timestamp": self.timestamp
+        }
+        if self.version >= HASH_VERSION_BINARY:
+            # Campos con prefijo de longitud: el nonce puede ir justo después sin separador
+            leaf_count = len(self.transactions) if self.version >= HASH_VERSION_LEAF_COUNT else None
+            return encode_block_header(
+                self.version, self.index, self.previous_hash, self.timestamp,
+                self.calculate_merkle_root(), leaf_count
+            )
+
+        if self.version == HASH_VERSION_MIDSTATE:
+            header["transactions"] = [tx.to_dict() for tx in self.transactions]
+        else:
+            # La raíz se recalcula para que cualquier alteración de transacciones invalide el hash
+            header["merkle_root"] = self.calculate_merkle_root()
+        return (json.dumps(header, sort_keys=True) + "|nonce:").encode()
+
+    @property
+    def leaf_encoding(self) -> str:
+        """Serialización de las transacciones usada como hojas del árbol de Merkle"""
+        return "binary" if self.version >= HASH_VERSION_BINARY else "json"
+
+    def _leaf_hashes(self) -> List[bytes]:
+        if self.version >= HASH_VERSION_BINARY and not self.transactions_loaded:
+            # Hojas desde los segmentos del registro, sin decodificar las transacciones en el bloque
+            return [hash_leaf(fields[-1]) for fields in decode_block_transactions(self._read_payload())]
+        if self.version >= HASH_VERSION_BINARY:
+            return [hash_leaf(tx.to_bytes()) for tx in self.transactions]
+        return [hash_leaf(tx.to_json().encode()) for tx in self.transactions]
+
+    def _build_merkle_levels(self) -> List[List[bytes]]:
+        return build_levels(self._leaf_hashes(), carry_odd=self.version >= HASH_VERSION_LEAF_COUNT)
+
+    def calculate_merkle_root(self) -> str:
+        """
+        Calcula la raíz de Merkle sobre las transacciones actuales del bloque
+        En un bloque sellado el árbol se construye una vez y se reutiliza
+        """
+        levels = self._merkle_levels
+        if levels is not None:
+            return levels[-1][0].hex()
+
+        levels = self._build_merkle_levels()
+        if self._sealed:
+            self._merkle_levels = levels
+            block_cache.touch(self)
+        return levels[-1][0].hex()
+
+    def get_merkle_proof(self, position: int) -> Optional[List[Dict[str, str]]]:
+        """
+        Retorna la prueba de inclusión de la transacción en 'position'
+        Los niveles del árbol y las pruebas se cachean: un bloque minado no cambia
+        """
+        if position < 0 or position >= len(self.transactions):
+            return None
+
+        if not self._sealed:
+            return build_proof(self._build_merkle_levels(), position)
+
+        proof_cache = self._proof_cache
+        proof = proof_cache.get(position)
+        if proof is None:
+            levels = self._merkle_levels
+            if levels is None:
+                levels = self._merkle_levels = self._build_merkle_levels()
+            proof = proof_cache[position] = build_proof(levels, position)
+        block_cache.touch(self)
+        return proof
+
+    def has_mutated_merkle_tree(self) -> bool:
+        """
+        Indica si el árbol combina dos nodos iguales
+        En los bloques v3 y v4 eso permite repetir la última transacción sin cambiar la raíz
+        """
+        if self.version not in (HASH_VERSION_MERKLE, HASH_VERSION_BINARY):
+            return False
+        levels = self._merkle_levels
+        if levels is None:
+            levels = self._build_merkle_levels()
+        return has_duplicate_pair(levels)
+
+    def get_header(self) -> Dict:
+        """Cabecera del bloque: suficiente para recalcular su hash sin las transacciones"""
+        return {
+            "index": self.index,
+            "previous_hash": self.previous_hash,
+            "timestamp": self.timestamp,
+            "merkle_root": self.merkle_root,
+            "transaction_count": self.transaction_count,
+            "nonce": self.nonce,
+            "version": self.version,
+            "hash": self.hash
+        }
+
+    def mine_block(self, difficulty: int = 4, miner: Optional[ParallelMiner] = None) -> None:
         """
         Implementa Proof of Work simple
         Busca un nonce que genere un hash con 'difficulty' ceros al inicio
+        Si se indica un ParallelMiner, el espacio de nonces se reparte entre sus procesos
         """
         target = "0" * difficulty
-        
-        while not self.hash.startswith(target):
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+
+        if miner is not None and self.version != HASH_VERSION_LEGACY:
+            if not self.hash.startswith(target):
+                self.nonce, self.hash = miner.search(self._hash_prefix(), target, self.nonce + 1)
+        elif self.version == HASH_VERSION_LEGACY:
+            while not self.hash.startswith(target):
+                self.nonce += 1
+                self.hash = self.calculate_hash()
+        else:
+            # Midstate: el prefijo se serializa y se alimenta al hasher una sola vez,
+            # en cada intento solo se copia el estado y se añade el nonce
+            midstate = hashlib.sha256(self._hash_prefix())
+            nonce = self.nonce
+            block_hash = self.hash
+
+            while not block_hash.startswith(target):
+                nonce += 1
+                hasher = midstate.copy()
+                hasher.update(str(nonce).encode())
+                block_hash = hasher.hexdigest()
+
+            self.nonce = nonce
+            self.hash = block_hash
         
         print(f"✓ Bloque minado: {self.hash[:16]}... (nonce: {self.nonce})")
 
     def to_dict(self) -> Dict:
-        """Convierte el bloque a diccionario"""
-        return {
+        """
+        Convierte el bloque a diccionario
+        Si el bloque está sellado el resultado es de solo lectura y se comparte entre llamadas
+        Un bloque cargado solo con su cabecera se convierte desde su registro sin decodificar
+        sus transacciones en el bloque
+        """
+        block_dict = self._dict
+        if block_dict is not None:
+            return block_dict
+        if not self.transactions_loaded:
+            return decode_block(self._read_payload())
+
+        block_dict = {
             "index": self.index,
             "transactions": [tx.to_dict() for tx in self.transactions],
             "previous_hash": self.previous_hash,
             "timestamp": self.timestamp,
             "nonce": self.nonce,
+            "version": self.version,
+            "merkle_root": self.merkle_root,
             "hash": self.hash
         }
+        if self._sealed:
+            block_dict["transactions"] = tuple(block_dict["transactions"])
+            block_dict = self._dict = FrozenDict(block_dict)
+            block_cache.touch(self)
+        return block_dict
+
+    def to_json(self) -> str:
+        """JSON del bloque con claves ordenadas (exportación NDJSON y listado de la cadena)"""
+        block_json = self._json
+        if block_json is not None:
+            return block_json
+        if not self.transactions_loaded:
+            # Exportación de la cadena: desde el registro del log, sin conservar nada en el bloque
+            return json.dumps(decode_block(self._read_payload()), sort_keys=True)
+
+        block_json = json.dumps(self.to_dict(), sort_keys=True)
+        if self._sealed:
+            self._json = block_json
+            block_cache.touch(self)
+        return block_json
+
+    def to_bytes(self) -> bytes:
+        """Codificación binaria del bloque completo (formato del log y de la exportación binaria)"""
+        encoded = self._bytes
+        if encoded is not None:
+            return encoded
+        if self._read_payload is not None:
+            # Bloque leído de su codificación: es inmutable, así que se reutiliza el registro
+            return self._read_payload()
+
+        encoded = encode_block(self)
+        if self._sealed:
+            self._bytes = encoded
+            block_cache.touch(self)
+        return encoded
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Block":
+        """Reconstruye un bloque desde su codificación binaria sin recalcular su hash"""
+        block = cls.from_header(decode_block_header(data), lambda: data)
+        # Decodificar ya y no al primer uso: un registro inválido debe fallar aquí
+        object.__setattr__(block, "transactions", block._decode_transactions())
+        block_cache.touch(block)
+        return block
+
+    @classmethod
+    def from_header(cls, header: Dict, read_payload: Callable[[], bytes]) -> "Block":
+        """
+        Bloque sellado construido solo con su cabecera (encoding.decode_block_header)
+        Sus transacciones se decodifican desde read_payload() la primera vez que se usan
+        """
+        block = cls.__new__(cls)
+        block._reset_caches()
+        block.index = header["index"]
+        block.previous_hash = header["previous_hash"]
+        block.timestamp = header["timestamp"]
+        block.nonce = header["nonce"]
+        block.version = header["version"]
+        block.merkle_root = header["merkle_root"]
+        block.hash = header["hash"]
+        block._transaction_count = header["transaction_count"]
+        block._read_payload = read_payload
+        block._sealed = True
+        return block
+
+    @classmethod
+    def from_dict(cls, data: Dict, trusted: bool = False) -> "Block":
+        """
+        Reconstruye un bloque a partir de su diccionario
+        Los bloques exportados sin 'version' usan el formato de hash v1
+        Con trusted=True (almacenamiento local) no se recalculan raíz de Merkle ni hash;
+        validate_chain los recalcula y los compara con los almacenados
+        """
+        if trusted:
+            block = cls.__new__(cls)
+            block._reset_caches()
+            block.index = data["index"]
+            block.transactions = [JudicialTransaction(**tx) for tx in data["transactions"]]
+            block.previous_hash = data["previous_hash"]
+            block.timestamp = data["timestamp"]
+            block.nonce = data["nonce"]
+            block.version = data.get("version", HASH_VERSION_LEGACY)
+            block.merkle_root = data.get("merkle_root") or block.calculate_merkle_root()
+            block.hash = data["hash"]
+            block.seal()
+            return block
+
+        block = cls(
+            index=data["index"],
+            transactions=[JudicialTransaction(**tx) for tx in data["transactions"]],
+            previous_hash=data["previous_hash"],
+            timestamp=data["timestamp"],
+            nonce=data["nonce"],
+            version=data.get("version", HASH_VERSION_LEGACY)
+        )
+        # Conservar el hash almacenado para que is_chain_valid detecte alteraciones
+        block.hash = data.get("hash", block.hash)
+        return block
 
 
 class JudicialBlockchain:
@@ -100,12 +613,141 @@ class JudicialBlockchain:
     Maneja la cadena de bloques y validaciones
     """
 
-    def __init__(self, difficulty: int = 4):
+    def __init__(
+        self,
+        difficulty: int = 4,
+        mining_workers: int = 1,
+        store=None,
+        create_genesis: bool = True
+    ):
         self.chain: List[Block] = []
         self.pending_transactions: List[JudicialTransaction] = []
         self.difficulty = difficulty
         self.mining_reward = 1  # Recompensa simbólica por minar
-        self.create_genesis_block()
+        # Índice case_id -> [(índice de bloque, posición en el bloque)]
+        self.case_index: Dict[str, List[Tuple[int, int]]] = {}
+        # Índice global document_hash -> [(case_id, índice de bloque, posición)]
+        self.document_index: Dict[str, List[Tuple[str, int, int]]] = {}
+        # Índice transaction_id -> (índice de bloque, posición)
+        self.transaction_index: Dict[str, Tuple[int, int]] = {}
+        # Al cargar desde disco los tres índices anteriores se construyen en un hilo aparte;
+        # _indexed_height es el número de bloques ya indexados
+        self._index_lock = threading.Lock()
+        self._indexes_ready = threading.Event()
+        self._indexes_ready.set()
+        self._indexed_height = 0
+        self._indexer: Optional[threading.Thread] = None
+        self._closing = False
+        # Estadísticas acumuladas, actualizadas al añadir cada bloque
+        self.total_transactions = 0
+        self.case_type_counts: Dict[str, int] = {}
+        self.case_ids: Set[str] = set()
+        self._statistics_saved_at = 0  # total_transactions en el último guardado
+        # Funciones notificadas cada vez que se añade un bloque a la cadena
+        self.block_listeners: List[Callable[[Block], None]] = []
+        # Último punto verificado de la cadena: {"height": ..., "tip_hash": ...}
+        self.validation_checkpoint: Optional[Dict[str, Any]] = None
+        # Con más de un proceso se mina en paralelo con un pool persistente
+        self.mining_workers = mining_workers
+        self.miner: Optional[ParallelMiner] = (
+            ParallelMiner(mining_workers) if mining_workers > 1 else None
+        )
+        # Log de bloques en disco (storage.BlockStore); si tiene bloques se carga la cadena
+        self.store = store
+        if self.store is not None and self.store.block_count:
+            self.load_from_store()
+        elif create_genesis:
+            self.create_genesis_block()
+
+    @classmethod
+    def from_blocks(cls, blocks: List[Block], difficulty: int) -> "JudicialBlockchain":
+        """Construye una blockchain a partir de bloques ya validados (p. ej. una importación)"""
+        blockchain = cls(difficulty, create_genesis=False)
+        for block in blocks:
+            blockchain._append_block(block)
+        return blockchain
+
+    def load_from_store(self) -> None:
+        """
+        Carga la cadena desde el log de bloques leyendo solo las cabeceras
+        Los contadores salen del último guardado más los bloques posteriores; los índices
+        por caso, documento e id se construyen en segundo plano (las consultas que los usan
+        esperan a que terminen)
+        """
+        start = time.perf_counter()
+        self.chain = self.store.load_blocks()
+        restored = self._restore_statistics()
+        elapsed = time.perf_counter() - start
+        print(f"  Blockchain cargada desde disco: {len(self.chain)} bloques en {elapsed:.3f}s "
+              f"({restored} bloques recontados)")
+
+        self._indexes_ready.clear()
+        self._indexer = threading.Thread(target=self._build_indexes, name="chain-indexer", daemon=True)
+        self._indexer.start()
+
+    def _restore_statistics(self) -> int:
+        """Carga los contadores guardados si corresponden a esta cadena; retorna los bloques recontados"""
+        saved = self.store.load_statistics()
+        height = -1
+        if saved is not None and saved["height"] < len(self.chain) \
+                and self.chain[saved["height"]].hash == saved["tip_hash"]:
+            height = saved["height"]
+            self.total_transactions = saved["total_transactions"]
+            self.case_type_counts = saved["case_type_counts"]
+            self.case_ids = set(saved["case_ids"])
+
+        for block in self.chain[height + 1:]:
+            for case_id, _, data, _ in block.transaction_records(with_ids=False):
+                self._count_transaction(case_id, data)
+        if height < len(self.chain) - 1:
+            self.save_statistics()
+        return len(self.chain) - 1 - height
+
+    def save_statistics(self) -> None:
+        """Guarda los contadores en el log de bloques junto con la altura y el hash que cubren"""
+        tip = self.chain[-1]
+        self.store.save_statistics({
+            "height": tip.index,
+            "tip_hash": tip.hash,
+            "total_transactions": self.total_transactions,
+            "case_type_counts": self.case_type_counts,
+            "case_ids": sorted(self.case_ids)
+        })
+        self._statistics_saved_at = self.total_transactions
+
+    def _build_indexes(self) -> None:
+        """Indexa los bloques cargados y los que se añadan mientras tanto (hilo en segundo plano)"""
+        start = time.perf_counter()
+        while True:
+            with self._index_lock:
+                end = len(self.chain)
+                if self._indexed_height == end:
+                    self._indexes_ready.set()
+                    break
+            for block in self.chain[self._indexed_height:end]:
+                if self._closing:
+                    return
+                self._index_locations(block)
+            with self._index_lock:
+                self._indexed_height = end
+        print(f"  Índices de la cadena construidos en {time.perf_counter() - start:.3f}s")
+
+    def wait_for_indexes(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que los índices por caso, documento e id cubran toda la cadena"""
+        return self._indexes_ready.wait(timeout)
+
+    def close(self) -> None:
+        """Detiene el pool de minado y cierra el log de bloques (en orden inverso al de creación)"""
+        if self.miner is not None:
+            self.miner.close()
+            self.miner = None
+        if self.store is not None:
+            self._closing = True
+            if self._indexer is not None:
+                self._indexer.join()
+            if self.chain:
+                self.save_statistics()
+            self.store.close()
 
     def create_genesis_block(self) -> None:
         """Crea el bloque génesis (primer bloque de la cadena)"""
@@ -119,21 +761,68 @@ class JudicialBlockchain:
         )
         
         genesis_block = Block(0, [genesis_transaction], "0")
-        genesis_block.mine_block(self.difficulty)
-        self.chain.append(genesis_block)
+        genesis_block.mine_block(self.difficulty, self.miner)
+        self._append_block(genesis_block)
         print("  Blockchain judicial inicializada con bloque génesis")
 
+    def _append_block(self, block: Block) -> None:
+        """Añade un bloque a la cadena, lo persiste y actualiza los índices"""
+        block.seal()
+        if self.store is not None:
+            self.store.append(block)
+        self.chain.append(block)
+        self._index_block(block)
+        for listener in self.block_listeners:
+            listener(block)
+
+    def _index_block(self, block: Block) -> None:
+        """Registra las transacciones de un bloque nuevo en las estadísticas y los índices"""
+        for transaction in block.transactions:
+            self._count_transaction(transaction.case_id, transaction.data)
+        if self.store is not None \
+                and self.total_transactions - self._statistics_saved_at >= STATISTICS_INTERVAL:
+            self.save_statistics()
+
+        with self._index_lock:
+            # Mientras se indexa en segundo plano, ese hilo también alcanza este bloque
+            if self._indexes_ready.is_set() and self._indexed_height == block.index:
+                self._index_locations(block)
+                self._indexed_height += 1
+
+    def _count_transaction(self, case_id: str, data: Mapping[str, Any]) -> None:
+        self.case_ids.add(case_id)
+        case_type = data.get("type", "unknown")
+        self.case_type_counts[case_type] = self.case_type_counts.get(case_type, 0) + 1
+        self.total_transactions += 1
+
+    def _index_locations(self, block: Block) -> None:
+        """Registra las transacciones del bloque en los índices por caso, documento e id"""
+        for position, (case_id, action, data, transaction_id) in enumerate(block.transaction_records()):
+            self.case_index.setdefault(case_id, []).append((block.index, position))
+            self.transaction_index[transaction_id] = (block.index, position)
+            if action == "add_document":
+                self.document_index.setdefault(data["document_hash"], []).append(
+                    (case_id, block.index, position)
+                )
+
     def get_latest_block(self) -> Block:
         """Retorna el último bloque de la cadena"""
         return self.chain[-1]
 
+    def validate_transaction(self, transaction: JudicialTransaction) -> bool:
+        """Valida que la transacción tenga los datos mínimos requeridos"""
+        if not transaction.case_id or not transaction.action:
+            print(" Transacción inválida: falta case_id o action")
+            return False
+
+        return True
+
     def add_transaction(self, transaction: JudicialTransaction) -> bool:
         """
         Añade una transacción a la lista de pendientes
         Valida que la transacción tenga datos válidos
         """
-        if not transaction.case_id or not transaction.action:
-            print(" Transacción inválida: falta case_id o action")
+        if not self.validate_transaction(transaction):
             return False
         
         self.pending_transactions.append(transaction)
@@ -149,88 +838,283 @@ class JudicialBlockchain:
             print("  No hay transacciones pendientes para minar")
             return None
 
+        # El bloque se queda con la lista actual; las nuevas pendientes van a otra
+        transactions, self.pending_transactions = self.pending_transactions, []
+
         # Crear nuevo bloque
         block = Block(
             index=len(self.chain),
-            transactions=self.pending_transactions,
+            transactions=transactions,
             previous_hash=self.get_latest_block().hash
         )
 
         # Minar el bloque (Proof of Work)
-        block.mine_block(self.difficulty)
+        block.mine_block(self.difficulty, self.miner)
 
         # Añadir a la cadena
-        self.chain.append(block)
-        
-        # Limpiar transacciones pendientes
-        self.pending_transactions = []
+        self._append_block(block)
         
         print(f"  Bloque #{block.index} minado por {miner_address}")
         return block
 
-    def is_chain_valid(self) -> bool:
+    def is_chain_valid(self, full_audit: bool = True) -> bool:
         """
         Verifica la integridad de toda la cadena
         Comprueba hashes y enlaces entre bloques
         """
-        # Verificar desde el segundo bloque (índice 1)
-        for i in range(1, len(self.chain)):
+        return self.validate_chain(full_audit)["valid"]
+
+    def validate_chain(self, full_audit: bool = False) -> Dict:
+        """
+        Valida la cadena y retorna un reporte (válida, bloques revisados, duración)
+        En modo incremental solo revisa los bloques añadidos desde el último checkpoint;
+        con full_audit se recalculan todos los bloques
+        """
+        start_time = time.perf_counter()
+        end = len(self.chain)
+        start = 1  # Verificar desde el segundo bloque (índice 1)
+        mode = "full"
+
+        checkpoint = self.validation_checkpoint
+        if (not full_audit and checkpoint is not None
+                and checkpoint["height"] < end
+                and self.chain[checkpoint["height"]].hash == checkpoint["tip_hash"]):
+            start = checkpoint["height"] + 1
+            mode = "incremental"
+
+        valid = True
+        blocks_checked = 0
+        for i in range(start, end):
             current_block = self.chain[i]
             previous_block = self.chain[i - 1]
+            blocks_checked += 1
 
             # Verificar que el hash del bloque sea correcto
             if current_block.hash != current_block.calculate_hash():
                 print(f" Hash inválido en bloque #{i}")
-                return False
+                valid = False
+                break
+
+            # La raíz almacenada debe coincidir con las transacciones (en v1/v2 no entra en el hash
+            # y los bloques cargados del log o importados la traen del registro)
+            if current_block.merkle_root != current_block.calculate_merkle_root():
+                print(f" Raíz de Merkle inválida en bloque #{i}")
+                valid = False
+                break
+
+            # Rechazar árboles con un par repetido (misma raíz que el bloque sin repetir)
+            if current_block.has_mutated_merkle_tree():
+                print(f" Transacciones duplicadas en el árbol de Merkle del bloque #{i}")
+                valid = False
+                break
 
             # Verificar que el previous_hash coincida
             if current_block.previous_hash != previous_block.hash:
                 print(f" Enlace roto entre bloques #{i-1} y #{i}")
-                return False
+                valid = False
+                break
 
             # Verificar proof of work
             if not current_block.hash.startswith("0" * self.difficulty):
                 print(f" Proof of Work inválido en bloque #{i}")
-                return False
+                valid = False
+                break
 
-        print(" Blockchain válida - Integridad verificada")
-        return True
+        if valid:
+            self.validation_checkpoint = {"height": end - 1, "tip_hash": self.chain[end - 1].hash}
+            print(" Blockchain válida - Integridad verificada")
+        else:
+            # Una alteración invalida el checkpoint: la próxima validación será completa
+            self.validation_checkpoint = None
+
+        return {
+            "valid": valid,
+            "mode": mode,
+            "blocks_checked": blocks_checked,
+            "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 3),
+            "checkpoint": self.validation_checkpoint
+        }
+
+    def _case_locations(self, case_id: str, height: Optional[int]) -> Iterator[Tuple[int, int]]:
+        """Posiciones del caso en el índice, hasta la altura indicada (inclusive)"""
+        self._indexes_ready.wait()
+        for block_index, position in self.case_index.get(case_id, ()):
+            if height is not None and block_index > height:
+                break
+            yield block_index, position
 
-    def get_case_history(self, case_id: str) -> List[Dict]:
+    def get_case_history(self, case_id: str, height: Optional[int] = None) -> List[Dict]:
         """
         Obtiene todo el historial de transacciones de un caso específico
+        Usa el índice por caso: el costo depende solo de las transacciones del caso
+        Con height solo se incluyen los bloques hasta esa altura (lectura de un snapshot)
         """
         history = []
         
-        for block in self.chain:
-            for transaction in block.transactions:
-                if transaction.case_id == case_id:
-                    history.append({
-                        "block": block.index,
-                        "timestamp": transaction.timestamp,
-                        "action": transaction.action,
-                        "data": transaction.data,
-                        "block_hash": block.hash[:16] + "..."
-                    })
+        for block_index, position in self._case_locations(case_id, height):
+            block = self.chain[block_index]
+            transaction = block.transactions[position]
+            history.append({
+                "block": block.index,
+                "timestamp": transaction.timestamp,
+                "action": transaction.action,
+                "data": transaction.data,
+                "block_hash": block.hash[:16] + "..."
+            })
         
         return history
 
+    def get_transaction_proof(self, block_index: int, position: int) -> Optional[Dict]:
+        """
+        Genera la prueba de inclusión de una transacción concreta
+        Incluye la cabecera del bloque para que un auditor pueda verificar sin el bloque completo
+        """
+        if block_index < 0 or block_index >= len(self.chain):
+            return None
+
+        block = self.chain[block_index]
+        proof = block.get_merkle_proof(position)
+        if proof is None:
+            return None
+
+        return {
+            "transaction": block.transactions[position].to_dict(),
+            "position": position,
+            "leaf_encoding": block.leaf_encoding,
+            "proof": proof,
+            "block_header": block.get_header()
+        }
+
+    def get_case_proofs(self, case_id: str, height: Optional[int] = None) -> List[Dict]:
+        """Obtiene las pruebas de inclusión de todas las transacciones de un caso"""
+        return [
+            self.get_transaction_proof(block_index, position)
+            for block_index, position in self._case_locations(case_id, height)
+        ]
+
+    def find_transaction(self, transaction_id: str, height: Optional[int] = None) -> Optional[Dict]:
+        """
+        Busca una transacción minada por su identificador (índice por id, O(1))
+        Con height solo se encuentra si está en un bloque hasta esa altura (lectura de un snapshot)
+        """
+        self._indexes_ready.wait()
+        location = self.transaction_index.get(transaction_id)
+        if location is None or (height is not None and location[0] > height):
+            return None
+
+        return {"block_index": location[0], "position": location[1]}
+
+    def _document_locations(self, document_hash: str, height: Optional[int]) -> Iterator[Tuple[str, int, int]]:
+        """Apariciones del documento en el índice, hasta la altura indicada (inclusive)"""
+        self._indexes_ready.wait()
+        for case_id, block_index, position in self.document_index.get(document_hash, ()):
+            if height is not None and block_index > height:
+                break
+            yield case_id, block_index, position
+
+    def find_document(self, case_id: str, document_hash: str, height: Optional[int] = None) -> Optional[Dict]:
+        """Localiza la transacción add_document de un documento y retorna su prueba"""
+        for doc_case_id, block_index, position in self._document_locations(document_hash, height):
+            if doc_case_id == case_id:
+                return self.get_transaction_proof(block_index, position)
+
+        return None
+
+    def locate_document(self, document_hash: str, height: Optional[int] = None) -> List[Dict]:
+        """Retorna en qué caso, bloque y transacción aparece un documento (cualquier caso)"""
+        return [
+            {"case_id": case_id, "block_index": block_index, "position": position}
+            for case_id, block_index, position in self._document_locations(document_hash, height)
+        ]
+
+    def find_block_by_time(self, timestamp: str, height: Optional[int] = None) -> int:
+        """
+        Índice del primer bloque con timestamp >= al indicado (búsqueda binaria)
+        Los bloques se añaden en orden, por lo que sus timestamps ISO están ordenados
+        """
+        low, high = 0, len(self.chain) if height is None else height + 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.chain[middle].timestamp < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_blocks_page(
+        self,
+        start: int = 0,
+        limit: int = 50,
+        end: Optional[int] = None,
+        from_time: Optional[str] = None,
+        to_time: Optional[str] = None,
+        headers_only: bool = False,
+        as_json: bool = False,
+        height: Optional[int] = None
+    ) -> Dict:
+        """
+        Retorna una página de bloques sin copiar la cadena
+        start/end: rango de alturas (end inclusivo); from_time/to_time: rango de timestamps
+        next_cursor es la altura desde la que pedir la siguiente página (None al final)
+        Con as_json los bloques completos se entregan ya serializados (JSON memorizado)
+        height limita la cadena visible a esa altura (lectura de un snapshot)
+        """
+        total_blocks = len(self.chain) if height is None else height + 1
+        stop = total_blocks
+        if end is not None:
+            stop = min(stop, end + 1)
+        if from_time:
+            start = max(start, self.find_block_by_time(from_time, height))
+        if to_time:
+            # Incluir bloques cuyo timestamp empieza por to_time (p. ej. una fecha sin hora)
+            stop = min(stop, self.find_block_by_time(to_time + "\uffff", height))
+        start = max(start, 0)
+
+        page_end = min(stop, start + limit)
+        blocks = []
+        for index in range(start, page_end):
+            block = self.chain[index]
+            if headers_only:
+                blocks.append(block.get_header())
+            elif as_json:
+                blocks.append(block.to_json())
+            else:
+                blocks.append(block.to_dict())
+
+        return {
+            "blocks": blocks,
+            "next_cursor": str(page_end) if page_end < stop else None,
+            "total_blocks": total_blocks
+        }
+
     def get_statistics(self) -> Dict:
-        """Retorna estadísticas básicas de la blockchain"""
-        total_transactions = sum(len(block.transactions) for block in self.chain)
+        """Retorna estadísticas básicas de la blockchain (contadores acumulados, O(1))"""
+        return {
+            "total_blocks": len(self.chain),
+            "total_transactions": self.total_transactions,
+            "unique_cases": len(self.case_ids),
+            "pending_transactions": len(self.pending_transactions),
+            "case_types": dict(self.case_type_counts),
+            "difficulty": self.difficulty
+        }
+
+    def compute_statistics(self, height: Optional[int] = None) -> Dict:
+        """Recalcula las estadísticas recorriendo toda la cadena (o hasta la altura indicada)"""
+        chain = self.chain if height is None else self.chain[:height + 1]
+        total_transactions = sum(len(block.transactions) for block in chain)
         
         # Contar tipos de casos
         case_types = {}
         cases_set = set()
         
-        for block in self.chain:
+        for block in chain:
             for tx in block.transactions:
                 cases_set.add(tx.case_id)
                 case_type = tx.data.get("type", "unknown")
                 case_types[case_type] = case_types.get(case_type, 0) + 1
         
         return {
-            "total_blocks": len(self.chain),
+            "total_blocks": len(chain),
             "total_transactions": total_transactions,
             "unique_cases": len(cases_set),
             "pending_transactions": len(self.pending_transactions),
@@ -0,0 +1,237 @@
+"""
+Índices secundarios de los casos por tipo, estado, juez y fecha de creación
+Cada índice es una secuencia ordenada de claves (created_at, case_id), así que un rango de
+fechas es un tramo contiguo y la paginación por cursor es una búsqueda binaria.
+Hay un índice por cada combinación de campos, de modo que cualquier consulta lee
+solo las claves que cumplen todos sus filtros
+"""
+
+import base64
+from bisect import bisect_left
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from blockchain import FrozenDict
+
+# Campos indexados por igualdad
+INDEXED_FIELDS = ("type", "status", "judge")
+# Todas las combinaciones de campos, incluida la vacía (todos los casos)
+FIELD_COMBINATIONS = tuple(
+    fields for size in range(len(INDEXED_FIELDS) + 1) for fields in combinations(INDEXED_FIELDS, size)
+)
+ALL_CASES = ((), ())
+# Claves por tramo: un cambio copia un tramo y publicar copia solo la lista de tramos
+CHUNK_SIZE = 128
+
+IndexKey = Tuple[str, str]  # (created_at, case_id)
+IndexName = Tuple[Tuple[str, ...], Tuple[Any, ...]]  # (campos, valores)
+
+
+def encode_cursor(key: IndexKey) -> str:
+    """Cursor opaco a partir de la clave del último caso entregado"""
+    return base64.urlsafe_b64encode(f"{key[0]}|{key[1]}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> IndexKey:
+    """Lanza ValueError si el cursor no es válido"""
+    try:
+        created_at, case_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Cursor inválido: {cursor}")
+    return created_at, case_id
+
+
+class FrozenKeys:
+    """Claves ordenadas publicadas: tramos inmutables y la clave máxima de cada uno"""
+    __slots__ = ("chunks", "maxes")
+
+    def __init__(self, chunks: Tuple[Tuple[IndexKey, ...], ...], maxes: Tuple[IndexKey, ...]):
+        self.chunks = chunks
+        self.maxes = maxes
+
+    def locate(self, key: Tuple) -> Tuple[int, int]:
+        """Posición (tramo, desplazamiento) de la primera clave >= key"""
+        chunk_index = bisect_left(self.maxes, key)
+        if chunk_index == len(self.chunks):
+            return chunk_index, 0
+        return chunk_index, bisect_left(self.chunks[chunk_index], key)
+
+    def end(self) -> Tuple[int, int]:
+        return len(self.chunks), 0
+
+    def before(self, high: Tuple[int, int], low: Tuple[int, int], limit: int) -> Tuple[List[IndexKey], bool]:
+        """
+        Hasta limit claves entre low y high (sin incluir high), de mayor a menor,
+        y si quedan más claves en el rango
+        """
+        keys: List[IndexKey] = []
+        chunk_index, offset = high
+        while len(keys) < limit and (chunk_index, offset) > low:
+            if offset == 0:
+                chunk_index -= 1
+                offset = len(self.chunks[chunk_index])
+                continue
+            start = low[1] if chunk_index == low[0] else 0
+            start = max(start, offset - (limit - len(keys)))
+            keys.extend(reversed(self.chunks[chunk_index][start:offset]))
+            offset = start
+        return keys, (chunk_index, offset) > low
+
+
+EMPTY_KEYS = FrozenKeys((), ())
+
+
+class SortedKeys:
+    """
+    Claves ordenadas que modifica el hilo escritor
+    Los tramos son tuplas: insertar o quitar reemplaza un tramo, así que las vistas
+    publicadas antes comparten los tramos sin cambios y nunca ven una modificación
+    """
+
+    def __init__(self, keys: Iterable[IndexKey] = ()):
+        keys = tuple(keys)
+        self._chunks: List[Tuple[IndexKey, ...]] = [
+            keys[start:start + CHUNK_SIZE] for start in range(0, len(keys), CHUNK_SIZE)
+        ]
+        self._maxes: List[IndexKey] = [chunk[-1] for chunk in self._chunks]
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def add(self, key: IndexKey) -> None:
+        if not self._chunks:
+            self._chunks.append((key,))
+            self._maxes.append(key)
+            return
+
+        chunk_index = min(bisect_left(self._maxes, key), len(self._chunks) - 1)
+        chunk = self._chunks[chunk_index]
+        offset = bisect_left(chunk, key)
+        chunk = chunk[:offset] + (key,) + chunk[offset:]
+        if len(chunk) > 2 * CHUNK_SIZE:
+            self._chunks[chunk_index:chunk_index + 1] = [chunk[:CHUNK_SIZE], chunk[CHUNK_SIZE:]]
+            self._maxes[chunk_index:chunk_index + 1] = [chunk[CHUNK_SIZE - 1], chunk[-1]]
+        else:
+            self._chunks[chunk_index] = chunk
+            self._maxes[chunk_index] = chunk[-1]
+
+    def remove(self, key: IndexKey) -> None:
+        chunk_index = bisect_left(self._maxes, key)
+        chunk = self._chunks[chunk_index]
+        offset = bisect_left(chunk, key)
+        chunk = chunk[:offset] + chunk[offset + 1:]
+        if chunk:
+            self._chunks[chunk_index] = chunk
+            self._maxes[chunk_index] = chunk[-1]
+        else:
+            del self._chunks[chunk_index]
+            del self._maxes[chunk_index]
+
+    def freeze(self) -> FrozenKeys:
+        return FrozenKeys(tuple(self._chunks), tuple(self._maxes))
+
+
+class CaseIndex:
+    """
+    Índices que mantiene el hilo escritor al aplicar cada transacción
+    publish() entrega una vista inmutable; solo se congelan los índices que cambiaron
+    """
+
+    def __init__(self):
+        self._lists: Dict[IndexName, SortedKeys] = {ALL_CASES: SortedKeys()}
+        self._dirty = set(self._lists)
+        self._published: Dict[IndexName, FrozenKeys] = {}
+
+    @staticmethod
+    def _names(case: Mapping[str, Any]):
+        """Índices en los que aparece un caso: (campos, valores) por cada combinación"""
+        for fields in FIELD_COMBINATIONS:
+            values = tuple(case.get(field) for field in fields)
+            if None not in values:
+                yield fields, values
+
+    def _insert(self, name: IndexName, key: IndexKey) -> None:
+        if name not in self._lists:
+            self._lists[name] = SortedKeys()
+        self._lists[name].add(key)
+        self._dirty.add(name)
+
+    def _remove(self, name: IndexName, key: IndexKey) -> None:
+        keys = self._lists[name]
+        keys.remove(key)
+        if not keys and name != ALL_CASES:
+            del self._lists[name]
+        self._dirty.add(name)
+
+    def update(self, case_id: str, old: Optional[Mapping[str, Any]], new: Optional[Mapping[str, Any]]) -> None:
+        """Refleja el cambio de un caso (old o new en None para alta o baja)"""
+        old_key = (old["created_at"], case_id) if old is not None else None
+        new_key = (new["created_at"], case_id) if new is not None else None
+        old_names = set(self._names(old)) if old is not None else set()
+        new_names = set(self._names(new)) if new is not None else set()
+
+        for name in old_names:
+            if name not in new_names or old_key != new_key:
+                self._remove(name, old_key)
+        for name in new_names:
+            if name not in old_names or old_key != new_key:
+                self._insert(name, new_key)
+
+    def rebuild(self, cases: Mapping[str, Mapping[str, Any]]) -> None:
+        """Reconstruye los índices desde cero (p. ej. tras cargar un snapshot)"""
+        lists: Dict[IndexName, List[IndexKey]] = {ALL_CASES: []}
+        for case_id, case in cases.items():
+            key = (case["created_at"], case_id)
+            for name in self._names(case):
+                lists.setdefault(name, []).append(key)
+        self._lists = {name: SortedKeys(sorted(keys)) for name, keys in lists.items()}
+        self._dirty = set(self._lists)
+        self._published = {}
+
+    def publish(self) -> "CaseIndexView":
+        """Vista inmutable del estado actual de los índices"""
+        for name in self._dirty:
+            if name in self._lists:
+                self._published[name] = self._lists[name].freeze()
+            else:
+                self._published.pop(name, None)
+        self._dirty = set()
+        return CaseIndexView(FrozenDict(self._published))
+
+
+class CaseIndexView:
+    """Índices publicados en un snapshot; las consultas no modifican nada y no usan locks"""
+    __slots__ = ("_lists",)
+
+    def __init__(self, lists: Mapping[IndexName, FrozenKeys]):
+        self._lists = lists
+
+    def query(
+        self,
+        cases: Mapping[str, Dict],
+        filters: Optional[Dict[str, str]] = None,
+        from_time: Optional[str] = None,
+        to_time: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict:
+        """
+        Casos que cumplen los filtros, del más reciente al más antiguo
+        Usa el índice de la combinación de filtros pedida: el costo depende de limit
+        y no del total de casos
+        """
+        filters = filters or {}
+        fields = tuple(field for field in INDEXED_FIELDS if filters.get(field) is not None)
+        keys = self._lists.get((fields, tuple(filters[field] for field in fields)), EMPTY_KEYS)
+
+        low = keys.locate((from_time,)) if from_time else (0, 0)
+        # Incluir casos cuya fecha empieza por to_time (p. ej. una fecha sin hora)
+        high = keys.locate((to_time + "\uffff",)) if to_time else keys.end()
+        if cursor:
+            high = min(high, keys.locate(decode_cursor(cursor)))
+
+        page_keys, more = keys.before(high, low, limit)
+        return {
+            "cases": [{"id": case_id, **cases[case_id]} for _, case_id in page_keys],
+            "next_cursor": encode_cursor(page_keys[-1]) if page_keys and more else None
+        }
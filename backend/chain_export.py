@@ -0,0 +1,156 @@
+"""
+Exportación e importación de la blockchain por streaming
+NDJSON: primera línea con metadatos; luego un bloque por línea
+Binario: BINARY_MAGIC, cabecera JSON y un registro por bloque (codificación de encoding.py),
+cada uno precedido por su longitud
+Uso: python chain_export.py verify <archivo.ndjson[.gz] | archivo.bin[.gz]>
+"""
+
+import gzip
+import io
+import json
+import struct
+import sys
+import zlib
+from typing import BinaryIO, Iterable, Iterator, Union
+
+from blockchain import Block, JudicialBlockchain
+
+EXPORT_FORMAT = "judicial-chain-ndjson"
+EXPORT_VERSION = 1
+GZIP_MAGIC = b"\x1f\x8b"
+BINARY_MAGIC = b"JCHAINB1"
+# Longitud de cada registro de la exportación binaria
+FRAME_HEADER = struct.Struct("<I")
+
+
+def iter_ndjson(blockchain: JudicialBlockchain) -> Iterator[str]:
+    """
+    Genera la exportación línea por línea sin construir la cadena completa en memoria
+    Se exportan los bloques existentes al iniciar; los que se minen después no se incluyen
+    """
+    height = len(blockchain.chain)
+    yield json.dumps(_export_header(blockchain, height)) + "\n"
+
+    for index in range(height):
+        yield blockchain.chain[index].to_json() + "\n"
+
+
+def iter_binary(blockchain: JudicialBlockchain) -> Iterator[bytes]:
+    """Genera la exportación en formato binario, un registro por bloque"""
+    height = len(blockchain.chain)
+    header = json.dumps(_export_header(blockchain, height)).encode()
+    yield BINARY_MAGIC + FRAME_HEADER.pack(len(header)) + header
+
+    for index in range(height):
+        payload = blockchain.chain[index].to_bytes()
+        yield FRAME_HEADER.pack(len(payload)) + payload
+
+
+def _export_header(blockchain: JudicialBlockchain, height: int) -> dict:
+    return {
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "difficulty": blockchain.difficulty,
+        "blocks": height
+    }
+
+
+def gzip_chunks(chunks: Iterable[Union[str, bytes]]) -> Iterator[bytes]:
+    """Comprime al vuelo un flujo de líneas o registros en formato gzip"""
+    compressor = zlib.compressobj(wbits=31)  # 31 = contenedor gzip
+    for data in chunks:
+        if isinstance(data, str):
+            data = data.encode()
+        chunk = compressor.compress(data)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def import_chain(stream: BinaryIO) -> JudicialBlockchain:
+    """
+    Reconstruye y valida una cadena desde una exportación NDJSON o binaria (opcionalmente gzip)
+    Lee bloque a bloque; lanza ValueError ante el primer bloque inválido
+    """
+    if not hasattr(stream, "peek"):
+        stream = io.BufferedReader(stream)
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        stream = io.BufferedReader(gzip.GzipFile(fileobj=stream))
+
+    if stream.peek(len(BINARY_MAGIC))[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+        stream.read(len(BINARY_MAGIC))
+        records = _iter_frames(stream)
+        decode = Block.from_bytes
+    else:
+        records = (line for line in stream if line.strip())
+        decode = lambda line: Block.from_dict(json.loads(line), trusted=True)
+
+    try:
+        header = json.loads(next(records))
+    except StopIteration:
+        raise ValueError("Archivo de exportación vacío")
+    if header.get("format") != EXPORT_FORMAT:
+        raise ValueError("Formato de exportación no reconocido")
+
+    difficulty = header["difficulty"]
+    target = "0" * difficulty
+    blocks = []
+
+    for record in records:
+        block = decode(record)
+
+        if block.index != len(blocks):
+            raise ValueError(f"Bloque #{block.index} fuera de orden")
+        if block.hash != block.calculate_hash():
+            raise ValueError(f"Hash inválido en bloque #{block.index}")
+        # El registro trae su raíz de Merkle: se recalcula para que /proof no sirva pruebas falsas
+        if block.merkle_root != block.calculate_merkle_root():
+            raise ValueError(f"Raíz de Merkle inválida en bloque #{block.index}")
+        if block.has_mutated_merkle_tree():
+            raise ValueError(f"Transacciones duplicadas en el árbol de Merkle del bloque #{block.index}")
+        if blocks and block.previous_hash != blocks[-1].hash:
+            raise ValueError(f"Enlace roto entre bloques #{block.index - 1} y #{block.index}")
+        if blocks and not block.hash.startswith(target):
+            raise ValueError(f"Proof of Work inválido en bloque #{block.index}")
+
+        blocks.append(block)
+
+    if not blocks:
+        raise ValueError("La exportación no contiene bloques")
+    if len(blocks) != header.get("blocks", len(blocks)):
+        raise ValueError("Exportación incompleta: faltan bloques")
+
+    return JudicialBlockchain.from_blocks(blocks, difficulty)
+
+
+def _iter_frames(stream: BinaryIO) -> Iterator[bytes]:
+    """Lee los registros de la exportación binaria (longitud + contenido)"""
+    while True:
+        size = stream.read(FRAME_HEADER.size)
+        if not size:
+            return
+        if len(size) < FRAME_HEADER.size:
+            raise ValueError("Exportación binaria truncada")
+        (length,) = FRAME_HEADER.unpack(size)
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise ValueError("Exportación binaria truncada")
+        yield payload
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "verify":
+        print("Uso: python chain_export.py verify <archivo.ndjson[.gz] | archivo.bin[.gz]>")
+        sys.exit(1)
+
+    with open(sys.argv[2], "rb") as f:
+        try:
+            imported = import_chain(f)
+        except ValueError as e:
+            print(f" Exportación inválida: {e}")
+            sys.exit(1)
+
+    stats = imported.get_statistics()
+    print(f" Exportación válida: {stats['total_blocks']} bloques, "
+          f"{stats['total_transactions']} transacciones")
@@ -0,0 +1,527 @@
+"""
+Servicio de cadena compartido para ejecutar la API con varios procesos
+Un proceso dueño mantiene el CourtSystem (la única copia de la blockchain) y atiende
+a los workers de la API por un socket Unix. Cada worker cachea las lecturas por versión
+del estado y las invalida cuando el dueño anuncia un nuevo hash de la cima
+Uso: python chain_service.py (los workers se inician con el mismo CHAIN_SERVICE_SOCKET)
+"""
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from court_system import CourtSystem, StateSnapshot
+from response_cache import ResponseCache
+from scheduler import CommitTicket
+
+DEFAULT_SOCKET_PATH = "chain_service.sock"
+# Segundos entre reintentos de la suscripción si el dueño no está disponible
+RECONNECT_DELAY = 1.0
+
+# Cabecera de cada trama: tipo (1 byte) y longitud del contenido
+FRAME_HEADER = struct.Struct(">BI")
+FRAME_REQUEST = 1
+FRAME_RESULT = 2
+FRAME_ERROR = 3
+FRAME_CHUNK = 4
+FRAME_END = 5
+FRAME_NOTIFY = 6
+
+# Métodos de CourtSystem que los workers pueden invocar
+EXPOSED_METHODS = frozenset({
+    "create_case", "add_document", "add_document_hash", "schedule_hearing", "issue_judgment",
+    "register_judge", "get_all_cases", "query_cases", "search_cases", "get_case_details",
+    "get_case_history", "get_case_proofs", "get_blocks_page", "verify_document", "verify_document_hash",
+    "verify_documents_bulk", "get_transaction_status", "get_chain_version", "pending_count", "get_statistics",
+    "verify_statistics", "validate_blockchain", "export_blockchain", "export_blockchain_stream",
+})
+# Atributos que se leen sin llamarlos
+EXPOSED_ATTRIBUTES = frozenset({"judges"})
+# Métodos que retornan un iterador: el resultado se envía en tramas CHUNK
+STREAM_METHODS = frozenset({"export_blockchain_stream"})
+
+# Jueces registrados al iniciar la API o el servicio
+DEFAULT_JUDGES = (
+    ("Maria Rodriguez", "civil"),
+    ("Carlos Mendoza", "penal"),
+    ("Ana Lopez", "laboral"),
+)
+
+
+class ChainServiceError(RuntimeError):
+    """Error de comunicación con el servicio de cadena o excepción en el proceso dueño"""
+
+
+def create_court_system() -> CourtSystem:
+    """CourtSystem configurado desde las variables de entorno (API en un proceso o dueño de la cadena)"""
+    # El minado se hace por lotes en segundo plano para no bloquear las peticiones
+    return CourtSystem(
+        difficulty=3,
+        mining_workers=int(os.environ.get('MINING_WORKERS', '1')),
+        batch_size=int(os.environ.get('MINING_BATCH_SIZE', '10')),
+        batch_max_wait=float(os.environ.get('MINING_BATCH_MAX_WAIT', '0.5')),
+        data_dir=os.environ.get('CHAIN_DATA_DIR', 'chain_data'),
+        fsync_every=int(os.environ.get('CHAIN_FSYNC_EVERY', '1')),
+        snapshot_interval=int(os.environ.get('CASES_SNAPSHOT_INTERVAL', '1000'))
+    )
+
+
+def register_default_judges(court_system) -> None:
+    """Registra los jueces por defecto (CourtSystem local o ChainClient)"""
+    for name, specialty in DEFAULT_JUDGES:
+        court_system.register_judge(name, specialty)
+
+
+def state_of(snapshot: StateSnapshot) -> List:
+    """Versión completa del estado: [altura, hash de la cima, versión del registro de jueces]"""
+    return [snapshot.height, snapshot.tip_hash, snapshot.judges_version]
+
+
+def send_frame(sock: socket.socket, kind: int, payload: bytes = b"") -> None:
+    sock.sendall(FRAME_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[int, bytes]]:
+    """Lee una trama; retorna (tipo, contenido) o None si el otro extremo cerró la conexión"""
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    kind, length = FRAME_HEADER.unpack(header)
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        return None
+    return kind, payload
+
+
+def _error_payload(message: str) -> bytes:
+    return json.dumps({"error": message}).encode()
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        self.server.service.serve_connection(self.request)
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class ChainServer:
+    """
+    Proceso dueño de la cadena: atiende a los workers de la API por un socket Unix
+    Cada conexión tiene su hilo; las lecturas usan los snapshots del CourtSystem
+    y las escrituras entran en su cola como las de la API en un solo proceso
+    """
+
+    def __init__(self, court_system: CourtSystem, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.court_system = court_system
+        self.socket_path = socket_path
+        self._notify = threading.Condition()
+        self._state = state_of(court_system.snapshot())
+        self._sequence = 0
+        court_system.snapshot_listeners.append(self._on_snapshot)
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self._server = _UnixServer(socket_path, _RequestHandler)
+        self._server.service = self
+        # Solo el usuario que ejecuta el servicio puede conectarse
+        os.chmod(socket_path, 0o600)
+        self._thread: Optional[threading.Thread] = None
+
+    def _on_snapshot(self, snapshot: StateSnapshot) -> None:
+        """Se llama en el hilo escritor: solo guarda el estado y despierta a los suscriptores"""
+        with self._notify:
+            self._state = state_of(snapshot)
+            self._sequence += 1
+            self._notify.notify_all()
+
+    def serve_connection(self, sock: socket.socket) -> None:
+        """Atiende las peticiones de una conexión hasta que el worker la cierra"""
+        while True:
+            try:
+                frame = recv_frame(sock)
+                if frame is None:
+                    return
+                request = json.loads(frame[1])
+                if request["method"] == "subscribe":
+                    self._stream_notifications(sock)
+                    return
+                self._handle_call(sock, request)
+            except OSError:
+                return
+
+    def _handle_call(self, sock: socket.socket, request: Dict[str, Any]) -> None:
+        method = request["method"]
+        if method not in EXPOSED_METHODS and method not in EXPOSED_ATTRIBUTES:
+            send_frame(sock, FRAME_ERROR, _error_payload(f"Método no disponible: {method}"))
+            return
+
+        before = self.court_system.snapshot()
+        try:
+            if method in EXPOSED_ATTRIBUTES:
+                result = getattr(self.court_system, method)
+            else:
+                result = getattr(self.court_system, method)(*request["args"], **request["kwargs"])
+        except Exception as e:
+            send_frame(sock, FRAME_ERROR, _error_payload(f"{type(e).__name__}: {e}"))
+            return
+
+        if method in STREAM_METHODS:
+            chunks = iter(result)
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    send_frame(sock, FRAME_ERROR, _error_payload(f"{type(e).__name__}: {e}"))
+                    return
+                send_frame(sock, FRAME_CHUNK, chunk.encode() if isinstance(chunk, str) else chunk)
+            send_frame(sock, FRAME_END)
+            return
+
+        after = self.court_system.snapshot()
+        # consistent: el resultado se calculó sobre un único snapshot y se puede cachear con su versión
+        response: Dict[str, Any] = {"state": state_of(after), "consistent": before is after}
+        if isinstance(result, CommitTicket):
+            response["ticket"] = result.transaction_id
+        else:
+            response["result"] = result
+        send_frame(sock, FRAME_RESULT, json.dumps(response).encode())
+
+    def _stream_notifications(self, sock: socket.socket) -> None:
+        """Envía el estado actual y después cada cambio (los intermedios se omiten si el worker va lento)"""
+        sequence = -1
+        while True:
+            with self._notify:
+                self._notify.wait_for(lambda: self._sequence != sequence)
+                sequence, state = self._sequence, self._state
+            send_frame(sock, FRAME_NOTIFY, json.dumps(state).encode())
+
+    def serve_forever(self) -> None:
+        print(f"  Servicio de cadena escuchando en {self.socket_path}")
+        self._server.serve_forever()
+
+    def start(self) -> None:
+        """Atiende las conexiones en un hilo de fondo"""
+        self._thread = threading.Thread(target=self.serve_forever, name="chain-service", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Deja de aceptar conexiones y elimina el socket"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.court_system.snapshot_listeners.remove(self._on_snapshot)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class ChainClient:
+    """
+    Acceso al servicio de cadena desde un worker de la API, con la misma interfaz que CourtSystem
+    Las lecturas que dependen solo del snapshot se cachean por versión del estado; un hilo
+    suscrito a las notificaciones del dueño vacía la cache cuando cambia la cima o los jueces.
+    Sin suscripción activa no se cachea nada
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, cache_entries: int = 1024, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._cache = ResponseCache(cache_entries)
+        self._lock = threading.Lock()
+        # Estado conocido del dueño (altura, hash de la cima, versión de jueces); None sin suscripción
+        self._state: Optional[Tuple[int, str, int]] = None
+        self._subscribed = threading.Event()
+        # Una conexión por hilo; se crean de nuevo tras un fork (p. ej. gunicorn --preload)
+        self._local = threading.local()
+        self._pid: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Conexiones y suscripción
+    # ------------------------------------------------------------------
+
+    def _ensure_process(self) -> None:
+        """En un proceso nuevo descarta las conexiones heredadas e inicia la suscripción"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._local = threading.local()
+            self._state = None
+            self._subscribed = threading.Event()
+            self._cache.clear()
+            threading.Thread(target=self._subscribe_loop, name="chain-notifications", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _connection(self) -> socket.socket:
+        self._ensure_process()
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = self._local.sock = self._connect()
+        return sock
+
+    def _drop_connection(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _advance(self, state: List, subscription: bool = False) -> None:
+        """
+        Adopta un estado más reciente que el conocido y vacía la cache
+        Las publicaciones solo aumentan la altura o la versión de jueces, así que se ordenan por ambas
+        """
+        state = tuple(state)
+        with self._lock:
+            current = self._state
+            if current is None:
+                if not subscription:
+                    return
+            elif (state[0], state[2]) <= (current[0], current[2]):
+                return
+            self._state = state
+            self._cache.clear()
+            if subscription:
+                self._subscribed.set()
+
+    def _subscribe_loop(self) -> None:
+        while True:
+            sock = None
+            try:
+                sock = self._connect()
+                sock.settimeout(None)
+                send_frame(sock, FRAME_REQUEST, json.dumps({"method": "subscribe"}).encode())
+                while True:
+                    frame = recv_frame(sock)
+                    if frame is None:
+                        break
+                    self._advance(json.loads(frame[1]), subscription=True)
+            except OSError:
+                pass
+            finally:
+                if sock is not None:
+                    sock.close()
+                with self._lock:
+                    self._subscribed.clear()
+                    self._state = None
+                    self._cache.clear()
+            time.sleep(RECONNECT_DELAY)
+
+    def wait_until_subscribed(self, timeout: Optional[float] = None) -> bool:
+        """Espera a recibir el estado del dueño; hasta entonces las lecturas no se cachean"""
+        self._ensure_process()
+        return self._subscribed.wait(timeout)
+
+    # ------------------------------------------------------------------
+    # Llamadas remotas
+    # ------------------------------------------------------------------
+
+    def _send(self, method: str, args: tuple, kwargs: Dict[str, Any]) -> socket.socket:
+        payload = json.dumps({"method": method, "args": args, "kwargs": kwargs}).encode()
+        try:
+            sock = self._connection()
+            send_frame(sock, FRAME_REQUEST, payload)
+        except OSError as e:
+            self._drop_connection()
+            raise ChainServiceError(f"Servicio de cadena no disponible: {e}")
+        return sock
+
+    def _receive(self, sock: socket.socket) -> Tuple[int, bytes]:
+        try:
+            frame = recv_frame(sock)
+        except OSError as e:
+            self._drop_connection()
+            raise ChainServiceError(f"Servicio de cadena no disponible: {e}")
+        if frame is None:
+            self._drop_connection()
+            raise ChainServiceError("Servicio de cadena no disponible: conexión cerrada")
+        return frame
+
+    def _call_raw(self, method: str, args: tuple, kwargs: Dict[str, Any], retry: bool) -> Dict[str, Any]:
+        """Invoca un método en el dueño; las lecturas (retry) se reintentan una vez con una conexión nueva"""
+        try:
+            kind, payload = self._receive(self._send(method, args, kwargs))
+        except ChainServiceError:
+            if not retry:
+                raise
+            kind, payload = self._receive(self._send(method, args, kwargs))
+
+        response = json.loads(payload)
+        if kind == FRAME_ERROR:
+            raise ChainServiceError(response["error"])
+        self._advance(response["state"])
+        return response
+
+    def _call(self, method: str, *args, retry: bool = False, **kwargs) -> Any:
+        response = self._call_raw(method, args, kwargs, retry)
+        if "ticket" in response:
+            return CommitTicket(response["ticket"])
+        return response["result"]
+
+    def _cached_call(self, method: str, *args, **kwargs) -> Any:
+        """Lectura que depende solo del snapshot: se sirve de la cache mientras no cambie el estado"""
+        self._ensure_process()
+        key = json.dumps([method, args, kwargs], sort_keys=True)
+        state = self._state
+        if state is not None:
+            entry = self._cache.get(key, "%d:%s:%d" % state)
+            if entry is not None:
+                return entry[0]
+
+        response = self._call_raw(method, args, kwargs, retry=True)
+        state = self._state
+        if state is not None and response["consistent"] and tuple(response["state"]) == state:
+            self._cache.put(key, "%d:%s:%d" % state, (response["result"],))
+        return response["result"]
+
+    # ------------------------------------------------------------------
+    # Interfaz de CourtSystem
+    # ------------------------------------------------------------------
+
+    def get_chain_version(self) -> str:
+        """Versión de la cadena anunciada por el dueño (sin ida y vuelta si hay suscripción)"""
+        self._ensure_process()
+        state = self._state
+        if state is None:
+            return self._call("get_chain_version", retry=True)
+        return f"{state[0]}:{state[1]}"
+
+    @property
+    def judges_version(self) -> int:
+        self._ensure_process()
+        state = self._state
+        if state is None:
+            return self._call_raw("judges", (), {}, retry=True)["state"][2]
+        return state[2]
+
+    @property
+    def judges(self) -> Dict[str, str]:
+        return self._cached_call("judges")
+
+    def get_all_cases(self) -> Dict[str, Dict]:
+        return self._cached_call("get_all_cases")
+
+    def query_cases(self, **kwargs) -> Dict:
+        return self._cached_call("query_cases", **kwargs)
+
+    def search_cases(self, query: str, limit: int = 20) -> Dict:
+        return self._cached_call("search_cases", query, limit)
+
+    def get_case_details(self, case_id: str) -> Optional[Dict]:
+        return self._cached_call("get_case_details", case_id)
+
+    def get_case_history(self, case_id: str) -> List[Dict]:
+        return self._cached_call("get_case_history", case_id)
+
+    def get_case_proofs(self, case_id: str) -> Optional[List[Dict]]:
+        return self._cached_call("get_case_proofs", case_id)
+
+    def get_blocks_page(self, **kwargs) -> Dict:
+        return self._cached_call("get_blocks_page", **kwargs)
+
+    def verify_document_hash(self, case_id: str, doc_hash: str) -> Optional[Dict]:
+        return self._cached_call("verify_document_hash", case_id, doc_hash)
+
+    def verify_document(self, case_id: str, document_content: str) -> Optional[Dict]:
+        return self._call("verify_document", case_id, document_content, retry=True)
+
+    def verify_documents_bulk(self, documents: List[Dict], include_proofs: bool = False) -> List[Dict]:
+        return self._call("verify_documents_bulk", documents, include_proofs, retry=True)
+
+    def get_transaction_status(self, transaction_id: str) -> Optional[Dict]:
+        return self._call("get_transaction_status", transaction_id, retry=True)
+
+    def pending_count(self) -> int:
+        return self._call("pending_count", retry=True)
+
+    def get_statistics(self) -> Dict:
+        return self._call("get_statistics", retry=True)
+
+    def verify_statistics(self) -> Dict:
+        return self._call("verify_statistics", retry=True)
+
+    def validate_blockchain(self, full_audit: bool = False) -> Dict:
+        return self._call("validate_blockchain", full_audit, retry=True)
+
+    def export_blockchain(self) -> Dict:
+        return self._call("export_blockchain", retry=True)
+
+    def export_blockchain_stream(self, compress: bool = False, binary: bool = False) -> Iterator[bytes]:
+        """Reenvía la exportación por streaming del dueño trama a trama"""
+        sock = self._send("export_blockchain_stream", (compress, binary), {})
+        finished = False
+        try:
+            while True:
+                kind, payload = self._receive(sock)
+                if kind == FRAME_END:
+                    finished = True
+                    return
+                if kind == FRAME_ERROR:
+                    finished = True
+                    raise ChainServiceError(json.loads(payload)["error"])
+                yield payload
+        finally:
+            # Si la descarga se interrumpe quedan tramas sin leer: la conexión no se reutiliza
+            if not finished:
+                self._drop_connection()
+
+    def create_case(self, *args, **kwargs):
+        return self._call("create_case", *args, **kwargs)
+
+    def add_document(self, *args, **kwargs):
+        return self._call("add_document", *args, **kwargs)
+
+    def add_document_hash(self, *args, **kwargs):
+        return self._call("add_document_hash", *args, **kwargs)
+
+    def schedule_hearing(self, *args, **kwargs):
+        return self._call("schedule_hearing", *args, **kwargs)
+
+    def issue_judgment(self, *args, **kwargs):
+        return self._call("issue_judgment", *args, **kwargs)
+
+    def register_judge(self, name: str, specialty: str) -> str:
+        return self._call("register_judge", name, specialty)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    court_system = create_court_system()
+    register_default_judges(court_system)
+    server = ChainServer(court_system, os.environ.get('CHAIN_SERVICE_SOCKET', DEFAULT_SOCKET_PATH))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n  Deteniendo el servicio de cadena...")
+    finally:
+        server.close()
+        court_system.close()
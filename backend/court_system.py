@@ -3,28 +3,301 @@ Sistema de Gestión Judicial sobre Blockchain
 Proporciona funcionalidades de alto nivel para gestionar casos judiciales
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union, BinaryIO, Iterator, Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime
 import hashlib
-from blockchain import JudicialBlockchain, JudicialTransaction
+import os
+import threading
+import time
+from blockchain import JudicialBlockchain, JudicialTransaction, Block, FrozenDict
+from scheduler import CommitScheduler, CommitTicket
+from storage import BlockStore
+from projection import CaseProjection, SnapshotStore
+from case_index import CaseIndexView
+from search_index import SearchIndexView
+from shared_table import SharedTableView
+from chain_export import iter_ndjson, iter_binary, gzip_chunks
+
+# Tamaño de bloque al hashear documentos por streaming
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_document_stream(stream: BinaryIO, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Calcula el SHA-256 de un documento leyéndolo por bloques de tamaño fijo
+    La memoria usada no depende del tamaño del archivo
+    """
+    hasher = hashlib.sha256()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class HashingWriter:
+    """
+    Destino de escritura que solo calcula el SHA-256 de lo escrito, sin conservarlo
+    Sirve como archivo de destino de un parser multipart (write y seek)
+    """
+
+    def __init__(self):
+        self._hasher = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._hasher.update(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return 0
+
+    def read(self, size: int = -1) -> bytes:
+        return b""
+
+    def close(self) -> None:
+        pass
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """
+    Vista inmutable del estado en una altura de la cadena
+    El hilo escritor publica una nueva tras cada cambio; los lectores la usan sin locks
+    """
+    height: int
+    tip_hash: str
+    cases: SharedTableView
+    status_counts: FrozenDict
+    statistics: FrozenDict  # Estadísticas de la blockchain en esta altura
+    case_index: CaseIndexView
+    search: SearchIndexView
+    judges: FrozenDict
+    judges_version: int
+
+    @property
+    def version(self) -> str:
+        """Versión de los datos derivados de la cadena: cambia con cada bloque"""
+        return f"{self.height}:{self.tip_hash}"
 
 
 class CourtSystem:
     """
     Sistema de gestión judicial que utiliza blockchain
     Maneja operaciones de casos, documentos, audiencias y sentencias
+
+    Concurrencia: todas las escrituras pasan por la cola del CommitScheduler, cuyo hilo
+    es el único que modifica la cadena, sus índices y la proyección de casos. Tras cada
+    cambio publica un StateSnapshot nuevo; las consultas leen el snapshot vigente
     """
 
-    def __init__(self, difficulty: int = 4):
-        self.blockchain = JudicialBlockchain(difficulty)
-        self.cases: Dict[str, Dict] = {}  # Cache de casos activos
-        self.judges: Dict[str, str] = {}  # Registro de jueces
+    def __init__(
+        self,
+        difficulty: int = 4,
+        mining_workers: int = 1,
+        batch_size: Optional[int] = None,
+        batch_max_wait: float = 1.0,
+        data_dir: Optional[str] = None,
+        fsync_every: int = 1,
+        snapshot_interval: int = 1000
+    ):
+        # Con data_dir los bloques se persisten en disco y la cadena se recarga al iniciar
+        store = BlockStore(data_dir, fsync_every=fsync_every) if data_dir else None
+        self.blockchain = JudicialBlockchain(difficulty, mining_workers, store)
+
+        # Cache de casos: proyección de las transacciones minadas, actualizada por bloque
+        # (solo la modifica el hilo escritor; los lectores usan el snapshot publicado)
+        self.projection = CaseProjection()
+        # Casos creados cuya transacción aún no ha sido minada (partes y juez)
+        self._pending_cases: Dict[str, Dict] = {}
+        # Serializa la entrada a la cola: una transacción se encola después de la creación de su caso
+        self._submit_lock = threading.Lock()
+        self.snapshot_interval = snapshot_interval
+        self.snapshots: Optional[SnapshotStore] = (
+            SnapshotStore(os.path.join(data_dir, "snapshots")) if data_dir else None
+        )
+        self._restore_cases()
+        self._snapshot = StateSnapshot(
+            **self._chain_state(), judges=FrozenDict(), judges_version=0
+        )
+        # Funciones notificadas (en el hilo escritor) cada vez que se publica un snapshot
+        self.snapshot_listeners: List[Callable[[StateSnapshot], None]] = []
+        self.blockchain.block_listeners.append(self._on_block_appended)
+
+        # Pool para hashear documentos en paralelo (hashlib libera el GIL en buffers grandes);
+        # sus hilos se crean al primer uso
+        self._hash_executor = ThreadPoolExecutor(thread_name_prefix="doc-hash")
+
+        # Con batch_size las transacciones se minan por lotes en segundo plano;
+        # sin él se mina un bloque por transacción y se espera su confirmación
+        self.batched = bool(batch_size)
+        self.scheduler = CommitScheduler(
+            self.blockchain,
+            batch_size or 1,
+            batch_max_wait if batch_size else 0.0
+        )
+
+    def _commit(
+        self,
+        transaction: JudicialTransaction,
+        miner_address: str,
+        pending_case: Optional[Dict] = None
+    ) -> Union[bool, CommitTicket]:
+        """
+        Registra una transacción en la blockchain a través de la cola del planificador
+        Con lotes retorna el ticket de confirmación; sin lotes espera a que se mine y retorna True
+        pending_case guarda las partes y el juez de un caso nuevo hasta que su bloque se mine
+        """
+        with self._submit_lock:
+            ticket = self.scheduler.submit(transaction, miner_address)
+            if ticket is None:
+                return False
+            if pending_case is not None:
+                self._pending_cases[transaction.case_id] = pending_case
+
+        if self.batched:
+            return ticket
+
+        ticket.result()
+        return True
+
+    def close(self) -> None:
+        """
+        Mina lo pendiente, detiene el hilo escritor, espera al snapshot que se esté guardando
+        y libera el pool de hashes de documentos, el pool de minado y el log de bloques
+        Los recursos se cierran en orden inverso al de creación
+        """
+        self.scheduler.close()
+        if self.snapshots is not None:
+            self.snapshots.close()
+        self._hash_executor.shutdown()
+        self.blockchain.close()
+
+    def snapshot(self) -> StateSnapshot:
+        """Estado publicado más reciente (inmutable)"""
+        return self._snapshot
+
+    def _publish(self, snapshot: StateSnapshot) -> None:
+        """Publica un snapshot nuevo y avisa a los suscriptores (solo desde el hilo escritor)"""
+        self._snapshot = snapshot
+        for listener in self.snapshot_listeners:
+            listener(snapshot)
+
+    @property
+    def cases(self) -> Mapping[str, Dict]:
+        """Cache de casos activos (derivada de la blockchain)"""
+        return self._snapshot.cases
+
+    @property
+    def status_counts(self) -> Dict[str, int]:
+        """Casos por estado, acumulado"""
+        return self._snapshot.status_counts
+
+    @property
+    def judges(self) -> Dict[str, str]:
+        """Registro de jueces"""
+        return self._snapshot.judges
+
+    @property
+    def judges_version(self) -> int:
+        """Aumenta con cada cambio del registro de jueces"""
+        return self._snapshot.judges_version
+
+    def _chain_state(self) -> Dict[str, Any]:
+        """Campos del snapshot derivados de la cadena (se llama desde el hilo escritor)"""
+        tip = self.blockchain.get_latest_block()
+        statistics = self.blockchain.get_statistics()
+        statistics["case_types"] = FrozenDict(statistics["case_types"])
+        return {
+            "height": tip.index,
+            "tip_hash": tip.hash,
+            "cases": self.projection.cases.publish(),
+            "status_counts": FrozenDict(self.projection.status_counts),
+            "statistics": FrozenDict(statistics),
+            "case_index": self.projection.index.publish(),
+            "search": self.projection.search.publish()
+        }
+
+    def _restore_cases(self) -> None:
+        """
+        Reconstruye la cache de casos: carga el snapshot válido más reciente
+        y reproduce solo los bloques posteriores a su altura
+        """
+        start = time.perf_counter()
+        chain = self.blockchain.chain
+
+        if self.snapshots is not None:
+            for snapshot in self.snapshots.iter_snapshots():
+                height = snapshot["height"]
+                # Un snapshot solo sirve si corresponde a un bloque de esta cadena
+                # (los anteriores al índice de búsqueda no lo incluyen: se reproduce la cadena)
+                if (height < len(chain) and chain[height].hash == snapshot["tip_hash"]
+                        and "search" in snapshot):
+                    self.projection.load_snapshot(snapshot)
+                    break
+
+        replayed = 0
+        for block in chain[self.projection.height + 1:]:
+            self.projection.apply_block(block)
+            replayed += 1
+
+        if len(chain) > 1:
+            elapsed = time.perf_counter() - start
+            print(f"  Casos reconstruidos: {len(self.projection.cases)} (snapshot #{self.projection.height - replayed}, "
+                  f"{replayed} bloques reproducidos en {elapsed:.3f}s)")
+
+    def _on_block_appended(self, block: Block) -> None:
+        """Aplica un bloque recién minado a la cache, publica el snapshot y guarda snapshots periódicos"""
+        self.projection.apply_block(block)
+        # Se publica antes de olvidar los casos pendientes: siempre están en uno de los dos
+        self._publish(replace(self._snapshot, **self._chain_state()))
+        with self._submit_lock:
+            for transaction in block.transactions:
+                if transaction.action == "create_case":
+                    self._pending_cases.pop(transaction.case_id, None)
+
+        # El guardado serializa el snapshot recién publicado en otro hilo
+        if (self.snapshots is not None
+                and block.index - self.snapshots.latest_height() >= self.snapshot_interval):
+            self.snapshots.save_async(self._snapshot)
+
+    def _case_reference(self, case_id: str) -> Optional[Dict]:
+        """Partes y juez de un caso, aunque su creación siga pendiente de minar"""
+        # Primero los pendientes: el escritor publica el snapshot antes de olvidarlos,
+        # así que si ya no están aquí el snapshot vigente los contiene
+        with self._submit_lock:
+            case = self._pending_cases.get(case_id)
+        if case is not None:
+            return case
+        return self._snapshot.cases.get(case_id)
+
+    def verify_case_cache(self) -> bool:
+        """Comprueba que la cache de casos coincide con reproducir la cadena hasta el snapshot"""
+        snapshot = self._snapshot
+        fresh = CaseProjection()
+        for block in self.blockchain.chain[:snapshot.height + 1]:
+            fresh.apply_block(block)
+        return fresh.cases == snapshot.cases and fresh.status_counts == snapshot.status_counts
+
+    def _add_judge(self, judge_id: str, specialty: str) -> None:
+        """Publica el registro de jueces con el nuevo juez (se ejecuta en el hilo escritor)"""
+        snapshot = self._snapshot
+        self._publish(replace(
+            snapshot,
+            judges=FrozenDict({**snapshot.judges, judge_id: specialty}),
+            judges_version=snapshot.judges_version + 1
+        ))
 
     def register_judge(self, name: str, specialty: str) -> str:
         """Registra un juez en el sistema y genera su seudónimo hash"""
         judge_hash = hashlib.sha256(f"{name}_{specialty}".encode()).hexdigest()[:16]
         judge_id = f"Juez_{name.replace(' ', '_')}_{judge_hash}"
-        self.judges[judge_id] = specialty
+        self.scheduler.execute(self._add_judge, judge_id, specialty).result()
         print(f"👨‍⚖️  Juez registrado: {judge_id} (Especialidad: {specialty})")
         return judge_id
 
@@ -41,7 +314,7 @@ class CourtSystem:
         judge_id: str,
         description: str,
         miner_address: str = "Sistema"
-    ) -> bool:
+    ) -> Union[bool, CommitTicket]:
         """
         Crea un nuevo caso judicial en la blockchain
         """
@@ -74,25 +347,14 @@ class CourtSystem:
             timestamp=datetime.now().isoformat()
         )
 
-        # Añadir a blockchain
-        if self.blockchain.add_transaction(transaction):
-            # Minar inmediatamente para confirmación
-            self.blockchain.mine_pending_transactions(miner_address)
-            
-            # Actualizar cache de casos
-            self.cases[case_id] = {
-                "type": case_type,
-                "status": "presentado",
-                "judge": judge_id,
-                "parties": transaction.parties,
-                "created_at": transaction.timestamp,
-                "documents": [],
-                "hearings": [],
-                "judgment": None
-            }
-            
+        # Añadir a blockchain (la cache se actualiza al minarse el bloque)
+        result = self._commit(
+            transaction, miner_address,
+            pending_case={"parties": transaction.parties, "judge": judge_id}
+        )
+        if result:
             print(f"  Caso creado: {case_id} ({case_type})")
-            return True
+            return result
         
         return False
 
@@ -103,23 +365,37 @@ class CourtSystem:
         document_content: str,
         uploader: str,
         miner_address: str = "Sistema"
-    ) -> bool:
+    ) -> Union[bool, CommitTicket]:
         """
         Añade un documento/evidencia a un caso (almacena solo el hash)
         """
-        if case_id not in self.cases:
-            print(f" Caso {case_id} no encontrado")
-            return False
-
         # Generar hash del documento (NO almacenamos contenido real)
         doc_hash = hashlib.sha256(document_content.encode()).hexdigest()
 
+        return self.add_document_hash(case_id, document_name, doc_hash, uploader, miner_address)
+
+    def add_document_hash(
+        self,
+        case_id: str,
+        document_name: str,
+        doc_hash: str,
+        uploader: str,
+        miner_address: str = "Sistema"
+    ) -> Union[bool, CommitTicket]:
+        """
+        Añade un documento a partir de su hash ya calculado (p. ej. con hash_document_stream)
+        """
+        case = self._case_reference(case_id)
+        if case is None:
+            print(f" Caso {case_id} no encontrado")
+            return False
+
         # Crear transacción
         transaction = JudicialTransaction(
             case_id=case_id,
             action="add_document",
-            parties=self.cases[case_id]["parties"],
-            judge=self.cases[case_id]["judge"],
+            parties=case["parties"],
+            judge=case["judge"],
             data={
                 "document_name": document_name,
                 "document_hash": doc_hash,
@@ -129,19 +405,10 @@ class CourtSystem:
             timestamp=datetime.now().isoformat()
         )
 
-        if self.blockchain.add_transaction(transaction):
-            self.blockchain.mine_pending_transactions(miner_address)
-            
-            # Actualizar cache
-            self.cases[case_id]["documents"].append({
-                "name": document_name,
-                "hash": doc_hash,
-                "uploader": uploader,
-                "date": transaction.timestamp
-            })
-            
+        result = self._commit(transaction, miner_address)
+        if result:
             print(f" Documento añadido a {case_id}: {document_name}")
-            return True
+            return result
         
         return False
 
@@ -152,19 +419,20 @@ class CourtSystem:
         date: str,
         location: str,
         miner_address: str = "Sistema"
-    ) -> bool:
+    ) -> Union[bool, CommitTicket]:
         """
         Programa una audiencia para un caso
         """
-        if case_id not in self.cases:
+        case = self._case_reference(case_id)
+        if case is None:
             print(f" Caso {case_id} no encontrado")
             return False
 
         transaction = JudicialTransaction(
             case_id=case_id,
             action="schedule_hearing",
-            parties=self.cases[case_id]["parties"],
-            judge=self.cases[case_id]["judge"],
+            parties=case["parties"],
+            judge=case["judge"],
             data={
                 "hearing_type": hearing_type,
                 "date": date,
@@ -174,22 +442,10 @@ class CourtSystem:
             timestamp=datetime.now().isoformat()
         )
 
-        if self.blockchain.add_transaction(transaction):
-            self.blockchain.mine_pending_transactions(miner_address)
-            
-            # Actualizar cache
-            self.cases[case_id]["hearings"].append({
-                "type": hearing_type,
-                "date": date,
-                "location": location
-            })
-            
-            # Cambiar estado
-            if self.cases[case_id]["status"] == "presentado":
-                self.cases[case_id]["status"] = "en_proceso"
-            
+        result = self._commit(transaction, miner_address)
+        if result:
             print(f" Audiencia programada para {case_id}: {hearing_type} - {date}")
-            return True
+            return result
         
         return False
 
@@ -200,19 +456,20 @@ class CourtSystem:
         verdict: str,
         details: str,
         miner_address: str = "Sistema"
-    ) -> bool:
+    ) -> Union[bool, CommitTicket]:
         """
         Emite una sentencia/fallo para un caso
         """
-        if case_id not in self.cases:
+        case = self._case_reference(case_id)
+        if case is None:
             print(f" Caso {case_id} no encontrado")
             return False
 
         transaction = JudicialTransaction(
             case_id=case_id,
             action="issue_judgment",
-            parties=self.cases[case_id]["parties"],
-            judge=self.cases[case_id]["judge"],
+            parties=case["parties"],
+            judge=case["judge"],
             data={
                 "ruling": ruling,  # a_favor_demandante, a_favor_demandado, mixto
                 "verdict": verdict,
@@ -222,78 +479,216 @@ class CourtSystem:
             timestamp=datetime.now().isoformat()
         )
 
-        if self.blockchain.add_transaction(transaction):
-            self.blockchain.mine_pending_transactions(miner_address)
-            
-            # Actualizar cache
-            self.cases[case_id]["judgment"] = {
-                "ruling": ruling,
-                "verdict": verdict,
-                "details": details,
-                "date": transaction.timestamp
-            }
-            self.cases[case_id]["status"] = "resuelto"
-            
+        result = self._commit(transaction, miner_address)
+        if result:
             print(f"  Sentencia emitida para {case_id}: {ruling}")
-            return True
+            return result
         
         return False
 
     def get_case_details(self, case_id: str) -> Optional[Dict]:
         """Obtiene los detalles completos de un caso"""
-        if case_id not in self.cases:
+        case = self._snapshot.cases.get(case_id)
+        if case is None:
             print(f" Caso {case_id} no encontrado")
-            return None
         
-        return self.cases[case_id]
+        return case
 
     def get_case_history(self, case_id: str) -> List[Dict]:
-        """Obtiene el historial completo de transacciones de un caso"""
-        return self.blockchain.get_case_history(case_id)
+        """Obtiene el historial completo de transacciones de un caso (hasta el snapshot vigente)"""
+        return self.blockchain.get_case_history(case_id, self._snapshot.height)
 
     def verify_document(self, case_id: str, document_content: str) -> Optional[Dict]:
         """
         Verifica si un documento existe en un caso comparando su hash
         """
-        if case_id not in self.cases:
-            return None
-
         doc_hash = hashlib.sha256(document_content.encode()).hexdigest()
+        return self.verify_document_hash(case_id, doc_hash)
+
+    def verify_document_hash(self, case_id: str, doc_hash: str) -> Optional[Dict]:
+        """Verifica un documento de un caso a partir de su hash ya calculado"""
+        snapshot = self._snapshot
+        case = snapshot.cases.get(case_id)
+        if case is None:
+            return None
         
-        for doc in self.cases[case_id]["documents"]:
+        for doc in case["documents"]:
             if doc["hash"] == doc_hash:
                 return {
                     "verified": True,
-                    "document": doc
+                    "document": doc,
+                    "proof": self.blockchain.find_document(case_id, doc_hash, snapshot.height)
                 }
         
         return {"verified": False}
 
+    def verify_documents_bulk(self, documents: List[Dict], include_proofs: bool = False) -> List[Dict]:
+        """
+        Verifica muchos documentos en una sola llamada usando el índice global de hashes
+        Cada elemento trae 'document_content' o 'document_hash' (texto) y opcionalmente 'case_id'
+        Todos se responden en la altura del snapshot vigente al empezar
+        """
+        height = self._snapshot.height
+        to_hash = [doc["document_content"] for doc in documents if not doc.get("document_hash")]
+        if to_hash:
+            hashed = iter(self._hash_executor.map(
+                lambda content: hashlib.sha256(content.encode()).hexdigest(), to_hash
+            ))
+
+        results = []
+        for doc in documents:
+            doc_hash = doc.get("document_hash") or next(hashed)
+            locations = self.blockchain.locate_document(doc_hash, height)
+            if doc.get("case_id"):
+                locations = [loc for loc in locations if loc["case_id"] == doc["case_id"]]
+            if include_proofs:
+                for location in locations:
+                    location["proof"] = self.blockchain.get_transaction_proof(
+                        location["block_index"], location["position"]
+                    )
+
+            results.append({
+                "document_hash": doc_hash,
+                "verified": bool(locations),
+                "locations": locations
+            })
+
+        return results
+
+    def get_case_proofs(self, case_id: str) -> Optional[List[Dict]]:
+        """Obtiene las pruebas de inclusión Merkle de todas las transacciones de un caso"""
+        snapshot = self._snapshot
+        if case_id not in snapshot.cases:
+            return None
+
+        return self.blockchain.get_case_proofs(case_id, snapshot.height)
+
+    def get_transaction_status(self, transaction_id: str) -> Optional[Dict]:
+        """
+        Obtiene el estado de una transacción: pending, mined (con su bloque) o failed
+        """
+        status = self.scheduler.get_status(transaction_id)
+        if status is not None:
+            return status
+
+        location = self.blockchain.find_transaction(transaction_id, self._snapshot.height)
+        if location is None:
+            return None
+
+        return {
+            "transaction_id": transaction_id,
+            "status": "mined",
+            "block_index": location["block_index"]
+        }
+
     def get_all_cases(self) -> Dict[str, Dict]:
-        """Retorna todos los casos del sistema"""
-        return self.cases
+        """Retorna todos los casos del sistema (de solo lectura, en orden de alta)"""
+        return self._snapshot.cases.to_dict()
+
+    def query_cases(
+        self,
+        case_type: Optional[str] = None,
+        status: Optional[str] = None,
+        judge: Optional[str] = None,
+        from_time: Optional[str] = None,
+        to_time: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict:
+        """
+        Página de casos filtrados por tipo, estado, juez y rango de fecha de creación,
+        del más reciente al más antiguo. Usa los índices secundarios del snapshot vigente,
+        así que el costo depende del tamaño de la página y no del total de casos
+        Lanza ValueError si el cursor no es válido
+        """
+        snapshot = self._snapshot
+        return snapshot.case_index.query(
+            snapshot.cases,
+            filters={"type": case_type, "status": status, "judge": judge},
+            from_time=from_time,
+            to_time=to_time,
+            cursor=cursor,
+            limit=limit
+        )
+
+    def search_cases(self, query: str, limit: int = 20) -> Dict:
+        """
+        Búsqueda de texto completo en descripciones, sentencias y nombres de documentos
+        Retorna los casos del snapshot vigente que contienen todos los términos, por relevancia
+        """
+        snapshot = self._snapshot
+        return snapshot.search.search(query, snapshot.cases, limit=limit)
+
+    def get_chain_version(self) -> str:
+        """Versión de los datos derivados de la cadena: cambia cada vez que se añade un bloque"""
+        return self._snapshot.version
+
+    def get_blocks_page(self, **kwargs) -> Dict:
+        """Página de bloques de la cadena vista por el snapshot vigente (ver JudicialBlockchain.get_blocks_page)"""
+        return self.blockchain.get_blocks_page(height=self._snapshot.height, **kwargs)
+
+    def pending_count(self) -> int:
+        """Transacciones aceptadas que aún no están en un bloque"""
+        return len(self.blockchain.pending_transactions) + self.scheduler.pending_count()
 
     def get_statistics(self) -> Dict:
         """Obtiene estadísticas del sistema judicial"""
-        blockchain_stats = self.blockchain.get_statistics()
+        snapshot = self._snapshot
+        blockchain_stats = dict(snapshot.statistics)
+        blockchain_stats["pending_transactions"] = self.pending_count()
         
-        # Estadísticas de casos
+        return {
+            **blockchain_stats,
+            "total_cases": len(snapshot.cases),
+            "total_judges": len(snapshot.judges),
+            "cases_by_status": dict(snapshot.status_counts)
+        }
+
+    def verify_statistics(self) -> Dict:
+        """
+        Compara los contadores acumulados del snapshot vigente con un recálculo completo
+        Retorna los campos que no coinciden (vacío si todo es consistente)
+        """
+        snapshot = self._snapshot
+        current = dict(snapshot.statistics)
+        recomputed = self.blockchain.compute_statistics(snapshot.height)
+        # Las pendientes no forman parte del snapshot
+        current["pending_transactions"] = recomputed["pending_transactions"]
+
         status_count = {}
-        for case in self.cases.values():
+        for case in snapshot.cases.values():
             status = case["status"]
             status_count[status] = status_count.get(status, 0) + 1
-        
+        current["cases_by_status"] = dict(snapshot.status_counts)
+        recomputed["cases_by_status"] = status_count
+
+        mismatches = {
+            key: {"counter": current[key], "recomputed": recomputed[key]}
+            for key in recomputed
+            if current[key] != recomputed[key]
+        }
+
         return {
-            **blockchain_stats,
-            "total_cases": len(self.cases),
-            "total_judges": len(self.judges),
-            "cases_by_status": status_count
+            "consistent": not mismatches,
+            "mismatches": mismatches
         }
 
     def verify_blockchain_integrity(self) -> bool:
         """Verifica la integridad de la blockchain"""
         return self.blockchain.is_chain_valid()
 
+    def validate_blockchain(self, full_audit: bool = False) -> Dict:
+        """Valida la blockchain de forma incremental (o completa) y retorna el reporte"""
+        return self.blockchain.validate_chain(full_audit)
+
     def export_blockchain(self) -> Dict:
         """Exporta la blockchain completa"""
         return self.blockchain.to_dict()
+
+    def export_blockchain_stream(self, compress: bool = False, binary: bool = False) -> Iterator:
+        """
+        Exporta la blockchain como NDJSON (un bloque por línea) sin construirla en memoria
+        Con binary=True usa la codificación binaria; con compress=True se comprime con gzip al vuelo
+        """
+        chunks = iter_binary(self.blockchain) if binary else iter_ndjson(self.blockchain)
+        return gzip_chunks(chunks) if compress else chunks
@@ -0,0 +1,76 @@
+"""
+Acceso a PostgreSQL mediante un pool de conexiones compartido
+Las conexiones se abren una vez y se reutilizan entre peticiones
+"""
+
+import atexit
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import psycopg
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
+
+# Configuración de base de datos
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'dbname': os.environ.get('DB_NAME', 'judicial_blockchain'),
+    'user': os.environ.get('DB_USER', 'postgres'),
+    'password': os.environ.get('DB_PASSWORD', 'postgres'),
+    'port': os.environ.get('DB_PORT', '5432')
+}
+
+# Tamaño del pool y espera máxima (segundos) para obtener una conexión
+POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '2'))
+POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '5'))
+# Las conexiones inactivas más tiempo que esto se cierran (el pool no baja de POOL_MIN_SIZE)
+POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', '300'))
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Retorna el pool compartido, creándolo en el primer uso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                kwargs={**DB_CONFIG, 'row_factory': dict_row},
+                min_size=POOL_MIN_SIZE,
+                max_size=POOL_MAX_SIZE,
+                timeout=POOL_TIMEOUT,
+                max_idle=POOL_MAX_IDLE,
+                # Comprueba cada conexión al entregarla y descarta las caídas
+                check=ConnectionPool.check_connection,
+                name='judicial-db',
+                open=True
+            )
+        return _pool
+
+
+@contextmanager
+def db_connection() -> Iterator[psycopg.Connection]:
+    """
+    Toma una conexión del pool durante el bloque with
+    Al salir hace commit (o rollback si hubo excepción) y la devuelve al pool,
+    también en los caminos de error. Lanza psycopg_pool.PoolTimeout (un psycopg.Error)
+    si no hay conexión disponible a tiempo
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def close_pool() -> None:
+    """Cierra todas las conexiones del pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(close_pool)
@@ -0,0 +1,377 @@
+"""
+Codificación binaria canónica de transacciones y bloques
+Campos en orden fijo con prefijo de longitud (varint); reemplaza a json.dumps(sort_keys=True)
+como entrada del hash (bloques v4) y como formato del log de bloques y de la exportación binaria
+"""
+
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+# Versión del formato binario; se escribe tras BLOCK_MAGIC en cada bloque codificado
+ENCODING_VERSION = 1
+# Primer byte de un bloque codificado (un registro JSON siempre empieza por '{')
+BLOCK_MAGIC = b"\xb1"
+
+# Etiquetas de tipo para los valores libres de 'parties' y 'data'
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_NEG_INT = 4
+TAG_FLOAT = 5
+TAG_STR = 6
+TAG_LIST = 7
+TAG_DICT = 8
+
+FLOAT = struct.Struct(">d")
+
+# Campos de una transacción en el orden en que se codifican
+TRANSACTION_FIELDS = ("case_id", "action", "parties", "judge", "data", "timestamp")
+
+
+def _write_uint(out: bytearray, value: int) -> None:
+    """Entero sin signo en formato varint (7 bits por byte, LEB128)"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    data = value.encode()
+    length = len(data)
+    if length < 0x80:
+        out.append(length)
+    else:
+        _write_uint(out, length)
+    out += data
+
+
+def _write_value(out: bytearray, value: Any) -> None:
+    """Valor JSON con etiqueta de tipo; los diccionarios se escriben con claves ordenadas"""
+    if isinstance(value, str):
+        out.append(TAG_STR)
+        _write_str(out, value)
+    elif value is None:
+        out.append(TAG_NONE)
+    elif value is True:
+        out.append(TAG_TRUE)
+    elif value is False:
+        out.append(TAG_FALSE)
+    elif isinstance(value, int):
+        if value >= 0:
+            out.append(TAG_INT)
+            _write_uint(out, value)
+        else:
+            out.append(TAG_NEG_INT)
+            _write_uint(out, -value)
+    elif isinstance(value, float):
+        out.append(TAG_FLOAT)
+        out += FLOAT.pack(value)
+    elif isinstance(value, dict):
+        out.append(TAG_DICT)
+        _write_map(out, value)
+    elif isinstance(value, (list, tuple)):
+        out.append(TAG_LIST)
+        _write_uint(out, len(value))
+        for item in value:
+            _write_value(out, item)
+    else:
+        raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def _write_map(out: bytearray, mapping: Dict[str, Any]) -> None:
+    _write_uint(out, len(mapping))
+    for key in sorted(mapping):
+        _write_str(out, key)
+        _write_value(out, mapping[key])
+
+
+def _write_transaction(out: bytearray, transaction) -> None:
+    """Campos de la transacción en orden fijo: case_id, action, parties, judge, data, timestamp"""
+    _write_str(out, transaction.case_id)
+    _write_str(out, transaction.action)
+    _write_map(out, transaction.parties)
+    _write_str(out, transaction.judge)
+    _write_map(out, transaction.data)
+    _write_str(out, transaction.timestamp)
+
+
+def encode_transaction(transaction) -> bytes:
+    """Codificación canónica de una JudicialTransaction (hoja del árbol de Merkle v4)"""
+    out = bytearray()
+    _write_transaction(out, transaction)
+    return bytes(out)
+
+
+def encode_block_header(
+    version: int,
+    index: int,
+    previous_hash: str,
+    timestamp: str,
+    merkle_root: str,
+    leaf_count: Optional[int] = None
+) -> bytes:
+    """
+    Cabecera fija de un bloque v4/v5 (todo excepto el nonce)
+    Todos los campos tienen prefijo de longitud, así que el nonce puede ir a continuación.
+    Los bloques v5 incluyen además el número de hojas del árbol de Merkle
+    """
+    out = bytearray()
+    _write_uint(out, version)
+    _write_uint(out, index)
+    _write_str(out, previous_hash)
+    _write_str(out, timestamp)
+    _write_str(out, merkle_root)
+    if leaf_count is not None:
+        _write_uint(out, leaf_count)
+    return bytes(out)
+
+
+def encode_block(block) -> bytes:
+    """Codifica un bloque completo (cabecera, hash y transacciones) para disco o exportación"""
+    out = bytearray(BLOCK_MAGIC)
+    out.append(ENCODING_VERSION)
+    _write_uint(out, block.version)
+    _write_uint(out, block.index)
+    _write_str(out, block.previous_hash)
+    _write_str(out, block.timestamp)
+    _write_uint(out, block.nonce)
+    _write_str(out, block.merkle_root)
+    _write_str(out, block.hash)
+    _write_uint(out, len(block.transactions))
+    for transaction in block.transactions:
+        _write_transaction(out, transaction)
+    return bytes(out)
+
+
+def _read_uint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Lee un varint; retorna (valor, posición siguiente)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _read_str(data: bytes, pos: int) -> Tuple[str, int]:
+    length = data[pos]
+    if length < 0x80:
+        pos += 1
+    else:
+        length, pos = _read_uint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise ValueError("Registro binario truncado")
+    return data[pos:end].decode(), end
+
+
+def _read_value(data: bytes, pos: int) -> Tuple[Any, int]:
+    tag = data[pos]
+    pos += 1
+    if tag == TAG_STR:
+        return _read_str(data, pos)
+    if tag == TAG_NONE:
+        return None, pos
+    if tag == TAG_TRUE:
+        return True, pos
+    if tag == TAG_FALSE:
+        return False, pos
+    if tag == TAG_INT:
+        return _read_uint(data, pos)
+    if tag == TAG_NEG_INT:
+        value, pos = _read_uint(data, pos)
+        return -value, pos
+    if tag == TAG_FLOAT:
+        return FLOAT.unpack_from(data, pos)[0], pos + FLOAT.size
+    if tag == TAG_DICT:
+        return _read_map(data, pos)
+    if tag == TAG_LIST:
+        count, pos = _read_uint(data, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _read_value(data, pos)
+            items.append(item)
+        return items, pos
+    raise ValueError(f"Etiqueta de tipo desconocida: {tag}")
+
+
+def _read_map(data: bytes, pos: int) -> Tuple[Dict[str, Any], int]:
+    count = data[pos]
+    if count < 0x80:
+        pos += 1
+    else:
+        count, pos = _read_uint(data, pos)
+    result = {}
+    # Los textos cortos se leen en línea: es el caso habitual y evita una llamada por campo
+    for _ in range(count):
+        length = data[pos]
+        if length < 0x80:
+            end = pos + 1 + length
+            key = data[pos + 1:end].decode()
+            pos = end
+        else:
+            key, pos = _read_str(data, pos)
+
+        if data[pos] == TAG_STR and data[pos + 1] < 0x80:
+            end = pos + 2 + data[pos + 1]
+            result[key] = data[pos + 2:end].decode()
+            pos = end
+        else:
+            result[key], pos = _read_value(data, pos)
+
+    if pos > len(data):
+        raise ValueError("Registro binario truncado")
+    return result, pos
+
+
+def _read_transaction(data: bytes, pos: int) -> Tuple[Tuple, int]:
+    case_id, pos = _read_str(data, pos)
+    action, pos = _read_str(data, pos)
+    parties, pos = _read_map(data, pos)
+    judge, pos = _read_str(data, pos)
+    transaction_data, pos = _read_map(data, pos)
+    timestamp, pos = _read_str(data, pos)
+    return (case_id, action, parties, judge, transaction_data, timestamp), pos
+
+
+def _read_ascii_map(data: bytes, text: str, pos: int) -> Tuple[Dict[str, Any], int]:
+    """_read_map para registros sin bytes >= 0x80: longitudes de un byte y textos cortados de text"""
+    count = data[pos]
+    pos += 1
+    result = {}
+    for _ in range(count):
+        end = pos + 1 + data[pos]
+        key = text[pos + 1:end]
+        if data[end] == TAG_STR:
+            pos = end + 2 + data[end + 1]
+            result[key] = text[end + 2:pos]
+        else:
+            result[key], pos = _read_value(data, end)
+    return result, pos
+
+
+def _read_transactions(data: bytes, pos: int, count: int) -> List[Tuple]:
+    """
+    Transacciones como tuplas (case_id, action, parties, judge, data, timestamp, codificación)
+    La codificación es el segmento del registro que ocupa la transacción
+    """
+    transactions = []
+    if not data[pos:].isascii():
+        for _ in range(count):
+            start = pos
+            fields, pos = _read_transaction(data, pos)
+            transactions.append(fields + (data[start:pos],))
+        return transactions
+
+    # Sin bytes >= 0x80 todo varint ocupa un byte y cada texto es ASCII: se cortan de una
+    # única decodificación del registro (latin-1 conserva las posiciones) en lugar de uno a uno
+    text = data.decode("latin-1")
+    for _ in range(count):
+        start = pos
+        end = pos + 1 + data[pos]
+        case_id = text[pos + 1:end]
+        pos = end + 1 + data[end]
+        action = text[end + 1:pos]
+        parties, pos = _read_ascii_map(data, text, pos)
+        end = pos + 1 + data[pos]
+        judge = text[pos + 1:end]
+        transaction_data, pos = _read_ascii_map(data, text, end)
+        end = pos + 1 + data[pos]
+        timestamp = text[pos + 1:end]
+        pos = end
+        transactions.append((
+            case_id, action, parties, judge, transaction_data, timestamp, data[start:pos]
+        ))
+    if pos > len(data):
+        raise ValueError("Registro binario truncado")
+    return transactions
+
+
+def _read_header(data: bytes, pos: int) -> Tuple[Dict[str, Any], int]:
+    """Campos de la cabecera de un bloque y número de transacciones; retorna (cabecera, posición)"""
+    version, pos = _read_uint(data, pos)
+    index, pos = _read_uint(data, pos)
+    previous_hash, pos = _read_str(data, pos)
+    timestamp, pos = _read_str(data, pos)
+    nonce, pos = _read_uint(data, pos)
+    merkle_root, pos = _read_str(data, pos)
+    block_hash, pos = _read_str(data, pos)
+    count, pos = _read_uint(data, pos)
+    return {
+        "index": index,
+        "previous_hash": previous_hash,
+        "timestamp": timestamp,
+        "nonce": nonce,
+        "version": version,
+        "merkle_root": merkle_root,
+        "hash": block_hash,
+        "transaction_count": count
+    }, pos
+
+
+def _read_block(data: bytes, pos: int) -> Dict[str, Any]:
+    header, pos = _read_header(data, pos)
+    header["transactions"] = [
+        dict(zip(TRANSACTION_FIELDS, transaction))
+        for transaction in _read_transactions(data, pos, header.pop("transaction_count"))
+    ]
+    return header
+
+
+def decode_transaction(data: bytes) -> Dict[str, Any]:
+    """Decodifica una transacción al mismo diccionario que JudicialTransaction.to_dict()"""
+    return dict(zip(TRANSACTION_FIELDS, _read_transaction(data, 0)[0]))
+
+
+def _check_magic(data: bytes, offset: int) -> None:
+    if data[offset:offset + 1] != BLOCK_MAGIC:
+        raise ValueError("No es un bloque en formato binario")
+    if data[offset + 1] != ENCODING_VERSION:
+        raise ValueError(f"Versión de codificación no soportada: {data[offset + 1]}")
+
+
+def decode_block(data: bytes) -> Dict[str, Any]:
+    """
+    Decodifica un bloque al mismo diccionario que Block.to_dict()
+    Lanza ValueError si no es un bloque binario o su versión de formato no es soportada
+    """
+    _check_magic(data, 0)
+    try:
+        return _read_block(data, 2)
+    except (IndexError, struct.error):
+        raise ValueError("Registro binario truncado")
+
+
+def decode_block_header(data: bytes, offset: int = 0) -> Dict[str, Any]:
+    """
+    Decodifica solo la cabecera de un bloque (con 'transaction_count' en lugar de las transacciones)
+    data puede ser un mmap: se leen únicamente los bytes de la cabecera a partir de offset
+    """
+    _check_magic(data, offset)
+    try:
+        return _read_header(data, offset + 2)[0]
+    except (IndexError, struct.error):
+        raise ValueError("Registro binario truncado")
+
+
+def decode_block_transactions(data: bytes) -> List[Tuple]:
+    """
+    Transacciones de un bloque como tuplas de sus campos (TRANSACTION_FIELDS) más su codificación,
+    sin construir los diccionarios de decode_block
+    """
+    _check_magic(data, 0)
+    try:
+        header, pos = _read_header(data, 2)
+        return _read_transactions(data, pos, header["transaction_count"])
+    except (IndexError, struct.error):
+        raise ValueError("Registro binario truncado")
+
+
+def is_binary_block(data: bytes) -> bool:
+    """Distingue un bloque binario de un registro JSON antiguo"""
+    return data[:1] == BLOCK_MAGIC
@@ -0,0 +1,106 @@
+"""
+Árbol de Merkle sobre las transacciones de un bloque
+Permite generar y verificar pruebas de inclusión de tamaño O(log n)
+"""
+
+import hashlib
+from typing import List, Dict
+
+# Prefijos de dominio para que una hoja nunca pueda hacerse pasar por un nodo interno
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def hash_leaf(data: bytes) -> bytes:
+    """Hash SHA-256 de una hoja (transacción serializada)"""
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    """Hash SHA-256 de un nodo interno a partir de sus dos hijos"""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_levels(leaves: List[bytes], carry_odd: bool = False) -> List[List[bytes]]:
+    """
+    Construye todos los niveles del árbol, desde las hojas hasta la raíz
+    Si un nivel tiene cantidad impar de nodos, el último sube sin pareja (carry_odd)
+    o se combina consigo mismo (bloques anteriores a v5)
+    """
+    if not leaves:
+        return [[hashlib.sha256(b"").digest()]]
+
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        next_level = []
+        for i in range(0, len(current), 2):
+            left = current[i]
+            if i + 1 < len(current):
+                next_level.append(hash_node(left, current[i + 1]))
+            elif carry_odd:
+                next_level.append(left)
+            else:
+                next_level.append(hash_node(left, left))
+        levels.append(next_level)
+
+    return levels
+
+
+def has_duplicate_pair(levels: List[List[bytes]]) -> bool:
+    """
+    Indica si algún nivel combina dos nodos iguales
+    Al duplicar el nodo impar, [a, b, c] y [a, b, c, c] tienen la misma raíz (CVE-2012-2459):
+    un árbol con un par repetido se rechaza en lugar de aceptarse como el mismo bloque
+    """
+    for level in levels[:-1]:
+        for i in range(0, len(level) - 1, 2):
+            if level[i] == level[i + 1]:
+                return True
+    return False
+
+
+def merkle_root(leaves: List[bytes], carry_odd: bool = False) -> str:
+    """Calcula la raíz de Merkle (hex) de una lista de hojas ya hasheadas"""
+    return build_levels(leaves, carry_odd)[-1][0].hex()
+
+
+def build_proof(levels: List[List[bytes]], position: int) -> List[Dict[str, str]]:
+    """
+    Genera la prueba de inclusión de la hoja en 'position'
+    Cada paso indica el hash hermano y de qué lado se concatena.
+    Un nodo que subió sin pareja no añade paso
+    """
+    proof = []
+    index = position
+
+    for level, parent in zip(levels, levels[1:]):
+        if index % 2 == 0:
+            if index + 1 < len(level):
+                proof.append({"hash": level[index + 1].hex(), "position": "right"})
+            elif parent[index // 2] != level[index]:
+                # Nodo impar combinado consigo mismo (árbol anterior a v5)
+                proof.append({"hash": level[index].hex(), "position": "right"})
+        else:
+            proof.append({"hash": level[index - 1].hex(), "position": "left"})
+        index //= 2
+
+    return proof
+
+
+def verify_proof(leaf_data: bytes, proof: List[Dict[str, str]], root: str) -> bool:
+    """
+    Verifica una prueba de inclusión sin necesidad del bloque completo
+    leaf_data es la transacción serializada según el leaf_encoding de la prueba:
+    JudicialTransaction.to_json() ("json") o JudicialTransaction.to_bytes() ("binary")
+    """
+    current = hash_leaf(leaf_data)
+
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        if step["position"] == "left":
+            current = hash_node(sibling, current)
+        else:
+            current = hash_node(current, sibling)
+
+    return current.hex() == root
@@ -0,0 +1,83 @@
+"""
+Minado paralelo de Proof of Work
+Reparte el espacio de nonces entre varios procesos y detiene a todos
+en cuanto uno encuentra un hash válido
+"""
+
+import hashlib
+import multiprocessing
+from typing import Optional, Tuple
+
+# Cada cuántos intentos revisa un proceso si otro ya encontró el nonce
+STOP_CHECK_INTERVAL = 2048
+
+_stop_event = None
+
+
+def _init_worker(stop_event) -> None:
+    """Inicializa cada proceso del pool con el evento de parada compartido"""
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _search_nonces(args: Tuple[bytes, str, int, int]) -> Optional[Tuple[int, str]]:
+    """
+    Busca un nonce válido recorriendo start, start + step, start + 2*step, ...
+    Retorna (nonce, hash) o None si otro proceso terminó primero
+    """
+    prefix, target, nonce, step = args
+    midstate = hashlib.sha256(prefix)
+
+    while True:
+        for _ in range(STOP_CHECK_INTERVAL):
+            hasher = midstate.copy()
+            hasher.update(str(nonce).encode())
+            block_hash = hasher.hexdigest()
+            if block_hash.startswith(target):
+                _stop_event.set()
+                return nonce, block_hash
+            nonce += step
+
+        if _stop_event.is_set():
+            return None
+
+
+class ParallelMiner:
+    """
+    Pool de procesos persistente para Proof of Work
+    Se crea una vez y se reutiliza para cada bloque minado
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._stop_event = multiprocessing.Event()
+        self._pool = multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(self._stop_event,)
+        )
+
+    def search(self, prefix: bytes, target: str, start_nonce: int) -> Tuple[int, str]:
+        """
+        Reparte los nonces a partir de start_nonce entre todos los procesos
+        Retorna el primer (nonce, hash) válido encontrado
+        """
+        self._stop_event.clear()
+        tasks = [
+            (prefix, target, start_nonce + offset, self.workers)
+            for offset in range(self.workers)
+        ]
+
+        found = None
+        # Se consumen todos los resultados para que ningún proceso siga minando
+        for result in self._pool.imap_unordered(_search_nonces, tasks):
+            if result is not None and found is None:
+                found = result
+
+        return found
+
+    def close(self) -> None:
+        """Detiene los procesos del pool"""
+        self._stop_event.set()
+        self._pool.terminate()
+        self._pool.join()
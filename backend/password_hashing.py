@@ -0,0 +1,134 @@
+"""
+Hash y verificación de contraseñas fuera de los hilos de petición
+scrypt consume decenas de milisegundos de CPU por llamada a propósito; se ejecuta
+en un pool de procesos con cola acotada y límite de operaciones simultáneas por usuario
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+# Parámetros de hash vigentes (formato de Werkzeug: método:parámetros)
+DEFAULT_HASH_METHOD = "scrypt:32768:8:1"
+
+
+class HashingBusy(Exception):
+    """La cola del pool de hashing está llena"""
+
+
+class TooManyAttempts(Exception):
+    """El usuario ya tiene el máximo de operaciones de contraseña en curso"""
+
+
+def hash_parameters(password_hash: str) -> str:
+    """Método y parámetros con que se generó un hash ('scrypt:32768:8:1', 'pbkdf2:sha256:600000'...)"""
+    return password_hash.split("$", 1)[0]
+
+
+def normalize_method(method: str) -> str:
+    """
+    Método con todos sus parámetros, como Werkzeug lo escribe en el hash:
+    'scrypt' -> 'scrypt:32768:8:1', 'pbkdf2' -> 'pbkdf2:sha256:600000'
+    Lanza ValueError si un parámetro numérico no es válido
+    """
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n = int(args[0]) if args else 2 ** 15
+        r = int(args[1]) if len(args) > 1 else 8
+        p = int(args[2]) if len(args) > 2 else 1
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    return method
+
+
+class PasswordHasher:
+    """
+    Ejecuta generate/check_password_hash en un pool de procesos
+    max_pending acota las operaciones en cola o en curso; per_user_limit las de un mismo usuario
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: int = 64,
+        per_user_limit: int = 2,
+        queue_timeout: float = 2.0,
+        method: str = DEFAULT_HASH_METHOD
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.per_user_limit = per_user_limit
+        self.queue_timeout = queue_timeout
+        self.method = method
+        self._normalized_method = normalize_method(method)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._user_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # forkserver: el servidor ya tiene hilos (pool de conexiones, escritor de la cadena)
+                # y un fork podría heredar sus locks tomados
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("forkserver")
+                )
+            return self._executor
+
+    def _run(self, user_key: str, function, *args):
+        """Ejecuta la función en el pool respetando los límites de cola y de usuario"""
+        with self._lock:
+            if self._user_counts.get(user_key, 0) >= self.per_user_limit:
+                raise TooManyAttempts(user_key)
+            self._user_counts[user_key] = self._user_counts.get(user_key, 0) + 1
+
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                raise HashingBusy()
+            try:
+                return self._get_executor().submit(function, *args).result()
+            finally:
+                self._slots.release()
+        finally:
+            with self._lock:
+                self._user_counts[user_key] -= 1
+                if not self._user_counts[user_key]:
+                    del self._user_counts[user_key]
+
+    def generate(self, user_key: str, password: str) -> str:
+        """Genera el hash de una contraseña con los parámetros vigentes"""
+        return self._run(user_key, generate_password_hash, password, self.method)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Indica si el hash se generó con parámetros distintos de los vigentes (ya normalizados)"""
+        try:
+            return normalize_method(hash_parameters(password_hash)) != self._normalized_method
+        except ValueError:
+            return True
+
+    def verify(self, user_key: str, password_hash: str, password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica la contraseña y, si es correcta pero el hash usa parámetros antiguos,
+        retorna también el hash nuevo para guardarlo: (válida, hash_nuevo o None)
+        """
+        if not self._run(user_key, check_password_hash, password_hash, password):
+            return False, None
+        if self.needs_rehash(password_hash):
+            return True, self.generate(user_key, password)
+        return True, None
+
+    def close(self) -> None:
+        """Detiene el pool de procesos"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
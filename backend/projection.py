@@ -0,0 +1,223 @@
+"""
+Proyección del estado de los casos a partir de las transacciones de la blockchain
+Incluye snapshots periódicos para no tener que reproducir toda la cadena al iniciar
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional
+
+from blockchain import Block, JudicialTransaction
+from case_index import CaseIndex
+from shared_table import SharedTable
+from search_index import SearchIndex
+
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".json"
+
+
+class CaseProjection:
+    """
+    Estado derivado de los casos (estado, documentos, audiencias, sentencia)
+    Se construye aplicando en orden las transacciones de los bloques
+    Un caso nunca se modifica en su lugar: cada cambio reemplaza su diccionario,
+    así que las copias publicadas para los lectores no cambian después
+    Todo reemplazo pasa por _store para mantener los índices secundarios
+    """
+
+    def __init__(self):
+        self.cases = SharedTable()
+        self.status_counts: Dict[str, int] = {}  # Casos por estado, acumulado
+        self.height = 0  # Índice del último bloque aplicado
+        self.index = CaseIndex()
+        self.search = SearchIndex()
+
+    def _store(self, case_id: str, case: Dict) -> None:
+        """Reemplaza el diccionario de un caso y actualiza los índices"""
+        self.index.update(case_id, self.cases.get(case_id), case)
+        self.cases[case_id] = case
+
+    def set_status(self, case_id: str, status: Optional[str]) -> None:
+        """
+        Cambia el estado de un caso manteniendo el contador de casos por estado
+        Con status None el caso deja de contarse (p. ej. antes de reemplazarlo)
+        """
+        previous = self.cases[case_id].get("status")
+        if previous == status:
+            return
+
+        if previous is not None:
+            self.status_counts[previous] -= 1
+            if not self.status_counts[previous]:
+                del self.status_counts[previous]
+        if status is not None:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        self._store(case_id, {**self.cases[case_id], "status": status})
+
+    def apply_transaction(self, transaction: JudicialTransaction) -> None:
+        """Aplica el efecto de una transacción sobre el estado de su caso"""
+        case_id = transaction.case_id
+        data = transaction.data
+
+        if transaction.action == "create_case":
+            if case_id in self.cases:
+                self.set_status(case_id, None)
+                self.search.recreate(case_id, transaction.timestamp)
+            self._store(case_id, {
+                "type": data.get("type"),
+                "status": None,
+                "judge": transaction.judge,
+                "parties": transaction.parties,
+                "created_at": transaction.timestamp,
+                "documents": [],
+                "hearings": [],
+                "judgment": None
+            })
+            self.set_status(case_id, data.get("status", "presentado"))
+            self.search.add(case_id, transaction.timestamp, {
+                "case_id": case_id,
+                "description": data.get("description")
+            })
+            return
+
+        case = self.cases.get(case_id)
+        if case is None:
+            return
+
+        if transaction.action == "add_document":
+            self._store(case_id, {**case, "documents": case["documents"] + [{
+                "name": data["document_name"],
+                "hash": data["document_hash"],
+                "uploader": data["uploader"],
+                "date": transaction.timestamp
+            }]})
+            self.search.add(case_id, case["created_at"], {"document_name": data["document_name"]})
+        elif transaction.action == "schedule_hearing":
+            self._store(case_id, {**case, "hearings": case["hearings"] + [{
+                "type": data["hearing_type"],
+                "date": data["date"],
+                "location": data["location"]
+            }]})
+            if case["status"] == "presentado":
+                self.set_status(case_id, "en_proceso")
+        elif transaction.action == "issue_judgment":
+            self._store(case_id, {**case, "judgment": {
+                "ruling": data["ruling"],
+                "verdict": data["verdict"],
+                "details": data["details"],
+                "date": transaction.timestamp
+            }})
+            self.set_status(case_id, "resuelto")
+            self.search.add(case_id, case["created_at"], {
+                "verdict": data["verdict"],
+                "details": data["details"]
+            })
+
+    def apply_block(self, block: Block) -> None:
+        """Aplica todas las transacciones de un bloque (el génesis no contiene casos)"""
+        if block.index > 0:
+            for transaction in block.transactions:
+                self.apply_transaction(transaction)
+        self.height = block.index
+
+    def load_snapshot(self, snapshot: Dict) -> None:
+        """Reemplaza el estado por el de un snapshot"""
+        self.cases = SharedTable(snapshot["cases"])
+        self.status_counts = snapshot["status_counts"]
+        self.height = snapshot["height"]
+        self.index.rebuild(self.cases)
+        self.search.load_snapshot(snapshot["search"])
+
+
+class SnapshotStore:
+    """
+    Snapshots del estado de los casos en disco, nombrados por la altura que cubren
+    Se conservan solo los 'keep' más recientes
+    save_async() los escribe en un hilo propio a partir del StateSnapshot publicado,
+    así que el hilo escritor de la cadena no espera a la serialización ni al fsync
+    """
+
+    def __init__(self, directory: str, keep: int = 2):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        # Altura del snapshot más reciente, actualizada en save() (se consulta en cada bloque)
+        heights = self._heights()
+        self._latest_height = heights[0] if heights else 0
+        # Hilo de guardado (se crea al primer uso) y guardado en curso
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-writer")
+        self._pending: Optional[Future] = None
+        self._pending_lock = threading.Lock()
+
+    def _heights(self):
+        return sorted(
+            (int(name[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)])
+             for name in os.listdir(self.directory)
+             if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)),
+            reverse=True
+        )
+
+    def _path(self, height: int) -> str:
+        return os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{height:020d}{SNAPSHOT_SUFFIX}")
+
+    def latest_height(self) -> int:
+        """Altura del snapshot más reciente (0 si no hay ninguno)"""
+        return self._latest_height
+
+    def save(self, state: Any) -> None:
+        """
+        Escribe de forma atómica (archivo temporal + rename) el StateSnapshot de court_system:
+        es inmutable, así que puede serializarse en cualquier hilo
+        """
+        path = self._path(state.height)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "height": state.height,
+                "tip_hash": state.tip_hash,
+                "cases": state.cases.to_dict(),
+                "status_counts": state.status_counts,
+                "search": state.search.to_snapshot()
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._latest_height = max(self._latest_height, state.height)
+
+        for height in self._heights()[self.keep:]:
+            os.remove(self._path(height))
+
+        print(f"  Snapshot de casos guardado en el bloque #{state.height}")
+
+    def save_async(self, state: Any) -> bool:
+        """
+        Encola el guardado de state en el hilo de snapshots; no hace nada si aún se está
+        guardando el anterior (el siguiente bloque lo volverá a intentar)
+        Retorna True si se encoló
+        """
+        with self._pending_lock:
+            if self._pending is not None and not self._pending.done():
+                return False
+            self._pending = self._executor.submit(self._save_logged, state)
+            return True
+
+    def _save_logged(self, state: Any) -> None:
+        try:
+            self.save(state)
+        except OSError as e:
+            print(f"  Error al guardar el snapshot del bloque #{state.height}: {e}")
+
+    def close(self) -> None:
+        """Espera al guardado en curso y detiene el hilo de snapshots"""
+        self._executor.shutdown(wait=True)
+
+    def iter_snapshots(self) -> Iterator[Dict]:
+        """Recorre los snapshots del más reciente al más antiguo"""
+        for height in self._heights():
+            try:
+                with open(self._path(height), encoding="utf-8") as f:
+                    yield json.load(f)
+            except (OSError, ValueError):
+                print(f"  Snapshot del bloque #{height} ilegible, se omite")
@@ -0,0 +1,49 @@
+"""
+Cache de respuestas serializadas para peticiones GET condicionales
+Cada entrada se asocia a la versión del estado del que se generó (p. ej. el hash
+de la cima de la cadena), así que nunca se sirve una respuesta desactualizada
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class ResponseCache:
+    """Cache LRU de cuerpos de respuesta por (ruta con parámetros, versión del estado)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_etag(resource: str, version: str) -> str:
+        """ETag de un recurso en una versión del estado"""
+        return hashlib.sha256(f"{resource}|{version}".encode()).hexdigest()[:32]
+
+    def get(self, resource: str, version: str) -> Optional[bytes]:
+        """Cuerpo cacheado del recurso en esa versión, o None"""
+        with self._lock:
+            body = self._entries.get((resource, version))
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((resource, version))
+            self.hits += 1
+            return body
+
+    def put(self, resource: str, version: str, body: bytes) -> None:
+        """Guarda el cuerpo serializado; descarta las entradas menos usadas si se excede el límite"""
+        with self._lock:
+            self._entries[(resource, version)] = body
+            self._entries.move_to_end((resource, version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,201 @@
+"""
+Planificador de confirmación por lotes
+Agrupa transacciones y mina un bloque cuando se alcanza el tamaño máximo
+del lote o el tiempo máximo de espera
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from blockchain import JudicialBlockchain, JudicialTransaction, Block
+
+
+class CommitTicket(Future):
+    """
+    Ticket de confirmación de una transacción
+    Se resuelve con el Block que la contiene cuando ha sido minada
+    """
+
+    def __init__(self, transaction_id: str):
+        super().__init__()
+        self.transaction_id = transaction_id
+        self.submitted_at = time.monotonic()
+        self.block_index: Optional[int] = None
+
+
+class CommitScheduler:
+    """
+    Mina las transacciones pendientes por lotes en un hilo de fondo
+    Es el único escritor de la blockchain: toda modificación de la cadena, sus índices
+    y el estado derivado se ejecuta en su hilo, en el orden en que se encoló
+    """
+
+    def __init__(
+        self,
+        blockchain: JudicialBlockchain,
+        max_batch_size: int = 50,
+        max_wait: float = 1.0,
+        status_history: int = 10000
+    ):
+        self.blockchain = blockchain
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.status_history = status_history
+        self._queue: List[Tuple[JudicialTransaction, str, CommitTicket]] = []
+        # Operaciones de escritura que no son transacciones (p. ej. registrar un juez)
+        self._commands: List[Tuple[Callable[..., Any], tuple, Future]] = []
+        # Tickets sin confirmar y confirmaciones recientes, para consultar su estado
+        self._tickets: Dict[str, CommitTicket] = {}
+        self._recent: "OrderedDict[str, CommitTicket]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._flush_requested = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="commit-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, transaction: JudicialTransaction, miner_address: str = "Sistema") -> Optional[CommitTicket]:
+        """
+        Encola una transacción para el siguiente lote
+        Retorna el ticket de confirmación o None si la transacción es inválida
+        """
+        if not self.blockchain.validate_transaction(transaction):
+            return None
+
+        ticket = CommitTicket(transaction.get_id())
+        with self._condition:
+            self._queue.append((transaction, miner_address, ticket))
+            self._tickets[ticket.transaction_id] = ticket
+            self._condition.notify()
+
+        print(f" Transacción encolada: {transaction.case_id} - {transaction.action}")
+        return ticket
+
+    def execute(self, function: Callable[..., Any], *args) -> Future:
+        """
+        Ejecuta una operación en el hilo escritor, antes del siguiente lote
+        Retorna un Future con su resultado
+        """
+        future: Future = Future()
+        with self._condition:
+            self._commands.append((function, args, future))
+            self._condition.notify()
+        return future
+
+    def get_status(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Estado de una transacción enviada a este planificador
+        Retorna None si no está pendiente ni entre las confirmaciones recientes
+        """
+        with self._condition:
+            ticket = self._tickets.get(transaction_id) or self._recent.get(transaction_id)
+
+        if ticket is None:
+            return None
+        if not ticket.done():
+            return {"transaction_id": transaction_id, "status": "pending"}
+        if ticket.exception() is not None:
+            return {
+                "transaction_id": transaction_id,
+                "status": "failed",
+                "error": str(ticket.exception())
+            }
+        return {
+            "transaction_id": transaction_id,
+            "status": "mined",
+            "block_index": ticket.block_index
+        }
+
+    def pending_count(self) -> int:
+        """
+        Número de transacciones en espera de ser minadas
+        Sin lock: la cola solo se reemplaza o se amplía, y tomar el lock en cada lectura
+        deja al hilo escritor esperando cuando muchos lectores consultan a la vez
+        """
+        return len(self._queue)
+
+    def flush(self) -> None:
+        """Fuerza el minado inmediato de lo encolado y espera su confirmación"""
+        with self._condition:
+            tickets = [ticket for _, _, ticket in self._queue]
+            self._flush_requested = True
+            self._condition.notify()
+
+        for ticket in tickets:
+            ticket.exception()
+
+    def close(self) -> None:
+        """Mina lo pendiente y detiene el hilo del planificador"""
+        self.flush()
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
+    def _next_batch(self) -> Tuple[list, List[Tuple[JudicialTransaction, str, CommitTicket]]]:
+        """
+        Espera hasta que haya operaciones, el lote esté lleno o el más antiguo supere max_wait
+        Retorna (operaciones, lote)
+        """
+        with self._condition:
+            while self._running:
+                if self._commands:
+                    commands, self._commands = self._commands, []
+                    return commands, []
+                if self._queue:
+                    oldest_age = time.monotonic() - self._queue[0][2].submitted_at
+                    if (len(self._queue) >= self.max_batch_size
+                            or oldest_age >= self.max_wait
+                            or self._flush_requested):
+                        break
+                    self._condition.wait(self.max_wait - oldest_age)
+                else:
+                    self._flush_requested = False
+                    self._condition.wait()
+
+            commands, self._commands = self._commands, []
+            batch = self._queue[:self.max_batch_size]
+            self._queue = self._queue[self.max_batch_size:]
+            if not self._queue:
+                self._flush_requested = False
+            return commands, batch
+
+    def _archive(self, batch: List[Tuple[JudicialTransaction, str, CommitTicket]]) -> None:
+        """Mueve los tickets resueltos al historial acotado de confirmaciones recientes"""
+        with self._condition:
+            for _, _, ticket in batch:
+                self._tickets.pop(ticket.transaction_id, None)
+                self._recent[ticket.transaction_id] = ticket
+            while len(self._recent) > self.status_history:
+                self._recent.popitem(last=False)
+
+    def _run(self) -> None:
+        """Bucle principal del hilo: toma lotes y los mina"""
+        while True:
+            commands, batch = self._next_batch()
+            for function, args, future in commands:
+                try:
+                    future.set_result(function(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            if not batch:
+                if not self._running and not commands:
+                    return
+                continue
+
+            try:
+                for transaction, _, _ in batch:
+                    self.blockchain.add_transaction(transaction)
+                block: Block = self.blockchain.mine_pending_transactions(batch[0][1])
+            except Exception as e:
+                for _, _, ticket in batch:
+                    ticket.set_exception(e)
+                self._archive(batch)
+                continue
+
+            for _, _, ticket in batch:
+                ticket.block_index = block.index
+                ticket.set_result(block)
+            self._archive(batch)
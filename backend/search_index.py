@@ -0,0 +1,248 @@
+"""
+Índice invertido de texto completo sobre los casos
+Indexa la descripción del caso, el veredicto y los detalles de la sentencia y los nombres
+de documentos. El texto se normaliza sin acentos ni mayúsculas para buscar en español
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from blockchain import FrozenDict
+from shared_table import SharedTable
+
+# Peso de cada campo en la puntuación
+FIELD_WEIGHTS = {
+    "case_id": 1.0,
+    "description": 1.0,
+    "document_name": 1.5,
+    "verdict": 2.0,
+    "details": 1.0,
+}
+# Palabras demasiado frecuentes para distinguir casos (ya sin acentos)
+STOPWORDS = frozenset("""
+    a al ante con como contra de del desde donde e el en entre era es esa ese eso esta este
+    esto ha hay la las le les lo los mas me mi muy ni no nos o para pero por que se sin sobre
+    su sus te tu un una uno y ya
+""".split())
+# Parámetros de BM25
+BM25_K1 = 1.2
+# Entradas nuevas que se acumulan antes de fusionarlas en el diccionario del término:
+# una cuarta parte de este, entre MIN_TAIL y MAX_TAIL (las consultas recorren la cola entera)
+MIN_TAIL = 16
+MAX_TAIL = 1024
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Postings de un término: (case_id -> (created_at, peso) ya fusionados, entradas recientes)
+# El escritor añade las entradas recientes a una lista; las vistas publicadas tienen una tupla
+Postings = Tuple[Dict[str, Tuple[str, float]], Sequence[Tuple[str, str, float]]]
+
+
+def fold(text: str) -> str:
+    """Minúsculas y sin acentos ni diéresis: 'Resolución' -> 'resolucion', 'Núñez' -> 'nunez'"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Términos indexables de un texto"""
+    return [
+        token for token in _TOKEN.findall(fold(text))
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def _merge(postings: Postings) -> Dict[str, Tuple[str, float]]:
+    """Fusiona las entradas recientes; un caso creado de nuevo reemplaza su peso anterior"""
+    merged, tail = postings
+    merged = dict(merged)
+    for case_id, created_at, weight in tail:
+        previous = merged.get(case_id)
+        if previous is not None and previous[0] == created_at:
+            weight += previous[1]
+        merged[case_id] = (created_at, weight)
+    return merged
+
+
+class SearchIndex:
+    """
+    Índice invertido que actualiza el hilo escritor al aplicar cada transacción
+    publish() entrega una vista inmutable para el snapshot; solo se congelan
+    los términos que cambiaron desde la publicación anterior
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Postings] = {}
+        # Casos creados más de una vez: sus entradas anteriores dejan de contar
+        self._recreated: Dict[str, str] = {}
+        self._dirty: Set[str] = set()
+        self._published = SharedTable()
+        self._published_recreated = FrozenDict()
+
+    def recreate(self, case_id: str, created_at: str) -> None:
+        """Registra que un caso existente se creó de nuevo"""
+        self._recreated[case_id] = created_at
+        self._published_recreated = None
+
+    def add(self, case_id: str, created_at: str, fields: Mapping[str, Optional[str]]) -> None:
+        """Indexa los textos de una transacción del caso"""
+        weights: Dict[str, float] = {}
+        for field, text in fields.items():
+            if not text:
+                continue
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0.0) + FIELD_WEIGHTS[field]
+
+        for token, weight in weights.items():
+            self._dirty.add(token)
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = ({}, [(case_id, created_at, weight)])
+                continue
+            merged, tail = postings
+            tail.append((case_id, created_at, weight))
+            if len(tail) > min(max(MIN_TAIL, len(merged) // 4), MAX_TAIL):
+                self._postings[token] = (_merge(postings), [])
+
+    def load_snapshot(self, snapshot: Mapping[str, Any]) -> None:
+        """Reemplaza el índice por el guardado en un snapshot"""
+        self._postings = {
+            token: ({case_id: (created_at, weight) for case_id, created_at, weight in entries}, [])
+            for token, entries in snapshot["postings"].items()
+        }
+        self._recreated = dict(snapshot["recreated"])
+        self._dirty = set(self._postings)
+        self._published = SharedTable()
+        self._published_recreated = None
+
+    def publish(self) -> "SearchIndexView":
+        """Vista inmutable del estado actual del índice (se llama desde el hilo escritor)"""
+        for token in self._dirty:
+            merged, tail = self._postings[token]
+            self._published[token] = (merged, tuple(tail))
+        self._dirty = set()
+        if self._published_recreated is None:
+            self._published_recreated = FrozenDict(self._recreated)
+        return SearchIndexView(self._published.publish(), self._published_recreated)
+
+
+class SearchIndexView:
+    """
+    Índice publicado en un snapshot: postings fusionados y una copia congelada de las entradas
+    recientes. Las consultas no modifican nada y no usan locks; se hacen sobre los casos
+    del mismo snapshot y, si un caso se creó más de una vez, solo cuentan las entradas
+    con la fecha de creación que tiene en él
+    """
+    __slots__ = ("_postings", "_recreated")
+
+    def __init__(self, postings: Mapping[str, Postings], recreated: Mapping[str, str]):
+        self._postings = postings
+        self._recreated = recreated
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """Postings fusionados, serializables como JSON (formato de SearchIndex.load_snapshot)"""
+        return {
+            "postings": {
+                token: [
+                    [case_id, created_at, weight] for case_id, (created_at, weight) in _merge(postings).items()
+                ]
+                for token, postings in self._postings.items()
+            },
+            "recreated": dict(self._recreated)
+        }
+
+    @staticmethod
+    def _frequency(postings: Postings) -> int:
+        """Número de casos que contienen el término"""
+        merged, tail = postings
+        return len(merged) + len({case_id for case_id, _, _ in tail if case_id not in merged})
+
+    def _weights(self, postings: Postings, cases: Mapping[str, Mapping[str, Any]],
+                 candidates: Optional[Mapping[str, Any]] = None) -> Dict[str, float]:
+        """
+        Peso del término en cada caso vigente del snapshot
+        Con candidates solo se calculan los de esos casos (intersección)
+        """
+        merged, tail = postings
+        recreated = self._recreated
+        weights: Dict[str, float] = {}
+        if candidates is None:
+            # El índice y los casos se publican juntos: todo caso indexado está en cases
+            for case_id, (created_at, weight) in merged.items():
+                if case_id not in recreated or cases[case_id]["created_at"] == created_at:
+                    weights[case_id] = weight
+        else:
+            for case_id in candidates:
+                entry = merged.get(case_id)
+                if entry is not None and (case_id not in recreated
+                                          or cases[case_id]["created_at"] == entry[0]):
+                    weights[case_id] = entry[1]
+
+        for case_id, created_at, weight in tail:
+            if candidates is not None and case_id not in candidates:
+                continue
+            if case_id in recreated and cases[case_id]["created_at"] != created_at:
+                continue
+            previous = weights.get(case_id)
+            weights[case_id] = weight if previous is None else previous + weight
+        return weights
+
+    def search(self, query: str, cases: Mapping[str, Dict], limit: int = 20) -> Dict:
+        """
+        Casos que contienen todos los términos de la consulta, ordenados por relevancia (BM25)
+        cases son los casos del mismo snapshot que el índice
+        Recorre primero el término menos frecuente y solo comprueba sus casos en los demás,
+        así que el costo depende del término más raro y no del total de transacciones
+        """
+        tokens = sorted(set(tokenize(query)))
+        if not tokens:
+            return {"results": [], "total": 0, "terms": []}
+
+        postings = []
+        for token in tokens:
+            entry = self._postings.get(token)
+            if entry is None:
+                return {"results": [], "total": 0, "terms": tokens}
+            postings.append(entry)
+        frequencies = {id(entry): self._frequency(entry) for entry in postings}
+        postings.sort(key=lambda entry: frequencies[id(entry)])
+
+        total_cases = max(len(cases), 1)
+        terms: List[Tuple[float, Dict[str, float]]] = []
+        candidates: Optional[Dict[str, float]] = None
+        for entry in postings:
+            # Cada término solo se busca en los casos que contienen a los anteriores
+            candidates = self._weights(entry, cases, candidates)
+            if not candidates:
+                return {"results": [], "total": 0, "terms": tokens}
+            frequency = frequencies[id(entry)]
+            idf = math.log(1 + (max(total_cases - frequency, 0) + 0.5) / (frequency + 0.5))
+            terms.append((idf, candidates))
+
+        def bm25(case_ids) -> Dict[str, float]:
+            scores = dict.fromkeys(case_ids, 0.0)
+            for idf, weights in terms:
+                factor = idf * (BM25_K1 + 1)
+                for case_id in scores:
+                    weight = weights[case_id]
+                    scores[case_id] += factor * weight / (weight + BM25_K1)
+            return scores
+
+        # Con un solo término el orden es el de su peso y solo se puntúan los elegidos.
+        # Recorrer al revés desempata a favor de los casos indexados más tarde
+        if len(terms) == 1:
+            best = heapq.nlargest(limit, reversed(candidates), key=candidates.__getitem__)
+            scores = bm25(best)
+        else:
+            scores = bm25(candidates)
+            best = heapq.nlargest(limit, reversed(scores), key=scores.__getitem__)
+        return {
+            "results": [
+                {"id": case_id, "score": round(scores[case_id], 4), **cases[case_id]} for case_id in best
+            ],
+            "total": len(candidates),
+            "terms": tokens
+        }
@@ -0,0 +1,169 @@
+"""
+Sesiones del lado del servidor guardadas en la tabla 'sessions'
+Con cache LRU/TTL en memoria de sesión -> usuario, para que las peticiones
+autenticadas no consulten la base de datos en el caso habitual
+"""
+
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from database import db_connection
+
+# Columnas del usuario que se guardan junto a la sesión
+USER_FIELDS = ("id", "username", "email", "role", "full_name", "created_at")
+
+
+def hash_token(token: str) -> str:
+    """En la tabla se guarda el hash del token: una copia de la base no permite usar las sesiones"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionStore:
+    """
+    Sesiones persistidas en PostgreSQL con cache local
+    Las entradas de la cache caducan a los cache_ttl segundos o al expirar la sesión;
+    con varios procesos, un logout tarda como máximo cache_ttl en verse en los demás
+    """
+
+    def __init__(
+        self,
+        session_ttl: timedelta = timedelta(hours=8),
+        cache_size: int = 10000,
+        cache_ttl: float = 60.0,
+        sweep_interval: float = 300.0,
+        sweep_batch: int = 1000
+    ):
+        self.session_ttl = session_ttl
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        # token_hash -> (usuario, expiración de la sesión, momento en que se cacheó)
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], datetime, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def _cache_put(self, token_hash: str, user: Dict[str, Any], expires_at: datetime) -> None:
+        with self._lock:
+            self._cache[token_hash] = (user, expires_at, time.monotonic())
+            self._cache.move_to_end(token_hash)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_get(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(token_hash)
+            if entry is None:
+                return None
+            user, expires_at, cached_at = entry
+            if expires_at <= datetime.now() or time.monotonic() - cached_at > self.cache_ttl:
+                del self._cache[token_hash]
+                return None
+            self._cache.move_to_end(token_hash)
+            return user
+
+    def create(self, user: Dict[str, Any]) -> str:
+        """Abre una sesión para el usuario y retorna su token (para la cookie firmada)"""
+        token = secrets.token_urlsafe(32)
+        token_hash = hash_token(token)
+        expires_at = datetime.now() + self.session_ttl
+        record = {field: user.get(field) for field in USER_FIELDS}
+
+        with db_connection() as conn:
+            conn.execute(
+                "INSERT INTO sessions (user_id, session_token, expires_at) VALUES (%s, %s, %s)",
+                (user["id"], token_hash, expires_at)
+            )
+
+        self._cache_put(token_hash, record, expires_at)
+        return token
+
+    def get(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Usuario de una sesión vigente, o None si no existe o expiró
+        Normalmente se resuelve en memoria; si no, con una consulta a la tabla
+        """
+        if not token:
+            return None
+
+        token_hash = hash_token(token)
+        user = self._cache_get(token_hash)
+        if user is not None:
+            return user
+
+        with db_connection() as conn:
+            row = conn.execute("""
+                SELECT s.expires_at, u.id, u.username, u.email, u.role, u.full_name, u.created_at
+                FROM sessions s JOIN users u ON u.id = s.user_id
+                WHERE s.session_token = %s AND s.expires_at > %s
+            """, (token_hash, datetime.now())).fetchone()
+
+        if row is None:
+            return None
+
+        user = {field: row[field] for field in USER_FIELDS}
+        self._cache_put(token_hash, user, row["expires_at"])
+        return user
+
+    def revoke(self, token: Optional[str]) -> None:
+        """Cierra la sesión: la borra de la tabla y de la cache"""
+        if not token:
+            return
+
+        token_hash = hash_token(token)
+        with self._lock:
+            self._cache.pop(token_hash, None)
+        with db_connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_token = %s", (token_hash,))
+
+    def sweep_expired(self) -> int:
+        """
+        Borra las sesiones expiradas en lotes de sweep_batch (transacciones cortas)
+        Retorna el número de sesiones borradas
+        """
+        now = datetime.now()
+        with self._lock:
+            for token_hash in [key for key, entry in self._cache.items() if entry[1] <= now]:
+                del self._cache[token_hash]
+
+        removed = 0
+        while not self._stop.is_set():
+            with db_connection() as conn:
+                deleted = conn.execute("""
+                    DELETE FROM sessions WHERE id IN (
+                        SELECT id FROM sessions WHERE expires_at <= %s LIMIT %s
+                    )
+                """, (now, self.sweep_batch)).rowcount
+            removed += deleted
+            if deleted < self.sweep_batch:
+                break
+
+        if removed:
+            print(f"  Sesiones expiradas eliminadas: {removed}")
+        return removed
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep_expired()
+            except Exception as e:
+                print(f"  Error limpiando sesiones expiradas: {e}")
+
+    def start_sweeper(self) -> None:
+        """Inicia el hilo que limpia periódicamente las sesiones expiradas"""
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Detiene el hilo de limpieza"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
@@ -0,0 +1,102 @@
+"""
+Diccionario compartido entre snapshots (casos de la proyección, términos del índice de búsqueda)
+Las entradas se reparten en tramos por hash de la clave: un cambio copia solo su tramo y publicar
+copia la lista de tramos, así que publicar tras cada bloque no copia todo el diccionario.
+La iteración conserva el orden de alta, como un dict
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from blockchain import FrozenDict
+
+# Número fijo de tramos (potencia de 2): nunca hay que redistribuir los casos
+BUCKET_COUNT = 4096
+BUCKET_MASK = BUCKET_COUNT - 1
+# Claves por tramo de la lista de orden de alta
+ORDER_CHUNK_SIZE = 128
+
+
+class _TableLookup(Mapping):
+    """Lecturas comunes a la tabla del escritor y a sus vistas publicadas"""
+    __slots__ = ()
+
+    _buckets: List[Dict[str, Any]]
+    _order: List[Tuple[str, ...]]
+    _length: int
+
+    def __getitem__(self, key: str) -> Any:
+        return self._buckets[hash(key) & BUCKET_MASK][key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._buckets[hash(key) & BUCKET_MASK].get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._buckets[hash(key) & BUCKET_MASK]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._order:
+            yield from chunk
+
+
+class SharedTable(_TableLookup):
+    """
+    Diccionario que modifica el hilo escritor (no admite borrados)
+    Los tramos publicados no se modifican: el primer cambio tras publish() los copia
+    """
+    __slots__ = ("_buckets", "_order", "_length", "_owned")
+
+    def __init__(self, items: Optional[Mapping[str, Any]] = None):
+        self._buckets = [{} for _ in range(BUCKET_COUNT)]
+        self._order = []
+        self._length = 0
+        self._owned: Set[int] = set(range(BUCKET_COUNT))  # Tramos aún no publicados
+        for key, value in (items or {}).items():
+            self[key] = value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        bucket_index = hash(key) & BUCKET_MASK
+        bucket = self._buckets[bucket_index]
+        if bucket_index not in self._owned:
+            bucket = self._buckets[bucket_index] = dict(bucket)
+            self._owned.add(bucket_index)
+
+        if key not in bucket:
+            self._length += 1
+            if self._order and len(self._order[-1]) < ORDER_CHUNK_SIZE:
+                self._order[-1] += (key,)
+            else:
+                self._order.append((key,))
+        bucket[key] = value
+
+    def publish(self) -> "SharedTableView":
+        """Vista inmutable del estado actual; comparte los tramos sin cambios con las anteriores"""
+        self._owned = set()
+        return SharedTableView(tuple(self._buckets), tuple(self._order), self._length)
+
+
+class SharedTableView(_TableLookup):
+    """Diccionario publicado en un snapshot; los lectores lo usan sin locks"""
+    __slots__ = ("_buckets", "_order", "_length", "_dict")
+
+    def __init__(self, buckets: Tuple[Dict[str, Any], ...], order: Tuple[Tuple[str, ...], ...], length: int):
+        self._buckets = buckets
+        self._order = order
+        self._length = length
+        self._dict: Optional[FrozenDict] = None
+
+    def to_dict(self) -> FrozenDict:
+        """
+        Todas las entradas en orden de alta, p. ej. para serializarlas
+        Se construye en la primera llamada y se comparte entre los lectores de esta vista
+        """
+        if self._dict is None:
+            buckets = self._buckets
+            self._dict = FrozenDict(
+                (key, buckets[hash(key) & BUCKET_MASK][key])
+                for chunk in self._order for key in chunk
+            )
+        return self._dict
@@ -0,0 +1,287 @@
+"""
+Almacenamiento persistente de la blockchain
+Log de bloques de solo anexado, dividido en segmentos con índice de offsets
+Los registros nuevos usan la codificación binaria de encoding.py; los registros JSON
+escritos por versiones anteriores se siguen leyendo
+"""
+
+import bisect
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from functools import partial
+from typing import Dict, List, Optional
+
+from blockchain import Block
+from encoding import is_binary_block, decode_block_header
+
+# Cabecera de cada registro: longitud del payload + CRC32 del payload
+RECORD_HEADER = struct.Struct("<II")
+# Entrada del índice: índice del bloque + offset del registro dentro del segmento
+INDEX_ENTRY = struct.Struct("<QQ")
+
+SEGMENT_SUFFIX = ".log"
+INDEX_SUFFIX = ".idx"
+# Contadores de la cadena en una altura (ver JudicialBlockchain.save_statistics)
+STATISTICS_FILE = "chain-stats.json"
+# Bloqueo exclusivo del directorio: un solo proceso escribe en el log
+LOCK_FILE = "LOCK"
+
+
+def decode_record(payload: bytes) -> Block:
+    """Reconstruye un bloque desde un registro del log (binario o JSON antiguo)"""
+    if is_binary_block(payload):
+        return Block.from_bytes(payload)
+    return Block.from_dict(json.loads(payload), trusted=True)
+
+
+class BlockStore:
+    """
+    Log de bloques en disco
+    Cada segmento se nombra con el índice de su primer bloque y tiene un .idx asociado
+    Mientras está abierto mantiene un flock exclusivo sobre LOCK_FILE en el directorio
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        fsync_every: int = 1
+    ):
+        """
+        fsync_every: cada cuántos bloques anexados se hace fsync (0 = delegar en el SO)
+        Lanza RuntimeError si otro proceso (u otro BlockStore) tiene abierto el directorio
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_every = fsync_every
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._segments: List[int] = []  # Índice del primer bloque de cada segmento
+        self._offsets = array("Q")  # Offset de cada bloque dentro de su segmento
+        self._maps: Dict[int, mmap.mmap] = {}  # Segmentos mapeados en memoria al cargar
+        self._log_file = None
+        self._index_file = None
+        self.block_count = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._directory_lock = self._lock_directory()
+        try:
+            self._segments = sorted(
+                int(name[:-len(SEGMENT_SUFFIX)])
+                for name in os.listdir(directory)
+                if name.endswith(SEGMENT_SUFFIX)
+            )
+            self._recover()
+            self._load_offsets()
+        except BaseException:
+            self._directory_lock.close()
+            raise
+
+    def _lock_directory(self):
+        """Toma el flock exclusivo del directorio sin esperar; se libera al cerrar el archivo"""
+        lock_file = open(os.path.join(self.directory, LOCK_FILE), "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"El log de bloques en {self.directory} ya está abierto por otro proceso"
+            ) from None
+        return lock_file
+
+    def _segment_path(self, base: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{base:020d}{suffix}")
+
+    def _recover(self) -> None:
+        """
+        Revisa el último segmento y trunca registros incompletos o corruptos
+        (escrituras interrumpidas por una caída) y reconstruye su índice
+        """
+        if not self._segments:
+            return
+
+        base = self._segments[-1]
+        log_path = self._segment_path(base, SEGMENT_SUFFIX)
+        entries = []
+        valid_size = 0
+
+        with open(log_path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, crc = RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            entries.append(INDEX_ENTRY.pack(base + len(entries), offset))
+            offset += RECORD_HEADER.size + length
+            valid_size = offset
+
+        if valid_size < len(data):
+            print(f"  Log de bloques: truncando {len(data) - valid_size} bytes corruptos en {log_path}")
+            with open(log_path, "r+b") as f:
+                f.truncate(valid_size)
+                os.fsync(f.fileno())
+
+        with open(self._segment_path(base, INDEX_SUFFIX), "wb") as f:
+            f.write(b"".join(entries))
+            os.fsync(f.fileno())
+
+        self.block_count = base + len(entries)
+
+    def _load_offsets(self) -> None:
+        """Lee los índices de offsets de todos los segmentos (16 bytes por bloque)"""
+        for base in self._segments:
+            with open(self._segment_path(base, INDEX_SUFFIX), "rb") as f:
+                index_data = f.read()
+            self._offsets.extend(offset for _, offset in INDEX_ENTRY.iter_unpack(index_data))
+
+    def _open_segment(self, base: int) -> None:
+        """Abre (o crea) el segmento que empieza en el bloque 'base' para anexar"""
+        if self._log_file is not None:
+            self._close_files()
+        if not self._segments or self._segments[-1] != base:
+            self._segments.append(base)
+        self._log_file = open(self._segment_path(base, SEGMENT_SUFFIX), "ab")
+        self._index_file = open(self._segment_path(base, INDEX_SUFFIX), "ab")
+
+    def _close_files(self) -> None:
+        for f in (self._log_file, self._index_file):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        self._log_file = None
+        self._index_file = None
+
+    def append(self, block: Block) -> None:
+        """Anexa un bloque minado al log"""
+        payload = block.to_bytes()
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            if block.index != self.block_count:
+                raise ValueError(
+                    f"Bloque #{block.index} fuera de orden (se esperaba #{self.block_count})"
+                )
+
+            if self._log_file is None:
+                self._open_segment(self._segments[-1] if self._segments else block.index)
+            if self._log_file.tell() >= self.segment_max_bytes:
+                self._open_segment(block.index)
+
+            offset = self._log_file.tell()
+            self._log_file.write(record)
+            self._index_file.write(INDEX_ENTRY.pack(block.index, offset))
+            self._offsets.append(offset)
+            # flush deja el registro visible para lecturas; fsync depende de la política
+            self._log_file.flush()
+            self._index_file.flush()
+            self.block_count += 1
+
+            self._unsynced += 1
+            if self.fsync_every and self._unsynced >= self.fsync_every:
+                self._sync()
+
+    def _sync(self) -> None:
+        for f in (self._log_file, self._index_file):
+            f.flush()
+            os.fsync(f.fileno())
+        self._unsynced = 0
+
+    def sync(self) -> None:
+        """Fuerza a disco los bloques anexados"""
+        with self._lock:
+            if self._log_file is not None:
+                self._sync()
+
+    def close(self) -> None:
+        """Sincroniza y cierra el segmento activo, libera los segmentos mapeados y el directorio"""
+        with self._lock:
+            if self._log_file is not None:
+                self._close_files()
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps = {}
+            self._directory_lock.close()
+
+    def _map_segment(self, base: int) -> Optional[mmap.mmap]:
+        """Mapea un segmento en memoria (se conserva abierto hasta close)"""
+        mapped = self._maps.get(base)
+        if mapped is None:
+            log_path = self._segment_path(base, SEGMENT_SUFFIX)
+            if os.path.getsize(log_path) == 0:
+                return None
+            with open(log_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[base] = mapped
+        return mapped
+
+    def load_blocks(self) -> List[Block]:
+        """
+        Carga la cadena leyendo solo la cabecera de cada registro a través del mmap
+        Las transacciones de cada bloque se decodifican al primer acceso (read_payload);
+        los registros JSON antiguos se decodifican completos
+        """
+        blocks = []
+        for position, base in enumerate(self._segments):
+            end = self._segments[position + 1] if position + 1 < len(self._segments) else self.block_count
+            if end == base:
+                continue
+            mapped = self._map_segment(base)
+            for index in range(base, end):
+                start = self._offsets[index] + RECORD_HEADER.size
+                if mapped[start:start + 1] == b"{":
+                    length, _ = RECORD_HEADER.unpack_from(mapped, self._offsets[index])
+                    blocks.append(decode_record(mapped[start:start + length]))
+                else:
+                    blocks.append(Block.from_header(
+                        decode_block_header(mapped, start), partial(self.read_payload, index)
+                    ))
+        return blocks
+
+    def read_payload(self, index: int) -> bytes:
+        """Registro codificado de un bloque, leído del segmento mapeado o del archivo"""
+        offset = self._offsets[index]
+        base = self._segments[bisect.bisect_right(self._segments, index) - 1]
+        mapped = self._maps.get(base)
+        if mapped is not None and offset + RECORD_HEADER.size <= len(mapped):
+            length, _ = RECORD_HEADER.unpack_from(mapped, offset)
+            start = offset + RECORD_HEADER.size
+            if start + length <= len(mapped):
+                return mapped[start:start + length]
+
+        with open(self._segment_path(base, SEGMENT_SUFFIX), "rb") as f:
+            f.seek(offset)
+            length, _ = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            return f.read(length)
+
+    def read_block(self, index: int) -> Optional[Block]:
+        """Lee un único bloque usando el índice de offsets"""
+        if index < 0 or index >= self.block_count:
+            return None
+        return decode_record(self.read_payload(index))
+
+    def save_statistics(self, statistics: Dict) -> None:
+        """
+        Guarda los contadores de la cadena (archivo temporal + rename)
+        Sin fsync: al cargarlos se comprueba que su altura y hash coincidan con el log
+        """
+        path = os.path.join(self.directory, STATISTICS_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(statistics, f)
+        os.replace(path + ".tmp", path)
+
+    def load_statistics(self) -> Optional[Dict]:
+        """Contadores guardados por save_statistics (None si no existen o están dañados)"""
+        try:
+            with open(os.path.join(self.directory, STATISTICS_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
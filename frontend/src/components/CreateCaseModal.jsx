@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { X } from 'lucide-react';
-import { casesAPI, judgesAPI } from '../services/api';
+import { casesAPI, judgesAPI, waitForTransaction, PENDING_TRANSACTION_MESSAGE } from '../services/api';
 import './CreateCaseModal.css';
 
 const CreateCaseModal = ({ isOpen, onClose, onCaseCreated }) => {
@@ -44,7 +44,11 @@ const CreateCaseModal = ({ isOpen, onClose, onCaseCreated }) => {
     setLoading(true);
 
     try {
-      await casesAPI.create(formData);
+      // El caso se mina en segundo plano: se espera su bloque antes de recargar la lista
+      const transaction = await waitForTransaction(await casesAPI.create(formData));
+      if (transaction.status === 'pending') {
+        alert(PENDING_TRANSACTION_MESSAGE);
+      }
       onCaseCreated();
       onClose();
       // Reset form
@@ -57,7 +61,7 @@ const CreateCaseModal = ({ isOpen, onClose, onCaseCreated }) => {
         description: ''
       });
     } catch (err) {
-      setError(err.response?.data?.error || 'Error al crear caso');
+      setError(err.response?.data?.error || err.message || 'Error al crear caso');
     } finally {
       setLoading(false);
     }
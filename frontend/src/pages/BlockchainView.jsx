@@ -4,21 +4,30 @@ import { ArrowLeft, Box, Link as LinkIcon, CheckCircle, XCircle } from 'lucide-r
 import { blockchainAPI } from '../services/api';
 import './BlockchainView.css';
 
+const PAGE_SIZE = 50;
+
 const BlockchainView = () => {
   const navigate = useNavigate();
   const [blocks, setBlocks] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalBlocks, setTotalBlocks] = useState(0);
+  const [totalTransactions, setTotalTransactions] = useState(0);
   const [isValid, setIsValid] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadBlockchain();
+    loadStatistics();
     verifyBlockchain();
   }, []);
 
   const loadBlockchain = async () => {
     try {
-      const response = await blockchainAPI.getChain();
+      const response = await blockchainAPI.getChain({ limit: PAGE_SIZE });
       setBlocks(response.data.chain);
+      setNextCursor(response.data.next_cursor);
+      setTotalBlocks(response.data.total_blocks);
     } catch (error) {
       console.error('Error cargando blockchain:', error);
     } finally {
@@ -26,6 +35,29 @@ const BlockchainView = () => {
     }
   };
 
+  const loadMoreBlocks = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await blockchainAPI.getChain({ cursor: nextCursor, limit: PAGE_SIZE });
+      setBlocks((previous) => [...previous, ...response.data.chain]);
+      setNextCursor(response.data.next_cursor);
+      setTotalBlocks(response.data.total_blocks);
+    } catch (error) {
+      console.error('Error cargando más bloques:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const loadStatistics = async () => {
+    try {
+      const response = await blockchainAPI.getStatistics();
+      setTotalTransactions(response.data.statistics.total_transactions);
+    } catch (error) {
+      console.error('Error cargando estadísticas:', error);
+    }
+  };
+
   const verifyBlockchain = async () => {
     try {
       const response = await blockchainAPI.verify();
@@ -143,17 +175,21 @@ const BlockchainView = () => {
           ))}
         </div>
 
+        {nextCursor && (
+          <button onClick={loadMoreBlocks} className="load-more-button" disabled={loadingMore}>
+            {loadingMore ? 'Cargando...' : 'Cargar más bloques'}
+          </button>
+        )}
+
         {/* Resumen */}
         <div className="blockchain-summary">
           <div className="summary-card">
             <h4>Total de Bloques</h4>
-            <p className="summary-value">{blocks.length}</p>
+            <p className="summary-value">{totalBlocks}</p>
           </div>
           <div className="summary-card">
             <h4>Total de Transacciones</h4>
-            <p className="summary-value">
-              {blocks.reduce((sum, block) => sum + block.transactions.length, 0)}
-            </p>
+            <p className="summary-value">{totalTransactions}</p>
           </div>
           <div className="summary-card">
             <h4>Estado</h4>
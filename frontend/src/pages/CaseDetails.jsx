@@ -12,7 +12,7 @@ import {
   Gavel,
   Plus
 } from 'lucide-react';
-import { casesAPI } from '../services/api';
+import { casesAPI, waitForTransaction, PENDING_TRANSACTION_MESSAGE } from '../services/api';
 import './CaseDetails.css';
 
 const CaseDetails = () => {
@@ -43,6 +43,15 @@ const CaseDetails = () => {
     }
   };
 
+  // Las operaciones se minan en segundo plano: se recarga el caso cuando su bloque existe
+  const waitForMined = async (response) => {
+    const transaction = await waitForTransaction(response);
+    if (transaction.status === 'pending') {
+      alert(PENDING_TRANSACTION_MESSAGE);
+    }
+    await loadCaseDetails();
+  };
+
   if (loading) {
     return (
       <div className="loading-container">
@@ -251,9 +260,9 @@ const CaseDetails = () => {
         <DocumentModal 
           caseId={caseId}
           onClose={() => setShowDocumentModal(false)}
-          onSuccess={() => {
+          onSuccess={async (response) => {
+            await waitForMined(response);
             setShowDocumentModal(false);
-            loadCaseDetails();
           }}
         />
       )}
@@ -263,9 +272,9 @@ const CaseDetails = () => {
         <HearingModal 
           caseId={caseId}
           onClose={() => setShowHearingModal(false)}
-          onSuccess={() => {
+          onSuccess={async (response) => {
+            await waitForMined(response);
             setShowHearingModal(false);
-            loadCaseDetails();
           }}
         />
       )}
@@ -275,9 +284,9 @@ const CaseDetails = () => {
         <JudgmentModal 
           caseId={caseId}
           onClose={() => setShowJudgmentModal(false)}
-          onSuccess={() => {
+          onSuccess={async (response) => {
+            await waitForMined(response);
             setShowJudgmentModal(false);
-            loadCaseDetails();
           }}
         />
       )}
@@ -298,8 +307,7 @@ const DocumentModal = ({ caseId, onClose, onSuccess }) => {
     e.preventDefault();
     setLoading(true);
     try {
-      await casesAPI.addDocument(caseId, formData);
-      onSuccess();
+      await onSuccess(await casesAPI.addDocument(caseId, formData));
     } catch (error) {
       console.error('Error agregando documento:', error);
       alert('Error al agregar documento');
@@ -370,8 +378,7 @@ const HearingModal = ({ caseId, onClose, onSuccess }) => {
     e.preventDefault();
     setLoading(true);
     try {
-      await casesAPI.scheduleHearing(caseId, formData);
-      onSuccess();
+      await onSuccess(await casesAPI.scheduleHearing(caseId, formData));
     } catch (error) {
       console.error('Error programando audiencia:', error);
       alert('Error al programar audiencia');
@@ -441,8 +448,7 @@ const JudgmentModal = ({ caseId, onClose, onSuccess }) => {
     e.preventDefault();
     setLoading(true);
     try {
-      await casesAPI.issueJudgment(caseId, formData);
-      onSuccess();
+      await onSuccess(await casesAPI.issueJudgment(caseId, formData));
     } catch (error) {
       console.error('Error emitiendo sentencia:', error);
       alert('Error al emitir sentencia');
@@ -19,30 +19,69 @@ import { useAuth } from '../context/AuthContext';
 import CreateCaseModal from '../components/CreateCaseModal';
 import './Dashboard.css';
 
+const CASES_PAGE_SIZE = 50;
+const SEARCH_DELAY_MS = 300;
+
 const Dashboard = () => {
   const [cases, setCases] = useState([]);
   const [statistics, setStatistics] = useState(null);
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const [typeFilter, setTypeFilter] = useState('');
+  const [statusFilter, setStatusFilter] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [searchResults, setSearchResults] = useState(null);
   const [showCreateModal, setShowCreateModal] = useState(false);
   const { user, logout } = useAuth();
   const navigate = useNavigate();
 
   useEffect(() => {
     loadData();
-  }, []);
+  }, [typeFilter, statusFilter]);
+
+  // La búsqueda se resuelve en el servidor con el índice de texto completo
+  useEffect(() => {
+    const query = searchTerm.trim();
+    if (!query) {
+      setSearchResults(null);
+      return undefined;
+    }
+
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const searchRes = await casesAPI.search(query);
+        if (!cancelled) {
+          setSearchResults(searchRes.data.results);
+        }
+      } catch (error) {
+        console.error('Error buscando casos:', error);
+      }
+    }, SEARCH_DELAY_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm]);
+
+  // Los filtros y la paginación se resuelven en el servidor con los índices de casos
+  const fetchCases = (cursor) =>
+    casesAPI.query({
+      type: typeFilter || undefined,
+      status: statusFilter || undefined,
+      cursor: cursor || undefined,
+      limit: CASES_PAGE_SIZE
+    });
 
   const loadData = async () => {
     try {
       const [casesRes, statsRes] = await Promise.all([
-        casesAPI.getAll(),
+        fetchCases(null),
         blockchainAPI.getStatistics()
       ]);
       
-      setCases(Object.entries(casesRes.data.cases).map(([id, data]) => ({
-        id,
-        ...data
-      })));
+      setCases(casesRes.data.cases);
+      setNextCursor(casesRes.data.next_cursor);
       setStatistics(statsRes.data.statistics);
     } catch (error) {
       console.error('Error cargando datos:', error);
@@ -51,6 +90,16 @@ const Dashboard = () => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      const casesRes = await fetchCases(nextCursor);
+      setCases((previous) => [...previous, ...casesRes.data.cases]);
+      setNextCursor(casesRes.data.next_cursor);
+    } catch (error) {
+      console.error('Error cargando casos:', error);
+    }
+  };
+
   const handleLogout = async () => {
     await logout();
     navigate('/login');
@@ -84,9 +133,10 @@ const Dashboard = () => {
     );
   };
 
-  const filteredCases = cases.filter(c => 
-    c.id.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    c.type.toLowerCase().includes(searchTerm.toLowerCase())
+  // Los resultados de búsqueda respetan los filtros de tipo y estado
+  const filteredCases = searchResults === null ? cases : searchResults.filter(c =>
+    (!typeFilter || c.type === typeFilter) &&
+    (!statusFilter || c.status === statusFilter)
   );
 
   if (loading) {
@@ -175,12 +225,32 @@ const Dashboard = () => {
             <Search size={20} />
             <input
               type="text"
-              placeholder="Buscar casos..."
+              placeholder="Buscar en descripciones, sentencias y documentos..."
               value={searchTerm}
               onChange={(e) => setSearchTerm(e.target.value)}
               className="input"
             />
           </div>
+          <select
+            value={typeFilter}
+            onChange={(e) => setTypeFilter(e.target.value)}
+            className="input filter-select"
+          >
+            <option value="">Todos los tipos</option>
+            <option value="civil">Civil</option>
+            <option value="penal">Penal</option>
+            <option value="laboral">Laboral</option>
+          </select>
+          <select
+            value={statusFilter}
+            onChange={(e) => setStatusFilter(e.target.value)}
+            className="input filter-select"
+          >
+            <option value="">Todos los estados</option>
+            <option value="presentado">Presentado</option>
+            <option value="en_proceso">En Proceso</option>
+            <option value="resuelto">Resuelto</option>
+          </select>
           <div className="action-buttons">
             <button 
               onClick={() => setShowCreateModal(true)} 
@@ -267,6 +337,11 @@ const Dashboard = () => {
                   ))}
                 </tbody>
               </table>
+              {nextCursor && searchResults === null && (
+                <button onClick={loadMore} className="btn btn-outline load-more">
+                  Cargar más casos
+                </button>
+              )}
             </div>
           )}
         </div>
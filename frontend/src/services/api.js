@@ -44,6 +44,14 @@ export const authAPI = {
 export const casesAPI = {
   getAll: () => 
     api.get('/cases'),
+
+  // Página de casos filtrada en el servidor: { type, status, judge, from, to, cursor, limit }
+  query: (params) =>
+    api.get('/cases', { params }),
+
+  // Búsqueda de texto completo en descripciones, sentencias y nombres de documentos
+  search: (q, limit = 50) =>
+    api.get('/search', { params: { q, limit } }),
   
   getById: (caseId) => 
     api.get(`/cases/${caseId}`),
@@ -54,6 +62,15 @@ export const casesAPI = {
   addDocument: (caseId, documentData) => 
     api.post(`/cases/${caseId}/documents`, documentData),
   
+  uploadDocument: (caseId, file, documentName) => {
+    const formData = new FormData();
+    formData.append('document', file);
+    formData.append('document_name', documentName || file.name);
+    return api.post(`/cases/${caseId}/documents`, formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
+  
   scheduleHearing: (caseId, hearingData) => 
     api.post(`/cases/${caseId}/hearings`, hearingData),
   
@@ -61,6 +78,39 @@ export const casesAPI = {
     api.post(`/cases/${caseId}/judgment`, judgmentData),
 };
 
+// Transacciones (minado en segundo plano)
+export const transactionsAPI = {
+  getStatus: (transactionId) => 
+    api.get(`/transactions/${transactionId}/status`),
+};
+
+const TRANSACTION_POLL_MS = 1000;
+const TRANSACTION_POLL_ATTEMPTS = 30;
+
+// Espera a que se mine una transacción encolada (respuesta 202) consultando su estado.
+// Retorna el estado final; si sigue pendiente tras los intentos retorna { status: 'pending' }
+export const waitForTransaction = async (response) => {
+  if (response.status !== 202) {
+    return { status: 'mined' };
+  }
+
+  const transactionId = response.data.transaction_id;
+  for (let attempt = 0; attempt < TRANSACTION_POLL_ATTEMPTS; attempt++) {
+    await new Promise((resolve) => setTimeout(resolve, TRANSACTION_POLL_MS));
+    const { data } = await transactionsAPI.getStatus(transactionId);
+    if (data.status === 'mined') {
+      return data;
+    }
+    if (data.status === 'failed') {
+      throw new Error(data.error || 'La transacción no pudo minarse');
+    }
+  }
+  return { status: 'pending', transaction_id: transactionId };
+};
+
+export const PENDING_TRANSACTION_MESSAGE =
+  'La operación fue registrada y aparecerá cuando se mine su bloque';
+
 // Jueces
 export const judgesAPI = {
   getAll: () => 
@@ -75,8 +125,8 @@ export const blockchainAPI = {
   verify: () => 
     api.get('/blockchain/verify'),
   
-  getChain: () => 
-    api.get('/blockchain/chain'),
+  getChain: (params = {}) => 
+    api.get('/blockchain/chain', { params }),
   
   getStatistics: () => 
     api.get('/blockchain/statistics'),